@@ -0,0 +1,134 @@
+# benchmarks/admission.py: escrituras concurrentes con y sin control de admisión
+# (tasks/admission.py).
+#
+# --clients hilos de un mismo proceso hacen toggle y crean tareas sin pausa durante
+# --seconds segundos, con el cliente de pruebas de Django, contra una base SQLite
+# nueva (perfil --profile, por defecto production). Modos:
+#
+#   none   sin admisión: todos los hilos compiten por el lock de SQLite
+#   gate   semáforo de escrituras con cola acotada (por defecto)
+#   group  cola con group commit (TASKS_WRITE_GROUP_COMMIT=1)
+#
+# Por modo se reporta escrituras aplicadas por segundo, p50/p99/máximo de las que
+# se aplicaron, rechazos (429/503, con su latencia máxima) y errores (500,
+# "database is locked"). El límite por cliente queda desactivado: todos los hilos
+# son 127.0.0.1.
+#
+#   python benchmarks/admission.py --clients 32 --seconds 10
+
+import argparse
+import contextlib
+import json
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from suite import ms, percentile, setup_django
+
+MODES = ('none', 'gate', 'group')
+
+
+def client_loop(client, ids, seed, deadline, stats):
+    rng = random.Random(seed)
+    ok, shed, errors = [], [], 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if rng.random() < 0.8:
+                response = client.post(f'/toggle/{rng.choice(ids)}/', headers={'HX-Request': 'true'})
+            else:
+                response = client.post('/api/tasks/', {'title': 'Carga'}, content_type='application/json')
+            status = response.status_code
+        except Exception:
+            status = 500
+        elapsed = time.perf_counter() - started
+        if status in (200, 201):
+            ok.append(elapsed)
+        elif status in (429, 503):
+            shed.append(elapsed)
+        else:
+            errors += 1
+    stats.append((ok, shed, errors))
+
+
+def run_mode(mode, args):
+    from django.conf import settings
+    from django.db import connections
+    from django.test import Client
+    from tasks import admission
+    from tasks.models import Task
+
+    settings.TASK_WRITE_GROUP_COMMIT = mode == 'group'
+    ids = list(Task.objects.values_list('id', flat=True)[:1000])
+    stats = []
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(index):
+        try:
+            client_loop(Client(), ids, args.seed + index, deadline, stats)
+        finally:
+            connections.close_all()
+
+    # none: las vistas escriben directamente, como antes de tasks/admission.py
+    bypass = mock.patch.object(admission, 'run_write', lambda func: func())
+    with bypass if mode == 'none' else contextlib.nullcontext():
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    ok = [value for item in stats for value in item[0]]
+    shed = [value for item in stats for value in item[1]]
+    return {
+        'writes_per_second': round(len(ok) / args.seconds, 1),
+        'p50_ms': ms(percentile(ok, 0.50)) if ok else None,
+        'p99_ms': ms(percentile(ok, 0.99)) if ok else None,
+        'max_ms': ms(max(ok)) if ok else None,
+        'shed': len(shed),
+        'shed_max_ms': ms(max(shed)) if shed else None,
+        'errors': sum(item[2] for item in stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Escrituras concurrentes con y sin control de admisión.')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--profile', default='production', choices=('default', 'production'))
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Archivo JSON con el resultado.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'admission.sqlite3', args.profile)
+        from django.conf import settings
+        from django.core.management import call_command
+        from tasks import synthetic
+
+        settings.DEBUG = False
+        settings.ALLOWED_HOSTS = ['testserver']
+        settings.TASK_WRITE_RATE = None
+        call_command('migrate', verbosity=0)
+        synthetic.generate(args.rows, seed=args.seed)
+        report = {'rows': args.rows, 'clients': args.clients, 'seconds': args.seconds, 'modes': {}}
+        for mode in args.modes.split(','):
+            report['modes'][mode] = run_mode(mode, args)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    print(f"{args.clients} clientes, {args.seconds:g} s")
+    print(f"{'modo':<7}{'escr/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'máx ms':>9}{'rechazos':>10}{'rech. máx':>11}{'errores':>9}")
+    for mode, stats in report['modes'].items():
+        print(f"{mode:<7}{stats['writes_per_second']:>9}{stats['p50_ms']!s:>9}{stats['p99_ms']!s:>9}"
+              f"{stats['max_ms']!s:>9}{stats['shed']:>10}{stats['shed_max_ms']!s:>11}{stats['errors']:>9}")
+
+
+if __name__ == '__main__':
+    main()
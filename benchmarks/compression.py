@@ -0,0 +1,159 @@
+# benchmarks/compression.py: bytes en el cable y tiempos de la lista, el export y
+# la API sin comprimir, con gzip y con brotli (si está instalado), más el costo de
+# compilar los templates (loader cacheado frío vs. caliente).
+#
+# Usa una base SQLite con tareas sintéticas (--rows; --data-dir la conserva) y el
+# cliente de pruebas de Django, igual que benchmarks/suite.py. La lista se pide con
+# --page-size filas (por defecto 1000) y con la caché de filas vacía antes de cada
+# request, así render_time mide el render de las filas y no la caché.
+#
+#   python benchmarks/compression.py --rows 20000 --iterations 20 --output compression.json
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from suite import ms, parse_size, percentile, setup_django
+
+HTMX = {'HX-Request': 'true'}
+# (nombre, url, headers)
+ENDPOINTS = [
+    ('list_partial', '/', HTMX),
+    ('index', '/', {}),
+    ('export_csv', '/export/csv/', {}),
+    ('api_json', '/api/tasks/?page_size=500', {}),
+    ('api_ndjson', '/api/tasks/?format=ndjson', {}),
+]
+# el export y el NDJSON recorren toda la tabla: menos repeticiones
+SLOW_ENDPOINTS = {'export_csv': 5, 'api_ndjson': 5}
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def measure(client, url, headers, iterations, clear):
+    """(bytes del cuerpo, [segundos por request]) hasta leer el último byte."""
+    latencies = []
+    size = 0
+    for _ in range(iterations):
+        clear()
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        size = len(body(response))
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {url}: {response.status_code}')
+    return size, latencies
+
+
+def template_timings(iterations):
+    """Compilar y renderizar la lista con el loader cacheado vacío vs. ya cargado
+       (lo que evita template_backends.warm() en el primer request de cada worker)."""
+    from django.template import engines
+    from django.template.loader import render_to_string
+    from tasks import template_backends
+
+    loader = engines.all()[0].engine.template_loaders[0]
+    context = {'task_rows': [], 'filter_type': 'all'}
+    cold = []
+    for _ in range(iterations):
+        loader.reset()
+        started = time.perf_counter()
+        render_to_string('tasks/index.html', context)
+        cold.append(time.perf_counter() - started)
+    loader.reset()
+    started = time.perf_counter()
+    warmed = template_backends.warm()
+    warm_seconds = time.perf_counter() - started
+    warm = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        render_to_string('tasks/index.html', context)
+        warm.append(time.perf_counter() - started)
+    return {
+        'templates_warmed': warmed,
+        'warm_ms': ms(warm_seconds),
+        'index_first_render_cold_ms': ms(percentile(cold, 0.5)),
+        'index_render_cached_ms': ms(percentile(warm, 0.5)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytes y tiempos con y sin compresión.')
+    parser.add_argument('--rows', default='20k', help='Tareas sintéticas (20k, 1m...).')
+    parser.add_argument('--page-size', type=int, default=1000, help='Filas por página de la lista.')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', help='Guarda y reutiliza la base generada en este directorio.')
+    parser.add_argument('--output', help='Archivo JSON con el resultado.')
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    with tempfile.TemporaryDirectory() as scratch:
+        data_dir = Path(args.data_dir or scratch)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        db_name = data_dir / f'tasks-{rows}-seed{args.seed}.sqlite3'
+        fresh = not db_name.exists()
+        setup_django(db_name, 'default')
+
+        from django.conf import settings
+        from django.core.cache import caches
+        from django.core.management import call_command
+        from django.test import Client
+        from tasks import compression, synthetic
+        from tasks.views import TaskListView
+
+        settings.DEBUG = False
+        settings.ALLOWED_HOSTS = ['testserver']
+        if fresh:
+            call_command('migrate', verbosity=0)
+            synthetic.generate(rows, seed=args.seed)
+
+        def clear():
+            for cache in caches.all():
+                cache.clear()
+
+        encodings = {'identity': 'identity', 'gzip': 'gzip'}
+        if compression.brotli is not None:
+            encodings['br'] = 'br'
+        client = Client()
+        report = {'rows': rows, 'page_size': args.page_size, 'endpoints': {}}
+        with mock.patch.object(TaskListView, 'paginate_by', args.page_size):
+            for name, url, headers in ENDPOINTS:
+                iterations = min(args.iterations, SLOW_ENDPOINTS.get(name, args.iterations))
+                results = {}
+                for label, encoding in encodings.items():
+                    request_headers = {**headers, 'Accept-Encoding': encoding}
+                    measure(client, url, request_headers, 1, clear)
+                    size, latencies = measure(client, url, request_headers, iterations, clear)
+                    results[label] = {
+                        'bytes': size,
+                        'p50_ms': ms(percentile(latencies, 0.50)),
+                        'p95_ms': ms(percentile(latencies, 0.95)),
+                    }
+                report['endpoints'][name] = results
+        report['templates'] = template_timings(args.iterations)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    print(f"{'endpoint':<14}{'codificación':<14}{'bytes':>12}{'razón':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, results in report['endpoints'].items():
+        plain = results['identity']['bytes']
+        for label, stats in results.items():
+            ratio = stats['bytes'] / plain if plain else 1
+            print(f"{name:<14}{label:<14}{stats['bytes']:>12,}{ratio:>8.2f}{stats['p50_ms']:>9}{stats['p95_ms']:>9}")
+    templates = report['templates']
+    print(f"templates: {templates['templates_warmed']} precompilados en {templates['warm_ms']} ms; "
+          f"index sin caché {templates['index_first_render_cold_ms']} ms, "
+          f"con caché {templates['index_render_cached_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
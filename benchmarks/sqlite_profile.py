@@ -0,0 +1,158 @@
+# benchmarks/sqlite_profile.py: lecturas y escrituras concurrentes contra SQLite
+# con el perfil por defecto y con el de producción (TASKS_DB_PROFILE=production).
+#
+# Cada perfil usa una base nueva en un directorio temporal con --rows tareas;
+# --readers procesos piden la lista (HTML y API) y --writers procesos hacen toggle
+# durante --seconds segundos, a través del cliente de pruebas de Django (sin red).
+# Se reporta throughput, latencias p50/p95/p99 y errores ("database is locked").
+#
+#   python benchmarks/sqlite_profile.py --rows 20000 --readers 8 --writers 2 --seconds 10
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROFILES = ('default', 'production')
+READ_URLS = ('/', '/?filter=pending', '/api/tasks/?page_size=50')
+
+
+def setup_django(profile, db_name):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'besimplit_tasks.settings'
+    os.environ['TASKS_DB_NAME'] = str(db_name)
+    # la caché compartida escondería las lecturas: se mide la base
+    os.environ['TASKS_SHARED_CACHE'] = 'locmem'
+    if profile == 'production':
+        os.environ['TASKS_DB_PROFILE'] = 'production'
+    else:
+        os.environ.pop('TASKS_DB_PROFILE', None)
+    sys.path.insert(0, str(BASE_DIR))
+    import django
+    django.setup()
+
+
+def seed(profile, db_name, rows):
+    setup_django(profile, db_name)
+    from django.core.management import call_command
+    from tasks import counters
+    from tasks.models import Task
+
+    call_command('migrate', verbosity=0)
+    Task.objects.bulk_create(
+        (Task(title=f'Tarea {i}', description='descripción ' * 10, completed=i % 3 == 0) for i in range(rows)),
+        batch_size=2000,
+    )
+    counters.rebuild()
+
+
+def worker(profile, db_name, role, seconds, seed_value, results):
+    setup_django(profile, db_name)
+    from django.conf import settings
+    from django.test import Client
+    from tasks.models import Task
+
+    # sin DEBUG (no guarda cada consulta en memoria), como en producción
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    # todos los clientes son 127.0.0.1: sin límite por cliente (el de admisión sigue)
+    settings.TASK_WRITE_RATE = None
+    client = Client()
+    rng = random.Random(seed_value)
+    ids = list(Task.objects.values_list('id', flat=True))
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if role == 'read':
+                response = client.get(rng.choice(READ_URLS))
+            else:
+                response = client.post(f'/toggle/{rng.choice(ids)}/')
+            ok = response.status_code == 200
+        except Exception:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    results.put((role, latencies, errors))
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(latencies, errors, seconds):
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'ops_per_second': round(len(latencies) / seconds, 1),
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'mean_ms': ms(statistics.fmean(latencies)) if latencies else None,
+        'errors': errors,
+    }
+
+
+def run_profile(profile, args):
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = Path(directory) / 'bench.sqlite3'
+        process = context.Process(target=seed, args=(profile, db_name, args.rows))
+        process.start()
+        process.join()
+
+        results = context.Queue()
+        roles = ['read'] * args.readers + ['write'] * args.writers
+        processes = [
+            context.Process(target=worker, args=(profile, db_name, role, args.seconds, index, results))
+            for index, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        collected = {'read': ([], 0), 'write': ([], 0)}
+        for _ in processes:
+            role, latencies, errors = results.get()
+            previous, previous_errors = collected[role]
+            collected[role] = (previous + latencies, previous_errors + errors)
+        for process in processes:
+            process.join()
+
+    return {role: summarize(latencies, errors, args.seconds) for role, (latencies, errors) in collected.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lecturas y escrituras concurrentes por perfil de SQLite.')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--json', action='store_true', help='Imprime el resultado como JSON.')
+    args = parser.parse_args()
+
+    report = {profile: run_profile(profile, args) for profile in args.profiles.split(',')}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.rows} filas, {args.readers} lectores, {args.writers} escritores, {args.seconds:g} s")
+    print(f"{'perfil':<12}{'op':<7}{'ops/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}")
+    for profile, roles in report.items():
+        for role, stats in roles.items():
+            print(f"{profile:<12}{role:<7}{stats['ops_per_second']:>9}{stats['p50_ms']!s:>9}"
+                  f"{stats['p95_ms']!s:>9}{stats['p99_ms']!s:>9}{stats['errors']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+# benchmarks/suite.py: mide cada endpoint con tablas de distinto tamaño y guarda
+# el resultado en JSON para comparar entre versiones.
+#
+# Por cada tamaño (--sizes 10k,100k,1m,10m) se crea una base SQLite con tareas
+# sintéticas (tasks/synthetic.py, bulk inserts) y se piden los endpoints con el
+# cliente de pruebas de Django (sin red): index, parciales de filtro, stats,
+# toggle, export CSV y lista/creación de la API. Por endpoint se reporta
+# p50/p95/p99, consultas SQL por request y memoria máxima (tracemalloc, en un
+# request aparte para no inflar las latencias).
+#
+# Por defecto se vacían las cachés antes de cada request (--cache cold): se mide
+# el trabajo de la vista y no la caché compartida. Las bases generadas se pueden
+# conservar con --data-dir y se reutilizan si ya existen (generar 10M toma minutos).
+#
+#   python benchmarks/suite.py --sizes 10k,100k --iterations 30 --output bench.json
+#   python benchmarks/suite.py --sizes 10k --compare bench.json   # falla si algo empeoró
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+HTMX = {'HX-Request': 'true'}
+# (nombre, método, url, headers); en toggle {id} es una tarea al azar
+ENDPOINTS = [
+    ('index', 'get', '/', {}),
+    ('filter_pending', 'get', '/?filter=pending', HTMX),
+    ('filter_completed', 'get', '/?filter=completed', HTMX),
+    ('stats', 'get', '/stats/', HTMX),
+    ('toggle', 'post', '/toggle/{id}/', HTMX),
+    ('export_csv', 'get', '/export/csv/', {}),
+    ('api_list', 'get', '/api/tasks/?page_size=50', {}),
+    ('api_create', 'post', '/api/tasks/', {}),
+]
+# el export recorre toda la tabla: menos repeticiones
+SLOW_ENDPOINTS = {'export_csv': 10}
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    factor = {'k': 1000, 'm': 1000000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * factor)
+
+
+def setup_django(db_name, profile):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'besimplit_tasks.settings'
+    os.environ['TASKS_DB_NAME'] = str(db_name)
+    os.environ['TASKS_SHARED_CACHE'] = 'locmem'
+    if profile == 'production':
+        os.environ['TASKS_DB_PROFILE'] = 'production'
+    else:
+        os.environ.pop('TASKS_DB_PROFILE', None)
+    sys.path.insert(0, str(BASE_DIR))
+    import django
+    django.setup()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def ms(value):
+    return round(value * 1000, 2)
+
+
+class QueryCounter:
+    """execute_wrapper que cuenta consultas sin guardar el SQL (no necesita DEBUG)."""
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def request(client, method, url, headers, rng, ids):
+    if method == 'post' and url == '/api/tasks/':
+        response = client.post(url, {'title': f'Benchmark {rng.random():.6f}'}, content_type='application/json')
+    else:
+        response = getattr(client, method)(url.format(id=rng.choice(ids)), headers=headers)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    if response.status_code >= 400:
+        raise RuntimeError(f'{method.upper()} {url}: {response.status_code}')
+    return response
+
+
+def run_size(size, args, data_dir, results):
+    db_name = Path(data_dir) / f'tasks-{size}-seed{args.seed}.sqlite3'
+    fresh = not db_name.exists()
+    setup_django(db_name, args.profile)
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from tasks import synthetic
+    from tasks.models import Task
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    # todos los clientes son 127.0.0.1: sin límite por cliente (el de admisión sigue)
+    settings.TASK_WRITE_RATE = None
+    report = {'rows': size, 'generated': fresh}
+    if fresh:
+        call_command('migrate', verbosity=0)
+        started = time.perf_counter()
+        synthetic.generate(size, seed=args.seed)
+        seconds = time.perf_counter() - started
+        report.update(generate_seconds=round(seconds, 2), generate_rows_per_second=round(size / seconds))
+
+    rng = random.Random(args.seed)
+    ids = list(Task.objects.order_by('?').values_list('id', flat=True)[:1000])
+    client = Client()
+    endpoints = {}
+    for name, method, url, headers in ENDPOINTS:
+        iterations = min(args.iterations, SLOW_ENDPOINTS.get(name, args.iterations))
+        latencies, queries = [], []
+        for index in range(args.warmup + iterations):
+            if args.cache == 'cold':
+                for cache in caches.all():
+                    cache.clear()
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                request(client, method, url, headers, rng, ids)
+                elapsed = time.perf_counter() - started
+            if index >= args.warmup:
+                latencies.append(elapsed)
+                queries.append(counter.count)
+
+        if args.cache == 'cold':
+            for cache in caches.all():
+                cache.clear()
+        tracemalloc.start()
+        request(client, method, url, headers, rng, ids)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        endpoints[name] = {
+            'iterations': iterations,
+            'p50_ms': ms(percentile(latencies, 0.50)),
+            'p95_ms': ms(percentile(latencies, 0.95)),
+            'p99_ms': ms(percentile(latencies, 0.99)),
+            'max_ms': ms(max(latencies)),
+            'queries': max(set(queries), key=queries.count),
+            'queries_max': max(queries),
+            'peak_memory_kib': round(peak / 1024),
+        }
+    report['endpoints'] = endpoints
+    report['max_rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((size, report))
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold, min_delta_ms):
+    """Líneas de endpoints cuyo p95 empeoró más que threshold (razón) y que
+       min_delta_ms respecto de baseline (bajo un par de ms manda el ruido), o
+       que hacen más consultas."""
+    regressions = []
+    for size, current in report['results'].items():
+        previous = baseline.get('results', {}).get(size)
+        if not previous:
+            continue
+        for name, stats in current['endpoints'].items():
+            old = previous['endpoints'].get(name)
+            if (old and old['p95_ms'] and stats['p95_ms'] / old['p95_ms'] > threshold
+                    and stats['p95_ms'] - old['p95_ms'] > min_delta_ms):
+                regressions.append(f"{size} {name}: p95 {old['p95_ms']} → {stats['p95_ms']} ms")
+            if old and stats['queries'] > old['queries']:
+                regressions.append(f"{size} {name}: consultas {old['queries']} → {stats['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de endpoints con datos sintéticos.')
+    parser.add_argument('--sizes', default='10k,100k', help='Tamaños separados por coma (10k, 1m, 10m...).')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache', choices=('cold', 'warm'), default='cold')
+    parser.add_argument('--profile', choices=('default', 'production'), default='default',
+                        help='Perfil de SQLite (TASKS_DB_PROFILE).')
+    parser.add_argument('--data-dir', help='Guarda y reutiliza las bases generadas en este directorio.')
+    parser.add_argument('--output', help='Archivo JSON (por defecto benchmarks/results/<fecha>.json).')
+    parser.add_argument('--compare', help='JSON anterior: termina con error si algún endpoint empeoró.')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Razón de p95 tolerada al comparar.')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='Diferencia de p95 (ms) bajo la cual no se considera regresión.')
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    context = multiprocessing.get_context('spawn')
+    report = {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'iterations': args.iterations,
+            'cache': args.cache,
+            'profile': args.profile,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as scratch:
+        data_dir = args.data_dir or scratch
+        Path(data_dir).mkdir(parents=True, exist_ok=True)
+        for size in sizes:
+            # un proceso por tamaño: cada uno configura Django con su propia base
+            results = context.Queue()
+            process = context.Process(target=run_size, args=(size, args, data_dir, results))
+            process.start()
+            _, size_report = results.get()
+            process.join()
+            report['results'][str(size)] = size_report
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['meta']['date'].replace(':', '')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    print(f"{'filas':>9} {'endpoint':<17}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'consultas':>10}{'mem KiB':>9}")
+    for size, size_report in report['results'].items():
+        for name, stats in size_report['endpoints'].items():
+            print(f"{size:>9} {name:<17}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+                  f"{stats['queries']:>10}{stats['peak_memory_kib']:>9}")
+    print(f'Resultado en {output}')
+
+    if args.compare:
+        regressions = compare(
+            report, json.loads(Path(args.compare).read_text()), args.threshold, args.min_delta_ms,
+        )
+        for line in regressions:
+            print(f'REGRESIÓN {line}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,9 @@ ASGI config for besimplit_tasks project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn besimplit_tasks.asgi:application``)
+to enable the Server-Sent Events stream at ``/events/``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -14,3 +17,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'besimplit_tasks.settings')
 
 application = get_asgi_application()
+
+# compila los templates de la app antes del primer request (tasks/template_backends.py)
+from tasks import template_backends  # noqa: E402
+
+template_backends.warm()
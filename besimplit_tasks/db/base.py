@@ -0,0 +1,30 @@
+# db/base.py: backend SQLite del perfil de producción (ENGINE 'besimplit_tasks.db').
+# Es el backend sqlite3 de Django con dos agregados configurables en OPTIONS:
+#   pragmas, se aplican al abrir cada conexión (WAL, synchronous, mmap_size...);
+#   transaction_mode='IMMEDIATE', las transacciones toman el lock de escritura al
+#     empezar: con BEGIN diferido dos escrituras que primero leen (toggle, delete)
+#     chocan al subir el lock y una falla con "database is locked" sin esperar
+#     busy_timeout. (Django 5.1 trae ambas opciones; este proyecto usa 4.2.)
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        self.transaction_mode = params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,81 @@
+# db/postgresql/base.py: backend PostgreSQL con pool de conexiones
+# (ENGINE 'besimplit_tasks.db.postgresql').
+# Es el backend postgresql de Django con OPTIONS['pool'] (argumentos de
+# psycopg_pool.ConnectionPool: min_size, max_size, timeout...): cada request
+# toma una conexión abierta del pool y la devuelve al terminar, en vez de
+# conectarse de nuevo o dejar una conexión fija por hilo. Va con CONN_MAX_AGE=0.
+# Requiere psycopg 3 y psycopg-pool. (Django 5.1 trae la opción; este proyecto usa 4.2.)
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # DROP DATABASE falla si el pool aún tiene conexiones abiertas a la base de pruebas
+        self.connection.close_pool(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    # un pool por alias, base y proceso (los workers de gunicorn lo abren después
+    # del fork); la base entra en la clave porque las pruebas cambian NAME a test_*
+    _pools = {}
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pool_options = params.pop('pool', None)
+        if self.pool_options is not None:
+            if not is_psycopg3 or ConnectionPool is None:
+                raise ImproperlyConfigured("OPTIONS['pool'] requiere psycopg 3 y psycopg-pool.")
+            if self.settings_dict['CONN_MAX_AGE']:
+                raise ImproperlyConfigured("Con OPTIONS['pool'] CONN_MAX_AGE debe ser 0.")
+            if 'isolation_level' in self.settings_dict['OPTIONS']:
+                raise ImproperlyConfigured("OPTIONS['pool'] no admite isolation_level.")
+        return params
+
+    def get_pool(self, conn_params):
+        key = (self.alias, self.settings_dict['NAME'])
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                # en autocommit mientras está en el pool; Django fija el modo al tomarla
+                kwargs={**conn_params, 'autocommit': True},
+                check=ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                open=True,
+                **self.pool_options,
+            )
+            pool = self._pools.setdefault(key, pool)
+        return pool
+
+    def close_pool(self, name=None):
+        pool = self._pools.pop((self.alias, name or self.settings_dict['NAME']), None)
+        if pool is not None:
+            pool.close()
+
+    def get_new_connection(self, conn_params):
+        if self.pool_options is None:
+            return super().get_new_connection(conn_params)
+        self.isolation_level = IsolationLevel.READ_COMMITTED
+        connection = self.get_pool(conn_params).getconn()
+        connection.cursor_factory = (
+            base.ServerBindingCursor
+            if self.settings_dict['OPTIONS'].get('server_side_binding') is True
+            else base.Cursor
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool_options is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # vuelve a su propio pool; putconn deshace una transacción abierta
+            self.connection._pool.putconn(self.connection)
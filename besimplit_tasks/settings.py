@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # primero: su tiempo total cubre al resto de los middlewares
+    'tasks.metrics.MetricsMiddleware',
+    # después de las métricas: el tiempo total incluye comprimir
+    'tasks.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,16 +54,27 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # último: recibe primero las excepciones de las vistas (sobrecarga -> 503)
+    'tasks.admission.AdmissionMiddleware',
 ]
 
 ROOT_URLCONF = 'besimplit_tasks.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que mide el render para las métricas (tasks/template_backends.py)
+        'BACKEND': 'tasks.template_backends.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # loader cacheado explícito (en vez de APP_DIRS): cada template se lee y
+            # compila una vez por proceso; template_backends.warm() los carga al arrancar.
+            # Con DEBUG se recarga solo al cambiar un archivo.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -71,6 +87,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'besimplit_tasks.wsgi.application'
 
+# Vistas async para lista, stats, toggle, detalle y export (tasks/async_views.py).
+# Solo tiene sentido bajo ASGI (besimplit_tasks.asgi con uvicorn/daphne).
+TASKS_ASYNC_VIEWS = os.environ.get('TASKS_ASYNC_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -78,8 +98,173 @@ WSGI_APPLICATION = 'besimplit_tasks.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('TASKS_DB_NAME', BASE_DIR / 'db.sqlite3'),
+    }
+}
+
+# Perfil de producción para SQLite (TASKS_DB_PROFILE=production): WAL (los lectores
+# no esperan a los escritores), conexiones persistentes, transacciones IMMEDIATE
+# y pragmas aplicados al abrir cada conexión (besimplit_tasks/db/base.py).
+# journal_mode=WAL queda guardado en el archivo de la base.
+if os.environ.get('TASKS_DB_PROFILE') == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'besimplit_tasks.db',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # segundos que una escritura espera el lock antes de fallar
+            'timeout': 5,
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                # en WAL, NORMAL no pierde consistencia; solo puede perder el último commit si se cae la máquina
+                'synchronous': 'NORMAL',
+                'busy_timeout': 5000,
+                'mmap_size': 256 * 1024 * 1024,
+                # negativo = KiB: 64 MiB de caché de páginas por conexión
+                'cache_size': -64 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
+    })
+
+# Perfil PostgreSQL (TASKS_DB_PROFILE=postgres): varios escritores y varios nodos.
+# Conexión por variables de entorno y pool por proceso (besimplit_tasks/db/postgresql),
+# con CONN_MAX_AGE=0: cada request devuelve su conexión al pool.
+# TASKS_PG_POOL_MAX_SIZE=0 desactiva el pool (por ejemplo detrás de PgBouncer; en modo
+# transaction además hay que poner TASKS_PG_DISABLE_SERVER_SIDE_CURSORS=1).
+# Las pruebas corren igual: TASKS_DB_PROFILE=postgres python manage.py test
+elif os.environ.get('TASKS_DB_PROFILE') == 'postgres':
+    DATABASES['default'] = {
+        'ENGINE': 'besimplit_tasks.db.postgresql',
+        'NAME': os.environ.get('TASKS_PG_NAME', 'besimplit_tasks'),
+        'USER': os.environ.get('TASKS_PG_USER', ''),
+        'PASSWORD': os.environ.get('TASKS_PG_PASSWORD', ''),
+        'HOST': os.environ.get('TASKS_PG_HOST', ''),
+        'PORT': os.environ.get('TASKS_PG_PORT', ''),
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('TASKS_PG_DISABLE_SERVER_SIDE_CURSORS') == '1',
+        'OPTIONS': {},
+    }
+    if int(os.environ.get('TASKS_PG_POOL_MAX_SIZE', 10)):
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('TASKS_PG_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('TASKS_PG_POOL_MAX_SIZE', 10)),
+            # segundos que un request espera una conexión libre antes de fallar
+            'timeout': 10,
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Caché de filas renderizadas (tasks/fragments.py). locmem por defecto (LRU por
+# proceso); TASKS_FRAGMENT_CACHE=file usa archivos en disco compartidos entre
+# procesos (el descarte al llenarse no es LRU estricto) y TASKS_FRAGMENT_CACHE=sqlite
+# un archivo SQLite compartido con LRU. Las filas llevan su versión, así que una
+# caché por proceso nunca sirve una fila vieja. Subir VERSION cuando
+# cambie task_row_partial.html.
+if os.environ.get('TASKS_FRAGMENT_CACHE') == 'file':
+    FRAGMENT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'fragments',
+    }
+elif os.environ.get('TASKS_FRAGMENT_CACHE') == 'sqlite':
+    FRAGMENT_CACHE = {
+        'BACKEND': 'tasks.cache_backends.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache' / 'fragments.sqlite3',
     }
+else:
+    FRAGMENT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'task-fragments',
+    }
+FRAGMENT_CACHE.update({
+    'TIMEOUT': None,
+    'VERSION': 3,
+    'OPTIONS': {'MAX_ENTRIES': 10000, 'CULL_FREQUENCY': 4},
+})
+
+# Caché compartida entre workers (tasks/pagecache.py: parciales de stats y lista).
+# Por defecto un archivo SQLite en WAL (tasks/cache_backends.py) que leen todos los
+# procesos de la máquina; TASKS_SHARED_CACHE=locmem la deja por proceso.
+if os.environ.get('TASKS_SHARED_CACHE') == 'locmem':
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'task-shared',
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'tasks.cache_backends.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache' / 'shared.sqlite3',
+    }
+SHARED_CACHE.update({
+    'TIMEOUT': 600,
+    'OPTIONS': {'MAX_ENTRIES': 5000, 'CULL_FREQUENCY': 4},
+})
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragments': FRAGMENT_CACHE,
+    'shared': SHARED_CACHE,
+}
+
+TASK_FRAGMENT_CACHE = 'fragments'
+TASK_SHARED_CACHE = 'shared'
+
+# Broker de eventos SSE (tasks/events.py). InProcessBroker solo llega a los
+# clientes conectados al mismo proceso ASGI.
+TASK_EVENTS_BROKER = 'tasks.events.InProcessBroker'
+
+# Métricas por request (tasks/metrics.py): header Server-Timing e histogramas en
+# GET /metrics (formato Prometheus). Cada worker vuelca sus deltas al archivo cada
+# TASK_METRICS_FLUSH_SECONDS; TASKS_METRICS=local las deja por proceso.
+TASK_SERVER_TIMING = True
+TASK_METRICS_PATH = None if os.environ.get('TASKS_METRICS') == 'local' else BASE_DIR / 'cache' / 'metrics.sqlite3'
+TASK_METRICS_FLUSH_SECONDS = 10
+# si se define, /metrics exige "Authorization: Bearer <token>"
+TASK_METRICS_TOKEN = os.environ.get('TASKS_METRICS_TOKEN')
+
+# Compresión de respuestas (tasks/compression.py): brotli (si está instalado) o gzip
+# para HTML, CSV, JSON y NDJSON, también en streaming. TASKS_COMPRESSION=0 la
+# desactiva (por ejemplo si ya comprime el proxy).
+TASK_COMPRESSION = os.environ.get('TASKS_COMPRESSION', '1') == '1'
+TASK_COMPRESSION_MIN_SIZE = 1024
+TASK_COMPRESSION_TYPES = ['text/html', 'text/csv', 'text/plain', 'application/json', 'application/x-ndjson']
+TASK_COMPRESSION_GZIP_LEVEL = 6
+# 4-5: buena razón a un costo de CPU parecido al de gzip 6 (11 es para archivos estáticos)
+TASK_COMPRESSION_BROTLI_QUALITY = 4
+
+# Feed de cambios (GET /api/tasks/changes/): antigüedad mínima de un cambio para
+# entregarlo y días que se guardan las lápidas de tareas eliminadas
+TASK_CHANGES_SETTLE_SECONDS = 1
+TASK_TOMBSTONE_RETENTION_DAYS = 30
+
+# Archivo (tasks/archive.py, comando archive_tasks): días sin cambios tras los que
+# una tarea completada pasa de la tabla caliente a TaskArchive
+TASK_ARCHIVE_AFTER_DAYS = 90
+
+# Control de admisión de escrituras (tasks/admission.py). Por cliente: token bucket
+# de TASK_WRITE_RATE escrituras por segundo con ráfagas de TASK_WRITE_BURST (429;
+# None lo desactiva). Por proceso: TASK_WRITE_CONCURRENCY escrituras a la vez y
+# TASK_WRITE_QUEUE_SIZE en espera hasta TASK_WRITE_QUEUE_TIMEOUT segundos (503).
+# TASKS_WRITE_GROUP_COMMIT=1 aplica las escrituras desde un hilo escritor, hasta
+# TASK_WRITE_GROUP_SIZE por transacción.
+TASK_WRITE_RATE = 10
+TASK_WRITE_BURST = 60
+TASK_WRITE_CONCURRENCY = 8 if os.environ.get('TASKS_DB_PROFILE') == 'postgres' else 1
+TASK_WRITE_QUEUE_SIZE = 64
+TASK_WRITE_QUEUE_TIMEOUT = 2
+TASK_WRITE_GROUP_COMMIT = os.environ.get('TASKS_WRITE_GROUP_COMMIT') == '1'
+TASK_WRITE_GROUP_SIZE = 32
+# segundos del header Retry-After en los 503
+TASK_WRITE_RETRY_AFTER = 1
+
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_CLASSES': ['tasks.admission.WriteThrottle'],
 }
 
 
@@ -118,6 +303,12 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# Exportaciones CSV en segundo plano (management command run_export_jobs)
+EXPORT_ROOT = BASE_DIR / 'exports'
+# segundos que se conserva un archivo ya reemplazado por otro más nuevo del mismo
+# filtro (o uno fallido) antes de que run_export_jobs lo borre
+TASK_EXPORT_RETENTION_SECONDS = 3600
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
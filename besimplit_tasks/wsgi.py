@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'besimplit_tasks.settings')
 
 application = get_wsgi_application()
+
+# compila los templates de la app antes del primer request (tasks/template_backends.py)
+from tasks import template_backends  # noqa: E402
+
+template_backends.warm()
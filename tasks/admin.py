@@ -1,4 +1,6 @@
 from django.contrib import admin
 
-from .models import Task
-admin.site.register(Task)
\ No newline at end of file
+from .models import Category, Task, TaskArchive
+admin.site.register(Task)
+admin.site.register(TaskArchive)
+admin.site.register(Category)
\ No newline at end of file
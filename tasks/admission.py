@@ -0,0 +1,286 @@
+# admission.py: control de admisión de escrituras para el único escritor de SQLite.
+# En un pico, crear/alternar/eliminar compiten por el lock de escritura y los
+# requests se acumulan hasta fallar con "database is locked" después del
+# busy_timeout. Aquí se rechazan antes, rápido y con Retry-After:
+#
+# - Token bucket por cliente (TASK_WRITE_RATE escrituras/s, ráfagas de hasta
+#   TASK_WRITE_BURST): 429. En la API es un throttle de DRF (DEFAULT_THROTTLE_CLASSES);
+#   en las vistas HTMX, el decorador throttle_writes. Los baldes viven en la caché
+#   compartida, así que valen para todos los workers de la máquina (lectura y
+#   escritura no atómicas: con carrera se cuela alguna escritura de más).
+# - Admisión por proceso: como mucho TASK_WRITE_CONCURRENCY escrituras a la vez y
+#   TASK_WRITE_QUEUE_SIZE esperando; quien no entra en TASK_WRITE_QUEUE_TIMEOUT
+#   segundos recibe 503. Un "database is locked" que igual llegue también sale como 503.
+# - Group commit (TASK_WRITE_GROUP_COMMIT): las escrituras van a una cola acotada
+#   que aplica un hilo escritor, hasta TASK_WRITE_GROUP_SIZE por transacción (cada
+#   una en su savepoint): un solo lock y un solo commit por grupo. Una escritura
+#   que no empezó antes de su plazo se descarta (503) en vez de correr tarde: el
+#   cliente nunca recibe 503 por algo que sí se guardó.
+#
+# run_write(func) es la entrada de las vistas: func hace la escritura completa
+# (transacción, contadores, eventos) y su resultado vuelve al request.
+
+import contextvars
+import math
+import os
+import queue
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, close_old_connections, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.throttling import BaseThrottle
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class Overloaded(Exception):
+    """No hay capacidad de escritura ahora; reintentar en retry_after segundos."""
+
+    def __init__(self, retry_after=None):
+        self.retry_after = retry_after or settings.TASK_WRITE_RETRY_AFTER
+        super().__init__(f'Sobrecarga de escrituras, reintentar en {self.retry_after} s.')
+
+
+def _retry_after(seconds):
+    return str(max(1, math.ceil(seconds)))
+
+
+def is_locked_error(exc):
+    return isinstance(exc, OperationalError) and 'locked' in str(exc)
+
+
+# TOKEN BUCKET POR CLIENTE
+
+class TokenBucket:
+    """rate fichas por segundo, hasta burst acumuladas; cada escritura gasta una."""
+
+    def __init__(self, rate, burst, cache):
+        self.rate = rate
+        self.burst = burst
+        self.cache = cache
+
+    def take(self, key, now=None):
+        """Gasta una ficha. Devuelve 0 si había o los segundos hasta la próxima."""
+        now = time.time() if now is None else now
+        tokens, stamp = self.cache.get(key) or (self.burst, now)
+        tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+        # el balde lleno es igual que no tener entrada: expira al llenarse
+        timeout = math.ceil(self.burst / self.rate) + 1
+        if tokens < 1:
+            self.cache.set(key, (tokens, now), timeout)
+            return (1 - tokens) / self.rate
+        self.cache.set(key, (tokens - 1, now), timeout)
+        return 0
+
+
+def get_bucket():
+    """Balde configurado, o None si TASK_WRITE_RATE está vacío (sin límite por cliente)."""
+    if not settings.TASK_WRITE_RATE:
+        return None
+    return TokenBucket(settings.TASK_WRITE_RATE, settings.TASK_WRITE_BURST, caches[settings.TASK_SHARED_CACHE])
+
+
+class WriteThrottle(BaseThrottle):
+    """Throttle de DRF: limita las escrituras por cliente (las lecturas pasan)."""
+
+    def allow_request(self, request, view):
+        self.delay = 0
+        bucket = get_bucket()
+        if request.method in SAFE_METHODS or bucket is None:
+            return True
+        self.delay = bucket.take(f'write-bucket:{self.get_ident(request)}')
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+def throttled(request):
+    """Respuesta 429 con Retry-After si el cliente agotó su balde; None si puede escribir."""
+    bucket = get_bucket()
+    if request.method in SAFE_METHODS or bucket is None:
+        return None
+    delay = bucket.take(f'write-bucket:{BaseThrottle().get_ident(request)}')
+    if delay:
+        return _rejected(request, 429, 'Demasiadas escrituras, espera un momento.', delay)
+    return None
+
+
+def throttle_writes(view_func):
+    """Decorador de vistas (no DRF) que escriben: aplica throttled() antes de la vista."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        return throttled(request) or view_func(request, *args, **kwargs)
+    return wrapper
+
+
+# ADMISIÓN POR PROCESO
+
+class WriteGate:
+    """Semáforo de escrituras con cola de espera acotada (modo sin group commit)."""
+
+    def __init__(self, concurrency, queue_size):
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.queue_size = queue_size
+        self.waiting = 0
+        self.lock = threading.Lock()
+
+    def run(self, func, timeout):
+        with self.lock:
+            if self.waiting >= self.queue_size:
+                raise Overloaded()
+            self.waiting += 1
+        try:
+            acquired = self.slots.acquire(timeout=timeout)
+        finally:
+            with self.lock:
+                self.waiting -= 1
+        if not acquired:
+            raise Overloaded()
+        try:
+            return func()
+        finally:
+            self.slots.release()
+
+
+class WriteJob:
+    __slots__ = ('func', 'context', 'deadline', 'done', 'result', 'error')
+
+    def __init__(self, func, deadline):
+        self.func = func
+        # el hilo escritor corre la escritura con el contexto del request (métricas)
+        self.context = contextvars.copy_context()
+        self.deadline = deadline
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WriteQueue:
+    """Cola acotada de escrituras del proceso y su hilo escritor (group commit)."""
+
+    def __init__(self, size, group_size):
+        self.jobs = queue.Queue(maxsize=size)
+        self.group_size = group_size
+        self.thread = threading.Thread(target=self._run, name='task-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, func, timeout):
+        job = WriteJob(func, time.monotonic() + timeout)
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            raise Overloaded()
+        # siempre se resuelve: se aplica, falla o se descarta por plazo
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _take_group(self):
+        group = [self.jobs.get()]
+        while len(group) < self.group_size:
+            try:
+                group.append(self.jobs.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    def _run(self):
+        while True:
+            group = self._take_group()
+            now = time.monotonic()
+            live = []
+            for job in group:
+                if job.deadline < now:
+                    job.error = Overloaded()
+                else:
+                    live.append(job)
+            try:
+                self._commit(live)
+            finally:
+                close_old_connections()
+                for job in group:
+                    job.done.set()
+
+    def _commit(self, jobs):
+        if not jobs:
+            return
+        try:
+            with transaction.atomic():
+                for job in jobs:
+                    try:
+                        # savepoint: un error (p. ej. Http404) no deshace las demás
+                        with transaction.atomic():
+                            job.result = job.context.run(job.func)
+                    except Exception as exc:
+                        job.error = exc
+        except Exception as exc:
+            # el commit del grupo falló: nada quedó guardado
+            error = Overloaded() if is_locked_error(exc) else exc
+            for job in jobs:
+                job.error = job.error or error
+                job.result = None
+
+
+_gate = None
+_queue = None
+_setup_lock = threading.Lock()
+_pid = None
+
+
+def _backend():
+    """Cola o semáforo del proceso (se recrean tras un fork)."""
+    global _gate, _queue, _pid
+    with _setup_lock:
+        if _pid != os.getpid():
+            _gate = _queue = None
+            _pid = os.getpid()
+        if settings.TASK_WRITE_GROUP_COMMIT:
+            if _queue is None:
+                _queue = WriteQueue(settings.TASK_WRITE_QUEUE_SIZE, settings.TASK_WRITE_GROUP_SIZE)
+            return _queue
+        if _gate is None:
+            _gate = WriteGate(settings.TASK_WRITE_CONCURRENCY, settings.TASK_WRITE_QUEUE_SIZE)
+        return _gate
+
+
+def run_write(func):
+    """Corre la escritura func() con control de admisión (cola con group commit o
+       semáforo) y devuelve su resultado. Overloaded si no hay capacidad."""
+    backend = _backend()
+    if isinstance(backend, WriteQueue):
+        return backend.submit(func, settings.TASK_WRITE_QUEUE_TIMEOUT)
+    try:
+        return backend.run(func, settings.TASK_WRITE_QUEUE_TIMEOUT)
+    except OperationalError as exc:
+        if is_locked_error(exc):
+            raise Overloaded() from exc
+        raise
+
+
+# RESPUESTAS
+
+def _rejected(request, status, message, retry_after):
+    if request.headers.get('HX-Request'):
+        response = HttpResponse(message, status=status)
+    else:
+        response = JsonResponse({'detail': message}, status=status)
+    response['Retry-After'] = _retry_after(retry_after)
+    return response
+
+
+class AdmissionMiddleware(MiddlewareMixin):
+    """Convierte Overloaded y "database is locked" en 503 con Retry-After."""
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, Overloaded):
+            return _rejected(request, 503, 'Servicio ocupado, reintenta en un momento.', exception.retry_after)
+        if is_locked_error(exception):
+            return _rejected(request, 503, 'Servicio ocupado, reintenta en un momento.', settings.TASK_WRITE_RETRY_AFTER)
+        return None
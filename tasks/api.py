@@ -1,24 +1,135 @@
-from rest_framework import serializers, viewsets, mixins
+import json
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from rest_framework import serializers, status, viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.response import Response
+from tasks import admission, archive, bulk, changes, conditional, events, filters
 from tasks.models import Task
+from tasks.pagination import DEFAULT_ORDERING, InvalidCursor, TaskCursorPagination
+from tasks.serialization import FastTaskSerializer, NDJSONRenderer, renderer_classes
 # api.py: API básica con Django REST Framework.
-# Expone endpoints para listar y crear tareas.
+# Expone endpoints para listar y crear tareas, y operaciones masivas.
+
+
+class NDJSONParser(BaseParser):
+    """Parser de NDJSON (un objeto JSON por línea) para cargas masivas."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        items = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON inválido en la línea {number}: {exc}')
+        return items
 
 
 class TaskSerializer(serializers.ModelSerializer):
-    """Serializador de Task que controla cómo viajan los datos por la API."""
+    """Serializador de Task que controla cómo viajan los datos por la API.
+       Con fields=[...] solo incluye esos campos (fieldsets parciales)."""
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'completed', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'title', 'description', 'completed', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
 class TaskViewSet(mixins.ListModelMixin,
                   mixins.CreateModelMixin,
                   viewsets.GenericViewSet):
     """ViewSet
-       GET /tasks/ lista tareas (ordenadas por creación)
-       POST /tasks/ crea una nueva tarea"""
-    queryset = Task.objects.all().order_by('-created_at')
+       GET /tasks/ lista tareas (ordenadas por creación, paginadas por cursor; ETag/304)
+       GET /tasks/?q=texto busca en título y descripción, ordenado por relevancia
+       GET /tasks/?completed=&created_after=&created_before=&category=&ids=&ordering=&fields=
+           filtros, orden y campos parciales (ver tasks/filters.py)
+       GET /tasks/?archived=include|only suma las tareas archivadas o lee solo esas (tasks/archive.py)
+       GET /tasks/?format=ndjson (o Accept: application/x-ndjson) todas las filas en streaming
+       GET /tasks/changes/?since=<token> tareas creadas/modificadas e ids eliminados desde el token
+       POST /tasks/ crea una nueva tarea
+       POST /tasks/bulk/ aplica creates/updates/toggles/deletes en lote (JSON array o NDJSON)"""
+    queryset = Task.objects.all().order_by('-created_at', '-id')
     serializer_class = TaskSerializer
+    pagination_class = TaskCursorPagination
+    filter_backends = [filters.TaskFilterBackend]
+    renderer_classes = renderer_classes()
+
+    @method_decorator(cache_control(no_cache=True))
+    @method_decorator(condition(etag_func=conditional.api_list_etag,
+                                last_modified_func=conditional.table_last_modified))
+    def list(self, request, *args, **kwargs):
+        """Lee tuplas con values_list y las convierte con FastTaskSerializer:
+           misma salida que TaskSerializer sin instanciar Task ni campos de DRF."""
+        fields = filters.sparse_fields(request.query_params, TaskSerializer.Meta.fields)
+        serializer = FastTaskSerializer(Task, fields or TaskSerializer.Meta.fields)
+        try:
+            querysets = archive.querysets(
+                request.query_params,
+                lambda queryset: self.filter_queryset(queryset.order_by(*DEFAULT_ORDERING)),
+            )
+        except ValueError as exc:
+            raise ValidationError({archive.PARAM: [str(exc)]})
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            return StreamingHttpResponse(serializer.stream_ndjson(*querysets), content_type=NDJSONRenderer.media_type)
+        page = self.paginate_queryset([serializer.values(queryset) for queryset in querysets])
+        return self.get_paginated_response(serializer.to_representation(page))
+
+    def perform_create(self, serializer):
+        """Crea la tarea y actualiza contadores y resúmenes en la misma transacción
+           (con control de admisión: ver tasks/admission.py)."""
+        admission.run_write(lambda: self.create_task(serializer))
+
+    def create_task(self, serializer):
+        with transaction.atomic():
+            task = serializer.save()
+            events.publish_task(task, created=True)
 
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Recibe una lista de ítems {"op": "create|update|toggle|delete", "id": ..., ...campos}
+           y devuelve un resultado compacto por ítem: {"i", "status", "id"/"errors"}."""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Se esperaba una lista de operaciones.']})
+        if len(items) > bulk.MAX_ITEMS:
+            raise ValidationError({'non_field_errors': [f'Máximo {bulk.MAX_ITEMS} operaciones por petición.']})
+        serializer_class = self.get_serializer_class()
+        results = admission.run_write(lambda: bulk.apply_bulk(items, serializer_class))
+        return Response({'results': results}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Feed incremental: {"updated": [...], "deleted": [ids], "token", "has_more"}.
+           Sin since empieza desde el principio; con has_more conviene pedir de nuevo enseguida."""
+        params = request.query_params
+        fields = filters.sparse_fields(params, TaskSerializer.Meta.fields)
+        serializer = FastTaskSerializer(Task, fields or TaskSerializer.Meta.fields)
+        try:
+            limit = max(1, min(int(params.get('limit', changes.DEFAULT_LIMIT)), changes.MAX_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': ['Se esperaba un número entero.']})
+        try:
+            data = changes.changes_since(serializer, params.get('since'), limit)
+        except InvalidCursor:
+            raise ValidationError({'since': ['Token inválido.']})
+        except changes.ExpiredToken:
+            return Response(
+                {'detail': 'El token expiró: vuelve a sincronizar sin since.'},
+                status=status.HTTP_410_GONE,
+            )
+        return Response(data, headers={'Cache-Control': 'no-cache'})
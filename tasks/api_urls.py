@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from tasks.api import TaskViewSet
+from tasks.async_views import TaskAPIListView
 # api_urls.py: enrutamiento de la API (DRF).
 # Registra el ViewSet de tareas en un router para crear rutas REST automáticamente.
 
@@ -8,6 +9,8 @@ router = DefaultRouter()
 router.register('tasks', TaskViewSet, basename='task')
 
 urlpatterns = [
+    # lectura async (ASGI) con la misma respuesta que GET tasks/
+    path('tasks/async/', TaskAPIListView.as_view(), name='task-list-async'),
     path('', include(router.urls)),
 ]
 
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        # receptor post_delete que deja las lápidas del feed de cambios, los que mueven
+        # los contadores y los resúmenes con cada save()/delete() de una tarea, el que
+        # mueve los resúmenes de una categoría eliminada y el que instrumenta cada
+        # conexión nueva (métricas por request)
+        from . import changes, counters, metrics, rollups  # noqa: F401
@@ -0,0 +1,123 @@
+# archive.py: tabla caliente y archivo frío de tareas.
+# Las tareas completadas sin cambios hace más de TASK_ARCHIVE_AFTER_DAYS días pasan
+# de Task a TaskArchive (comando archive_tasks), por bloques de una transacción cada
+# uno: insertar en el archivo y borrar de Task. Así Task (lista, contadores, índices,
+# FTS) queda con las pendientes y las completadas recientes.
+#
+# updated_at hace de fecha de término: Task no guarda cuándo se completó y la última
+# escritura de una tarea completada es, como muy pronto, su cierre.
+#
+# Qué cambia al archivar: los contadores describen solo la tabla caliente (bajan
+# total y completadas) y la versión de la tabla sube (ETags y cachés). Los resúmenes
+# del dashboard no cambian: la tarea sigue contando el día en que se creó. Se deja
+# una lápida por tarea, como al eliminar: el feed de cambios (tasks/changes.py)
+# describe la tabla caliente y un cliente que lo sigue debe ver que la tarea salió.
+#
+# Lectura: la lista, la API y el export aceptan ?archived=include (tareas y archivo,
+# mezclados en el mismo orden y con el mismo cursor) y ?archived=only (solo el
+# archivo); sin el parámetro leen solo Task. El archivo no tiene índice FTS: q= busca
+# en él de forma lineal y sus resultados van después de los de Task.
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import bulk, counters, events, fragments
+from .models import Task, TaskArchive, TaskTombstone
+from .pagination import after_cursor, encode_cursor
+
+PARAM = 'archived'
+# valor de ?archived= -> modo
+MODES = {'include': 'include', '1': 'include', 'true': 'include', 'only': 'only'}
+BATCH_SIZE = 1000
+ARCHIVE_FIELDS = ('id', 'title', 'category_id', 'description', 'completed', 'created_at', 'updated_at', 'version')
+
+
+def parse_mode(params):
+    """'hot' (sin el parámetro), 'include' u 'only'; ValueError si el valor no se conoce."""
+    value = params.get(PARAM)
+    if not value:
+        return 'hot'
+    try:
+        return MODES[value.lower()]
+    except KeyError:
+        raise ValueError(f'{PARAM} debe ser include u only.')
+
+
+def sources(mode):
+    """Managers a leer según el modo, en el orden en que se mezclan."""
+    return {
+        'hot': [Task.objects],
+        'include': [Task.objects, TaskArchive.objects],
+        'only': [TaskArchive.objects],
+    }[mode]
+
+
+def querysets(params, build):
+    """Un queryset por fuente del modo pedido en params; build(queryset) aplica
+       filtros y orden (los mismos para todas, así comparten el cursor)."""
+    return [build(manager.all()) for manager in sources(parse_mode(params))]
+
+
+# ESCRITURA
+
+def cutoff(days=None):
+    """Fecha límite: se archivan las completadas sin cambios desde antes de ella."""
+    days = settings.TASK_ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def candidates(before, using='default'):
+    """Tareas a archivar, en orden (updated_at, id) (índice task_updated_idx)."""
+    return (
+        Task.objects.using(using)
+        .filter(completed__in=[True], updated_at__lt=before)
+        .order_by('updated_at', 'id')
+    )
+
+
+def archive_batch(before, batch_size=BATCH_SIZE, after=None, using='default'):
+    """Mueve hasta batch_size tareas en una transacción, desde el cursor after
+       (para no volver a recorrer las pendientes viejas). Devuelve (movidas, cursor)."""
+    with transaction.atomic(using=using):
+        queryset = candidates(before, using)
+        if after:
+            queryset = after_cursor(queryset, after, ('updated_at', 'id'))
+        if connections[using].features.has_select_for_update:
+            # PostgreSQL: un toggle concurrente espera a que la fila esté archivada
+            queryset = queryset.select_for_update()
+        rows = list(queryset.values_list(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            return 0, None
+        now = timezone.now()
+        TaskArchive.objects.using(using).bulk_create(
+            [TaskArchive(**dict(zip(ARCHIVE_FIELDS, row)), archived_at=now) for row in rows]
+        )
+        pks = [row[0] for row in rows]
+        TaskTombstone.objects.using(using).bulk_create([TaskTombstone(task_id=pk) for pk in pks])
+        bulk._delete_rows(pks, using)
+        counters.record_bulk(total=-len(rows), completed=-len(rows), using=using)
+        fragments.invalidate(*pks, using=using)
+    last = rows[-1]
+    return len(rows), encode_cursor(last[ARCHIVE_FIELDS.index('updated_at')], last[0])
+
+
+def archive(days=None, batch_size=BATCH_SIZE, limit=None, progress=None, using='default'):
+    """Archiva las tareas completadas más viejas que days (por defecto
+       TASK_ARCHIVE_AFTER_DAYS), hasta limit; progress(movidas) tras cada bloque.
+       Devuelve cuántas movió."""
+    before = cutoff(days)
+    moved, after = 0, None
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        count, after = archive_batch(before, size, after, using)
+        if not count:
+            break
+        moved += count
+        if progress:
+            progress(moved)
+    if moved:
+        events.publish_resync('archive')
+    return moved
@@ -0,0 +1,185 @@
+# tasks/async_views.py
+# Variantes async de las vistas calientes para despliegues ASGI (uvicorn/daphne):
+# listado, stats, toggle, detalle, export CSV y lectura de la API.
+# Usan el ORM async (afirst, aget, async for) así un request esperando a la base
+# o a un cliente lento no ocupa un hilo. Se activan con TASKS_ASYNC_VIEWS
+# (ver tasks/urls.py); bajo WSGI conviene seguir con tasks/views.py.
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.views.generic import View
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
+
+from . import admission, archive, conditional, counters, exports, filters, fragments, pagecache, serialization
+from .api import TaskSerializer
+from .models import Task
+from .pagination import DEFAULT_ORDERING, InvalidCursor, TaskCursorPagination, paginator_for
+from .serialization import FastTaskSerializer
+from .views import TaskListView as SyncTaskListView, toggle_task
+
+# mismos separadores y unicode que el JSONRenderer de DRF
+DRF_JSON = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+# LISTAR TAREAS
+class TaskListView(View):
+    """Lista paginada por cursor (misma salida que la vista sync, incluido el ETag)."""
+    page_size = SyncTaskListView.paginate_by
+
+    async def get(self, request):
+        state = await conditional.aload_table_state(request)
+        etag = conditional.list_etag(request)
+        not_modified = conditional.not_modified(request, etag, state.updated_at)
+        if not_modified:
+            return conditional.set_headers(not_modified, etag, state.updated_at)
+
+        key = pagecache.cache_key('list', etag, state)
+        htmx = bool(request.headers.get('HX-Request'))
+        cached = await pagecache.aget(key) if htmx else None
+        if cached is not None:
+            cached['Vary'] = 'HX-Request'
+            return conditional.set_headers(cached, etag, state.updated_at)
+
+        filter_type = request.GET.get('filter', 'all')
+        query = request.GET.get('q', '')
+        cursor = request.GET.get('cursor')
+        try:
+            querysets = archive.querysets(
+                request.GET, lambda queryset: queryset.order_by(*DEFAULT_ORDERING).by_status(filter_type).search(query)
+            )
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        try:
+            tasks, next_cursor = await paginator_for(querysets[0], self.page_size).apaginate_many(querysets, cursor)
+        except InvalidCursor:
+            raise Http404('Cursor inválido.')
+
+        context = {
+            'tasks': tasks,
+            'task_rows': await fragments.arender_rows(tasks),
+            'next_cursor': next_cursor,
+            'filter_type': filter_type,
+            'query': query,
+            'archived': request.GET.get(archive.PARAM, ''),
+            **counters.get_counts(state),
+        }
+        if htmx:
+            template = ("tasks/partials/task_page_partial.html" if cursor
+                        else "tasks/partials/task_list_partial.html")
+        else:
+            template = "tasks/index.html"
+        response = HttpResponse(render_to_string(template, context, request=request))
+        if htmx:
+            await pagecache.astore(key, response)
+        response['Vary'] = 'HX-Request'
+        return conditional.set_headers(response, etag, state.updated_at)
+
+
+# STATS PARCIAL PARA CONTADORES
+class TaskStatsView(View):
+    """Parcial de estadísticas desde la fila de contadores."""
+    async def get(self, request):
+        state = await conditional.aload_table_state(request)
+        etag = conditional.stats_etag(request)
+        not_modified = conditional.not_modified(request, etag, state.updated_at)
+        if not_modified:
+            return conditional.set_headers(not_modified, etag, state.updated_at)
+
+        key = pagecache.cache_key('stats', etag, state)
+        response = await pagecache.aget(key)
+        if response is None:
+            html = render_to_string(
+                "tasks/partials/stats_partial.html",
+                counters.get_counts(state),
+                request=request
+            )
+            response = await pagecache.astore(key, HttpResponse(html))
+        return conditional.set_headers(response, etag, state.updated_at)
+
+
+# TOGGLE COMPLETADO
+class TaskToggleView(View):
+    """Invierte el estado. La escritura (tarea + contadores) necesita una transacción,
+       que el ORM async todavía no ofrece: corre en el hilo de la base con sync_to_async,
+       con el mismo control de admisión que la vista sync."""
+    async def post(self, request, pk):
+        rejected = await sync_to_async(admission.throttled)(request)
+        if rejected:
+            return rejected
+        task = await sync_to_async(admission.run_write)(lambda: toggle_task(pk))
+        response = HttpResponse(await fragments.arender_row(task))
+        response['HX-Trigger'] = 'taskChanged'
+        return response
+
+
+# DETALLE (para cancelar edición)
+class TaskDetailView(View):
+    """Fila en modo lectura, con ETag por versión de la tarea."""
+    async def get(self, request, pk):
+        try:
+            task = await Task.objects.aget(pk=pk)
+        except Task.DoesNotExist:
+            raise Http404('No existe la tarea.')
+        etag = conditional.detail_etag_for(task.pk, task.version)
+        not_modified = conditional.not_modified(request, etag)
+        if not_modified:
+            return conditional.set_headers(not_modified, etag)
+        return conditional.set_headers(HttpResponse(await fragments.arender_row(task)), etag)
+
+
+#EXPORTAR CSV
+class TaskExportCSVView(View):
+    """Export CSV en streaming con iteración async: miles de descargas lentas no ocupan hilos."""
+    async def get(self, request):
+        filter_type = request.GET.get('filter', 'all')
+        try:
+            querysets = archive.querysets(request.GET, lambda queryset: queryset.by_status(filter_type))
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        response = StreamingHttpResponse(exports.astream_csv(*querysets), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="tasks_export.csv"'
+        return response
+
+
+# API (solo lectura)
+class TaskAPIListView(View):
+    """GET /api/tasks/async/: misma respuesta que GET /api/tasks/ (cursor, filtros, fields=, ETag)
+       sin pasar por DRF."""
+    async def get(self, request):
+        state = await conditional.aload_table_state(request)
+        etag = conditional.api_list_etag(request)
+        not_modified = conditional.not_modified(request, etag, state.updated_at)
+        if not_modified:
+            return conditional.set_headers(not_modified, etag, state.updated_at)
+
+        pagination = TaskCursorPagination()
+        size = pagination.page_size_from(request.GET)
+        try:
+            fields = filters.sparse_fields(request.GET, TaskSerializer.Meta.fields)
+            serializer = FastTaskSerializer(Task, fields or TaskSerializer.Meta.fields)
+            querysets = [
+                serializer.values(queryset) for queryset in archive.querysets(
+                    request.GET, lambda queryset: filters.apply(queryset.order_by(*DEFAULT_ORDERING), request.GET, fields)
+                )
+            ]
+            tasks, next_cursor = await paginator_for(querysets[0], size).apaginate_many(
+                querysets, request.GET.get(pagination.cursor_query_param)
+            )
+        except ValidationError as exc:
+            return JsonResponse(exc.detail, status=400, json_dumps_params=DRF_JSON)
+        except InvalidCursor:
+            return JsonResponse({'detail': 'Cursor inválido.'}, status=404, json_dumps_params=DRF_JSON)
+        except ValueError as exc:
+            # archived= inválido (InvalidCursor también es ValueError: va antes)
+            return JsonResponse({archive.PARAM: [str(exc)]}, status=400, json_dumps_params=DRF_JSON)
+
+        next_link = None
+        if next_cursor:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), pagination.cursor_query_param, next_cursor
+            )
+        data = {'next': next_link, 'results': serializer.to_representation(tasks)}
+        response = HttpResponse(serialization.dumps(data), content_type='application/json')
+        return conditional.set_headers(response, etag, state.updated_at)
@@ -0,0 +1,232 @@
+# bulk.py: operaciones masivas sobre tareas.
+# API (POST /api/tasks/bulk/): cada ítem trae una operación (create, update,
+# toggle, delete); se validan por lotes con el serializador (many=True) y se
+# escriben con bulk_create/bulk_update y UPDATE/DELETE por conjunto, todo en una
+# sola transacción. En PostgreSQL los creates grandes van por COPY (tasks/pgcopy.py).
+# UI (acciones masivas de index.html): completar todo lo filtrado, alternar y
+# eliminar las seleccionadas, cada una con una sola sentencia sobre el conjunto.
+
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from . import counters, events, fragments, pgcopy, rollups
+from .models import Task, TaskTombstone
+
+OPERATIONS = ('create', 'update', 'toggle', 'delete')
+BATCH_SIZE = 500
+MAX_ITEMS = 50000
+# desde cuántos creates conviene COPY en vez de INSERT ... RETURNING por lotes
+COPY_MIN_ROWS = 1000
+# tareas seleccionadas como máximo en una acción masiva de la UI
+MAX_SELECTED = 500
+
+
+def _result(index, status, **extra):
+    return {'i': index, 'status': status, **extra}
+
+
+def _validate(serializer_class, indexed_items, results, partial=False):
+    """Valida por lotes con many=True; devuelve [(índice, ítem, datos validados)].
+       Los ítems inválidos quedan registrados en results con status 400."""
+    valid = []
+    for start in range(0, len(indexed_items), BATCH_SIZE):
+        batch = indexed_items[start:start + BATCH_SIZE]
+        data = [item for _, item in batch]
+        serializer = serializer_class(data=data, many=True, partial=partial)
+        if not serializer.is_valid():
+            # se reportan los inválidos y se vuelve a validar solo el resto
+            ok = []
+            for (index, item), errors in zip(batch, serializer.errors):
+                if errors:
+                    results[index] = _result(index, 400, errors=errors)
+                else:
+                    ok.append((index, item))
+            batch = ok
+            serializer = serializer_class(data=[item for _, item in batch], many=True, partial=partial)
+            serializer.is_valid(raise_exception=True)
+        valid.extend(
+            (index, item, validated)
+            for (index, item), validated in zip(batch, serializer.validated_data)
+        )
+    return valid
+
+
+def _locked_states(ids):
+    """{id: (completed, created_at, category_id)} de las tareas existentes, bloqueadas."""
+    rows = Task.objects.select_for_update().filter(id__in=ids).values_list('id', 'completed', 'created_at', 'category_id')
+    return {pk: state for pk, *state in rows}
+
+
+def _split(items, results):
+    """Agrupa los ítems por operación y rechaza los mal formados."""
+    grouped = {op: [] for op in OPERATIONS}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = _result(index, 400, errors={'non_field_errors': ['Se esperaba un objeto.']})
+            continue
+        op = item.get('op', 'create')
+        if op not in OPERATIONS:
+            results[index] = _result(index, 400, errors={'op': [f'Operación inválida: {op}.']})
+            continue
+        if op != 'create' and (not isinstance(item.get('id'), int) or isinstance(item.get('id'), bool)):
+            results[index] = _result(index, 400, errors={'id': ['Se requiere un id entero.']})
+            continue
+        grouped[op].append((index, item))
+    return grouped
+
+
+def apply_bulk(items, serializer_class):
+    """Aplica las operaciones y devuelve una lista de resultados, uno por ítem y en orden.
+
+    Dentro de la transacción se aplican en este orden: creates, updates,
+    toggles y deletes; un id repetido en toggle se invierte una sola vez.
+    Los ítems inválidos o con id inexistente no impiden aplicar el resto."""
+    results = [None] * len(items)
+    grouped = _split(items, results)
+    creates = _validate(serializer_class, grouped['create'], results)
+    updates = _validate(serializer_class, grouped['update'], results, partial=True)
+    total_delta = completed_delta = 0
+    # (created_at, category_id, delta creadas, delta completadas) para los resúmenes
+    rollup_changes = []
+
+    now = timezone.now()
+    with transaction.atomic():
+        if creates:
+            objs = [Task(**validated) for _, _, validated in creates]
+            if len(objs) >= COPY_MIN_ROWS and pgcopy.is_supported(connection):
+                pgcopy.copy_tasks(objs)
+            else:
+                Task.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+            for (index, _, _), task in zip(creates, objs):
+                results[index] = _result(index, 201, id=task.pk)
+            total_delta += len(objs)
+            completed_delta += sum(1 for task in objs if task.completed)
+            rollup_changes.extend((task.created_at, task.category_id, 1, int(task.completed)) for task in objs)
+
+        if updates:
+            tasks = Task.objects.select_for_update().in_bulk([item['id'] for _, item, _ in updates])
+            fields = set()
+            for index, item, validated in updates:
+                task = tasks.get(item['id'])
+                if task is None:
+                    results[index] = _result(index, 404, id=item['id'])
+                    continue
+                if 'completed' in validated and validated['completed'] != task.completed:
+                    delta = 1 if validated['completed'] else -1
+                    completed_delta += delta
+                    rollup_changes.append((task.created_at, task.category_id, 0, delta))
+                for field, value in validated.items():
+                    setattr(task, field, value)
+                task.version += 1
+                task.updated_at = now
+                fields.update(validated)
+                results[index] = _result(index, 200, id=task.pk)
+            if fields:
+                Task.objects.bulk_update(tasks.values(), sorted({*fields, 'version', 'updated_at'}), batch_size=BATCH_SIZE)
+                fragments.invalidate(*tasks)
+
+        toggles = grouped['toggle']
+        if toggles:
+            ids = {item['id'] for _, item in toggles}
+            states = _locked_states(ids)
+            # un solo UPDATE invierte el estado de todo el conjunto
+            Task.objects.filter(id__in=states).toggle()
+            for index, item in toggles:
+                if item['id'] in states:
+                    results[index] = _result(index, 200, id=item['id'], completed=not states[item['id']][0])
+                else:
+                    results[index] = _result(index, 404, id=item['id'])
+            completed_delta += sum(-1 if done else 1 for done, _, _ in states.values())
+            rollup_changes.extend(
+                (created_at, category_id, 0, -1 if done else 1) for done, created_at, category_id in states.values()
+            )
+            fragments.invalidate(*states)
+
+        deletes = grouped['delete']
+        if deletes:
+            ids = {item['id'] for _, item in deletes}
+            states = _locked_states(ids)
+            # un solo DELETE y las lápidas en bloque: delete() de QuerySet traería las
+            # filas y dispararía post_delete una por una (un INSERT por lápida)
+            if states:
+                TaskTombstone.objects.bulk_create([TaskTombstone(task_id=pk) for pk in states], batch_size=BATCH_SIZE)
+                _delete_rows(states)
+            for index, item in deletes:
+                results[index] = _result(index, 204 if item['id'] in states else 404, id=item['id'])
+            total_delta -= len(states)
+            completed_delta -= sum(1 for done, _, _ in states.values() if done)
+            rollup_changes.extend(
+                (created_at, category_id, -1, -1 if done else 0) for done, created_at, category_id in states.values()
+            )
+            fragments.invalidate(*states)
+
+        if any(r and r['status'] < 300 for r in results):
+            counters.record_bulk(total=total_delta, completed=completed_delta)
+            rollups.record(rollup_changes)
+            events.publish_resync('bulk')
+
+    return results
+
+
+# ACCIONES MASIVAS DE LA UI
+
+def _delete_rows(pks, using='default'):
+    """DELETE por conjunto. QuerySet.delete() trae las filas y dispara post_delete
+       una por una (una lápida por fila): acá las lápidas se crean aparte, en bloque
+       (o no se crean, al archivar)."""
+    conn = connections[using]
+    table = conn.ops.quote_name(Task._meta.db_table)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(pks))})", list(pks))
+
+
+def complete_all(queryset):
+    """Completa todas las pendientes del queryset (el de la lista, con filtro y
+       búsqueda) con un solo UPDATE; contadores y resúmenes salen de un GROUP BY,
+       sin traer las filas. Devuelve cuántas se completaron."""
+    pending = Task.objects.filter(pk__in=queryset.order_by().values('pk'), completed__in=[False])
+    with transaction.atomic():
+        if connection.features.has_select_for_update:
+            # PostgreSQL: se bloquean antes de contar, así el conteo y el UPDATE ven las mismas filas
+            list(pending.select_for_update().values_list('pk', flat=True))
+        rollups.record_set(pending, pending=1)
+        # las filas cacheadas no se invalidan una por una: su sello (versión) ya no coincide
+        count = pending.touch(completed=True)
+        if count:
+            counters.record_bulk(completed=count)
+            events.publish_resync('bulk')
+    return count
+
+
+def toggle_selected(ids):
+    """Invierte el estado de las tareas con un solo UPDATE y las relee (como haría
+       RETURNING). Devuelve las tareas existentes, ya con el estado nuevo."""
+    with transaction.atomic():
+        Task.objects.filter(id__in=ids).toggle()
+        tasks = list(Task.objects.filter(id__in=ids).order_by('-created_at', '-id'))
+        if tasks:
+            completed = sum(1 for task in tasks if task.completed)
+            counters.record_bulk(completed=completed - (len(tasks) - completed))
+            rollups.record((task.created_at, task.category_id, 0, 1 if task.completed else -1) for task in tasks)
+            fragments.invalidate(*ids)
+            events.publish_resync('bulk')
+    return tasks
+
+
+def delete_selected(ids):
+    """Elimina las tareas con un solo DELETE (más sus lápidas en bloque). Devuelve
+       los ids que existían."""
+    with transaction.atomic():
+        states = _locked_states(ids)
+        if states:
+            TaskTombstone.objects.bulk_create([TaskTombstone(task_id=pk) for pk in states])
+            _delete_rows(states)
+            counters.record_bulk(
+                total=-len(states), completed=-sum(1 for done, _, _ in states.values() if done),
+            )
+            rollups.record(
+                (created_at, category_id, -1, -1 if done else 0) for done, created_at, category_id in states.values()
+            )
+            fragments.invalidate(*states)
+            events.publish_resync('bulk')
+    return list(states)
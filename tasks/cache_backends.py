@@ -0,0 +1,210 @@
+# cache_backends.py: backend de caché de Django sobre un archivo SQLite en modo WAL.
+# Pensado para varios workers de gunicorn en la misma máquina: todos leen y
+# escriben el mismo archivo, así comparten una sola caché caliente sin Redis.
+# En WAL las lecturas no bloquean a la escritura ni entre sí.
+#
+# Expulsión LRU aproximada: cada lectura marca accessed (como mucho una vez cada
+# TOUCH_INTERVAL segundos, para no escribir en cada get) y al pasar MAX_ENTRIES
+# se borran primero las vencidas y luego la fracción 1/CULL_FREQUENCY menos usada.
+# Contar las entradas cuesta un recorrido del índice, así que no se hace en cada
+# escritura sino en promedio una vez cada CULL_EVERY filas escritas (al azar: vale
+# igual para todos los hilos y procesos, sin un contador compartido); la caché
+# puede pasarse de MAX_ENTRIES por unas CULL_EVERY entradas hasta el próximo control.
+#
+#   CACHES = {'shared': {
+#       'BACKEND': 'tasks.cache_backends.SQLiteCache',
+#       'LOCATION': BASE_DIR / 'cache' / 'shared.sqlite3',
+#       'OPTIONS': {'MAX_ENTRIES': 5000, 'CULL_FREQUENCY': 4, 'CULL_EVERY': 100, 'TOUCH_INTERVAL': 30},
+#   }}
+
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS cache_entry (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires REAL,
+        accessed REAL NOT NULL
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS cache_entry_accessed ON cache_entry (accessed)",
+]
+
+
+class SQLiteCache(BaseCache):
+    """Caché compartida entre procesos en un archivo SQLite (una conexión por hilo y proceso)."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = Path(location)
+        options = params.get('OPTIONS', {})
+        self._touch_interval = options.get('TOUCH_INTERVAL', 30)
+        self._cull_every = options.get('CULL_EVERY', 100)
+        self._busy_timeout = options.get('BUSY_TIMEOUT', 5)
+        self._local = threading.local()
+
+    # CONEXIÓN
+
+    def _connection(self):
+        # después de un fork (gunicorn --preload) no se reutiliza la conexión del padre
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self._busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for sql in SCHEMA:
+                conn.execute(sql)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def close(self, **kwargs):
+        # la conexión se mantiene entre requests (request_finished llama a close)
+        pass
+
+    # LECTURA
+
+    def _fetch(self, keys):
+        """{clave: valor} de las claves vigentes; marca el acceso de las que lo necesitan."""
+        if not keys:
+            return {}
+        now = time.time()
+        conn = self._connection()
+        placeholders = ','.join('?' * len(keys))
+        rows = conn.execute(
+            f"SELECT key, value, expires, accessed FROM cache_entry WHERE key IN ({placeholders})",
+            keys,
+        ).fetchall()
+        found, expired, touch = {}, [], []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append(key)
+                continue
+            found[key] = pickle.loads(value)
+            if now - accessed > self._touch_interval:
+                touch.append(key)
+        if expired:
+            self._delete_keys(expired)
+        if touch:
+            conn.execute(
+                f"UPDATE cache_entry SET accessed = ? WHERE key IN ({','.join('?' * len(touch))})",
+                [now, *touch],
+            )
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._fetch([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        lookup = {self.make_and_validate_key(key, version=version): key for key in keys}
+        return {lookup[key]: value for key, value in self._fetch(list(lookup)).items()}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            "SELECT 1 FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    # ESCRITURA
+
+    def _row(self, key, value, timeout, now):
+        return (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.get_backend_timeout(timeout), now)
+
+    def _write(self, rows, replace=True):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if replace:
+                conn.executemany(
+                    """INSERT INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?)
+                       ON CONFLICT (key) DO UPDATE SET
+                           value = excluded.value, expires = excluded.expires, accessed = excluded.accessed""",
+                    rows,
+                )
+                added = len(rows)
+            else:
+                # add(): solo si no existe o ya venció
+                conn.execute(
+                    "DELETE FROM cache_entry WHERE key = ? AND expires <= ?", (rows[0][0], rows[0][3])
+                )
+                added = conn.execute(
+                    "INSERT OR IGNORE INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                    rows[0],
+                ).rowcount
+            # una escritura de added filas controla el tamaño con probabilidad added/CULL_EVERY
+            if added and random.random() * self._cull_every < added:
+                self._cull(conn, rows[0][3])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return added
+
+    def _cull(self, conn, now):
+        (count,) = conn.execute("SELECT count(*) FROM cache_entry").fetchone()
+        if count <= self._max_entries:
+            return
+        conn.execute("DELETE FROM cache_entry WHERE expires <= ?", (now,))
+        (count,) = conn.execute("SELECT count(*) FROM cache_entry").fetchone()
+        if count > self._max_entries:
+            excess = count - self._max_entries
+            conn.execute(
+                """DELETE FROM cache_entry WHERE key IN (
+                       SELECT key FROM cache_entry ORDER BY accessed LIMIT ?)""",
+                (max(excess, count // self._cull_frequency) if self._cull_frequency else count,),
+            )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write([self._row(key, value, timeout, time.time())])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        rows = [
+            self._row(self.make_and_validate_key(key, version=version), value, timeout, now)
+            for key, value in data.items()
+        ]
+        if rows:
+            self._write(rows)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self._write([self._row(key, value, timeout, time.time())], replace=False))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        return self._connection().execute(
+            "UPDATE cache_entry SET expires = ?, accessed = ? WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self.get_backend_timeout(timeout), now, key, now),
+        ).rowcount > 0
+
+    # BORRADO
+
+    def _delete_keys(self, keys):
+        placeholders = ','.join('?' * len(keys))
+        return self._connection().execute(
+            f"DELETE FROM cache_entry WHERE key IN ({placeholders})", keys
+        ).rowcount
+
+    def delete(self, key, version=None):
+        return bool(self._delete_keys([self.make_and_validate_key(key, version=version)]))
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._delete_keys(keys)
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entry")
@@ -0,0 +1,116 @@
+# changes.py: feed de cambios incremental para integraciones.
+# GET /api/tasks/changes/?since=<token> devuelve las tareas creadas o modificadas
+# (updated_at) y los ids eliminados (TaskTombstone) desde el token, más un token
+# nuevo. Cada consulta es un rango sobre un índice, así que sondear cuesta según
+# lo que cambió y no según el tamaño de la tabla.
+#
+# El token guarda dos posiciones keyset: (updated_at, id) de tareas y
+# (deleted_at, id) de lápidas. Solo se entregan cambios con más de
+# TASK_CHANGES_SETTLE_SECONDS de antigüedad, para no saltarse escrituras cuya
+# transacción confirmó después de tomar su hora. Las lápidas se purgan pasado
+# TASK_TOMBSTONE_RETENTION_DAYS; un token más viejo ya no es confiable (410).
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Task, TaskTombstone
+from .pagination import InvalidCursor, after_cursor, decode_cursor, encode_cursor
+
+TASK_ORDERING = ('updated_at', 'id')
+TOMBSTONE_ORDERING = ('deleted_at', 'id')
+# id de una posición que ya pasó todas las filas con esa fecha
+EXHAUSTED_ID = 2 ** 63 - 1
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+class ExpiredToken(Exception):
+    """El token es anterior a la retención de lápidas: hay que sincronizar de nuevo."""
+
+
+@receiver(post_delete, sender=Task)
+def record_tombstone(sender, instance, **kwargs):
+    """Toda eliminación (vistas, admin, API masiva) deja su lápida en la misma transacción."""
+    TaskTombstone.objects.create(task_id=instance.pk)
+
+
+def encode_token(task_position, tombstone_position):
+    return '.'.join(
+        encode_cursor(*position) if position else ''
+        for position in (task_position, tombstone_position)
+    )
+
+
+def decode_token(token):
+    """Devuelve (posición de tareas, posición de lápidas); None = desde el principio."""
+    parts = token.split('.')
+    if len(parts) != 2:
+        raise InvalidCursor(token)
+    return tuple(
+        decode_cursor(part, ordering) if part else None
+        for part, ordering in zip(parts, (TASK_ORDERING, TOMBSTONE_ORDERING))
+    )
+
+
+def _window(queryset, ordering, position, horizon, limit):
+    field = ordering[0]
+    queryset = queryset.filter(**{f'{field}__lte': horizon}).order_by(*ordering)
+    if position:
+        queryset = after_cursor(queryset, encode_cursor(*position), ordering)
+    return queryset[:limit + 1]
+
+
+def changes_since(serializer, token=None, limit=DEFAULT_LIMIT):
+    """Cambios después del token, en orden de tiempo y como mucho limit filas.
+
+    Devuelve {'updated': [...], 'deleted': [ids], 'token': ..., 'has_more': bool};
+    serializer (FastTaskSerializer) da forma a las tareas."""
+    task_position, tombstone_position = decode_token(token) if token else (None, None)
+    now = timezone.now()
+    if tombstone_position and tombstone_position[0] < now - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS):
+        # las lápidas posteriores a esa posición pudieron purgarse
+        raise ExpiredToken(token)
+    horizon = now - timedelta(seconds=settings.TASK_CHANGES_SETTLE_SECONDS)
+
+    tasks = serializer.values(Task.objects.order_by(*TASK_ORDERING))
+    tasks = list(_window(tasks, TASK_ORDERING, task_position, horizon, limit))
+    tombstones = list(_window(
+        TaskTombstone.objects.values_list('deleted_at', 'id', 'task_id', named=True),
+        TOMBSTONE_ORDERING, tombstone_position, horizon, limit,
+    ))
+
+    # mezcla por tiempo y corta en limit; cada posición avanza hasta lo entregado
+    merged = sorted(
+        [(row.updated_at, 0, row) for row in tasks] + [(row.deleted_at, 1, row) for row in tombstones],
+        key=lambda item: (item[0], item[1], item[2].id),
+    )
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+    updated = [row for _, kind, row in merged if kind == 0]
+    deleted = [row for _, kind, row in merged if kind == 1]
+
+    if updated:
+        task_position = (updated[-1].updated_at, updated[-1].id)
+    if deleted:
+        tombstone_position = (deleted[-1].deleted_at, deleted[-1].id)
+    if not has_more:
+        # todo lo anterior al horizonte ya se entregó
+        task_position = tombstone_position = (horizon, EXHAUSTED_ID)
+
+    return {
+        'updated': serializer.to_representation(updated),
+        'deleted': [row.task_id for row in deleted],
+        'token': encode_token(task_position, tombstone_position),
+        'has_more': has_more,
+    }
+
+
+def prune(retention_days=None):
+    """Borra lápidas más viejas que la retención; devuelve cuántas."""
+    days = settings.TASK_TOMBSTONE_RETENTION_DAYS if retention_days is None else retention_days
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
@@ -0,0 +1,160 @@
+# compression.py: compresión de las respuestas HTML, CSV y JSON/NDJSON.
+# Una lista de 1000 filas son cientos de KB de clases de Tailwind repetidas; con
+# brotli o gzip baja a una fracción. Reemplaza a django.middleware.gzip:
+#
+# - brotli si está instalado (pip install brotli) y el cliente lo acepta; si no, gzip.
+# - Solo los tipos de TASK_COMPRESSION_TYPES; nada de SSE (text/event-stream) ni binarios.
+# - Respuestas normales desde TASK_COMPRESSION_MIN_SIZE bytes, y solo si el resultado
+#   es más corto.
+# - Streaming (export CSV, NDJSON): un compresor por respuesta que vacía su salida
+#   después de cada bloque. El cliente recibe cada bloque en cuanto sale (no se
+#   junta todo el cuerpo) y el diccionario se comparte entre bloques, así que se
+#   comprime mejor que gzip bloque por bloque. Sirve para iteradores sync y async.
+#
+# El ETag fuerte pasa a débil (el cuerpo ya no es el mismo byte a byte); los 304
+# siguen funcionando porque If-None-Match compara en forma débil. El gzip de
+# respuestas normales agrega bytes aleatorios al header, igual que GZipMiddleware
+# (mitigación de BREACH); el token CSRF además va enmascarado por request.
+
+import zlib
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def accepted_encodings(header):
+    """Codificaciones con q > 0 en un header Accept-Encoding."""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0 and name.strip():
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    """'br', 'gzip' o None según lo que acepta el cliente y lo que hay instalado."""
+    accepted = accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+class GzipEncoder:
+    """Compresor gzip incremental: cada bloque sale completo (Z_SYNC_FLUSH)."""
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(settings.TASK_COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+    """Compresor brotli incremental."""
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=settings.TASK_COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+ENCODERS = {'gzip': GzipEncoder, 'br': BrotliEncoder}
+
+
+def compress(content, encoding):
+    """Cuerpo completo comprimido."""
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.TASK_COMPRESSION_BROTLI_QUALITY)
+    return compress_string(content, max_random_bytes=GZipMiddleware.max_random_bytes)
+
+
+def _as_bytes(chunk):
+    return chunk.encode() if isinstance(chunk, str) else bytes(chunk)
+
+
+def compress_stream(chunks, encoding):
+    encoder = ENCODERS[encoding]()
+    for chunk in chunks:
+        data = encoder.compress(_as_bytes(chunk))
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    encoder = ENCODERS[encoding]()
+    async for chunk in chunks:
+        data = encoder.compress(_as_bytes(chunk))
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return (
+        content_type in settings.TASK_COMPRESSION_TYPES
+        and response.status_code == 200
+        and not response.has_header('Content-Encoding')
+    )
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Comprime las respuestas de texto con brotli o gzip (ver el comentario del módulo)."""
+
+    def process_response(self, request, response):
+        if not settings.TASK_COMPRESSION or not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < settings.TASK_COMPRESSION_MIN_SIZE:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            # referencia fija: streaming_content se reemplaza justo abajo
+            original = response.streaming_content
+            if response.is_async:
+                response.streaming_content = acompress_stream(original, encoding)
+            else:
+                response.streaming_content = compress_stream(original, encoding)
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,106 @@
+# conditional.py: GET condicional (ETag / Last-Modified) para lista, stats, detalle y API.
+# Las funciones se usan con el decorador condition de Django: si el cliente manda
+# If-None-Match con la versión vigente, se responde 304 después de leer una sola
+# fila (contadores o versión de la tarea), sin tocar las filas de tareas.
+# Las dos versiones suben con cualquier Task.save()/delete(), también desde el admin
+# o el shell: la de la tarea en Task.save y la de la tabla en los receptores de
+# tasks/counters.py. Las escrituras por conjunto la suben con record_bulk.
+
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date, quote_etag
+
+from . import counters
+from .models import Task
+
+
+async def aload_table_state(request):
+    """Para vistas async: lee la fila de contadores con el ORM async y la deja en el
+       request, así las funciones de ETag de abajo no tocan la base."""
+    request._task_table_state = await counters.aget_state()
+    return request._task_table_state
+
+
+def not_modified(request, etag, last_modified=None):
+    """Equivalente del decorador condition para vistas async: 304 o None."""
+    return get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_headers(response, etag, last_modified=None):
+    response['ETag'] = quote_etag(etag)
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def table_state(request):
+    """Fila de contadores (versión y fecha de cambio de la tabla), leída una vez por request."""
+    state = getattr(request, '_task_table_state', None)
+    if state is None:
+        state = request._task_table_state = counters.get_state()
+    return state
+
+
+def _digest(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def table_last_modified(request, *args, **kwargs):
+    return table_state(request).updated_at
+
+
+def stats_etag(request, *args, **kwargs):
+    return f"stats-{table_state(request).version}"
+
+
+def list_etag(request, *args, **kwargs):
+    """La lista depende de la tabla, de la URL (filtro, cursor), de si es HTMX y de
+       la versión de la plantilla de fila."""
+    return _digest(
+        'list',
+        table_state(request).version,
+        settings.FRAGMENT_CACHE['VERSION'],
+        request.get_full_path(),
+        bool(request.headers.get('HX-Request')),
+    )
+
+
+def api_list_etag(request, *args, **kwargs):
+    return _digest(
+        'api',
+        table_state(request).version,
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+    )
+
+
+def dashboard_etag(request, *args, **kwargs):
+    """Los resúmenes cambian con cada escritura (versión de la tabla); los rangos
+       relativos (?range=30d) además con el día y la hora."""
+    return _digest(
+        'dashboard',
+        table_state(request).version,
+        timezone.now().strftime('%Y-%m-%d %H'),
+        request.get_full_path(),
+        bool(request.headers.get('HX-Request')),
+    )
+
+
+def detail_etag(request, pk, *args, **kwargs):
+    """Versión de una tarea; None si no existe (la vista responde 404)."""
+    version = Task.objects.filter(pk=pk).values_list('version', flat=True).first()
+    if version is None:
+        return None
+    return detail_etag_for(pk, version)
+
+
+def detail_etag_for(pk, version):
+    return f"task-{pk}-{version}-{settings.FRAGMENT_CACHE['VERSION']}"
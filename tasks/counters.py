@@ -0,0 +1,125 @@
+# counters.py: contadores desnormalizados de tareas (total y completadas).
+# Se actualizan en la misma transacción que la tarea, así stats y la lista leen
+# una sola fila en vez de hacer COUNT sobre toda la tabla. La misma fila lleva la
+# versión de la tabla, que sube con cada escritura (ETags y cachés).
+#
+# Task.save() y Task.delete() (vistas, API, admin, shell) los mueven solos con los
+# receptores post_save/post_delete de abajo. Las escrituras por conjunto no disparan
+# señales (QuerySet.update/toggle/touch, bulk_create, bulk_update, bulk._delete_rows):
+# quien las usa registra el efecto con record_toggled/record_bulk en la misma
+# transacción. python manage.py reconcile_counters corrige cualquier desvío.
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, F, Q
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Task, TaskCounter
+
+COUNTER_PK = 1
+
+
+def _apply(total=0, completed=0, using='default'):
+    """Suma los deltas y sube la versión con un UPDATE atómico (F) sobre la fila de contadores."""
+    updated = TaskCounter.objects.using(using).filter(pk=COUNTER_PK).update(
+        total=F('total') + total,
+        completed=F('completed') + completed,
+        version=F('version') + 1,
+        updated_at=Now(),
+    )
+    if not updated:
+        # sin fila todavía: se construye desde la tabla (ya incluye el cambio actual)
+        rebuild(using)
+
+
+def record_created(task, using='default'):
+    """Registra una tarea recién creada."""
+    _apply(total=1, completed=1 if task.completed else 0, using=using)
+
+
+def record_toggled(task, using='default'):
+    """Registra un cambio de estado; task.completed es el valor nuevo."""
+    _apply(completed=1 if task.completed else -1, using=using)
+
+
+def record_updated(task, using='default'):
+    """Registra una edición que no cambia el estado (solo sube la versión)."""
+    _apply(using=using)
+
+
+def record_deleted(task, using='default'):
+    """Registra una tarea eliminada."""
+    _apply(total=-1, completed=-1 if task.completed else 0, using=using)
+
+
+def record_bulk(total=0, completed=0, using='default'):
+    """Registra el efecto neto de una operación masiva (una sola actualización)."""
+    _apply(total=total, completed=completed, using=using)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, using, **kwargs):
+    """Toda tarea guardada con save() (vistas, API, admin, shell) mueve los contadores."""
+    previous = getattr(instance, '_loaded', {}).get('completed')
+    if created:
+        record_created(instance, using)
+    elif previous is None:
+        # instancia sin el estado leído (completed diferido o armada a mano): se recalcula
+        rebuild(using)
+    elif previous != instance.completed:
+        record_toggled(instance, using)
+    else:
+        record_updated(instance, using)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, using, **kwargs):
+    """Toda eliminación con delete() (de la tarea o de un QuerySet) resta la tarea."""
+    record_deleted(instance, using)
+
+
+def rebuild(using='default'):
+    """Recalcula los contadores desde la tabla Task y devuelve la fila actualizada.
+       También sube la versión, porque la tabla pudo cambiar por fuera de las vistas."""
+    totals = Task.objects.using(using).aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(completed=True)),
+    )
+    counters = TaskCounter.objects.using(using)
+    updated = counters.filter(pk=COUNTER_PK).update(
+        version=F('version') + 1, updated_at=Now(), **totals
+    )
+    if not updated:
+        counters.create(pk=COUNTER_PK, version=1, **totals)
+    return counters.get(pk=COUNTER_PK)
+
+
+def get_state():
+    """Fila de contadores completa (conteos, versión y fecha del último cambio)."""
+    return TaskCounter.objects.filter(pk=COUNTER_PK).first() or rebuild()
+
+
+async def aget_state():
+    """Versión async de get_state (para las vistas async)."""
+    return (
+        await TaskCounter.objects.filter(pk=COUNTER_PK).afirst()
+        or await sync_to_async(rebuild)()
+    )
+
+
+def get_version():
+    """Versión actual de la tabla Task (cambia con cualquier escritura registrada)."""
+    counter = TaskCounter.objects.filter(pk=COUNTER_PK).only('version').first() or rebuild()
+    return counter.version
+
+
+def get_counts(counter=None):
+    """Devuelve total, completadas y pendientes leyendo solo la fila de contadores
+       (o usando la fila ya leída que se pase)."""
+    counter = counter or get_state()
+    return {
+        'total_count': counter.total,
+        'completed_count': counter.completed,
+        'pending_count': counter.total - counter.completed,
+    }
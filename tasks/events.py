@@ -0,0 +1,171 @@
+# events.py: cambios de tareas empujados a los navegadores por Server-Sent Events.
+# Cada escritura publica (al hacer commit) un evento pequeño: la fila renderizada,
+# el id eliminado o el parcial de stats. La vista /events/ (ASGI) reenvía los
+# eventos a cada cliente conectado, así una escritura cuesta O(clientes) envíos
+# pequeños en vez de O(clientes) consultas.
+#
+# El broker es intercambiable (settings.TASK_EVENTS_BROKER): InProcessBroker
+# reparte dentro del proceso; RecordingBroker guarda los eventos para pruebas.
+
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+from . import counters, fragments
+
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Cola de eventos de un cliente conectado."""
+    def __init__(self, broker, maxsize=QUEUE_SIZE):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # cliente lento: se vacía su cola y se le pide recargar todo
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(('resync', {'reason': 'lagging'}))
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Pub/sub en memoria del proceso. publish() se puede llamar desde cualquier hilo."""
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = Subscription(self)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event_type, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, (event_type, data))
+            except RuntimeError:
+                # el event loop del cliente ya se cerró
+                self.unsubscribe(subscription)
+
+
+class RecordingBroker(InProcessBroker):
+    """Reemplazo local para pruebas: además de repartir, guarda todo lo publicado
+       y lo reenvía a cada nueva suscripción."""
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def subscribe(self):
+        subscription = super().subscribe()
+        for event in self.events:
+            subscription.put(event)
+        return subscription
+
+    def publish(self, event_type, data):
+        self.events.append((event_type, data))
+        super().publish(event_type, data)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.TASK_EVENTS_BROKER)()
+
+
+@receiver(setting_changed)
+def _reset_broker(setting, **kwargs):
+    if setting == 'TASK_EVENTS_BROKER':
+        get_broker.cache_clear()
+
+
+# PUBLICACIÓN (desde las vistas de escritura, después del commit)
+
+def _task_data(task):
+    return {
+        'id': task.pk,
+        'title': task.title,
+        'description': task.description,
+        'completed': task.completed,
+        'created_at': task.created_at.isoformat(),
+    }
+
+
+def publish_stats():
+    """Publica el parcial de stats (se renderiza una vez para todos los clientes)."""
+    def send():
+        html = render_to_string("tasks/partials/stats_partial.html", counters.get_counts())
+        get_broker().publish('stats', {'html': html})
+    transaction.on_commit(send)
+
+
+def publish_task(task, created=False, stats=True):
+    """Publica la fila nueva o actualizada de una tarea."""
+    def send():
+        get_broker().publish('task', {
+            'id': task.pk,
+            'created': created,
+            'task': _task_data(task),
+            'html': str(fragments.render_row(task)),
+        })
+    transaction.on_commit(send)
+    if stats:
+        publish_stats()
+
+
+def publish_deleted(pk):
+    transaction.on_commit(lambda: get_broker().publish('delete', {'id': pk}))
+    publish_stats()
+
+
+def publish_resync(reason):
+    """Cambios masivos: en vez de un evento por fila, se pide a los clientes recargar."""
+    transaction.on_commit(lambda: get_broker().publish('resync', {'reason': reason}))
+    publish_stats()
+
+
+# STREAM SSE
+
+def _format(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream():
+    """Generador async del cuerpo text/event-stream de un cliente."""
+    subscription = get_broker().subscribe()
+    try:
+        yield ': conectado\n\n'
+        while True:
+            try:
+                event_type, data = await asyncio.wait_for(subscription.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield _format(event_type, data)
+    finally:
+        subscription.close()
@@ -0,0 +1,231 @@
+# exports.py: exportación CSV de tareas.
+# Lee solo las columnas necesarias con values_list().iterator() y escribe
+# a través de un pseudo-buffer, así la memoria se mantiene plana y el primer
+# bloque sale de inmediato aunque la tabla tenga millones de filas.
+# También maneja las exportaciones en segundo plano (ExportJob): la vista encola,
+# el comando run_export_jobs escribe el archivo por bloques con checkpoint.
+# Cada bloque es su propia lectura (el checkpoint tiene que quedar confirmado), así
+# que el archivo no sale de una sola foto de la tabla: si la versión cambió entre
+# encolar y terminar, el trabajo se entrega igual pero su huella queda marcada
+# como vieja y no se reutiliza. Los archivos reemplazados por uno más nuevo del
+# mismo filtro se borran pasado TASK_EXPORT_RETENTION_SECONDS (prune).
+# En PostgreSQL el CSV en streaming sale de COPY (tasks/pgcopy.py) y
+# iterator() ya lee con un cursor del lado del servidor.
+# Con varios querysets (tareas y archivo, ver tasks/archive.py) las filas de cada
+# uno se mezclan en el mismo orden, sin juntarlas en memoria.
+
+import csv
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import archive, counters, pgcopy
+from .models import ExportJob
+from .pagination import after_cursor, amerge, encode_cursor, merge
+
+EXPORT_FIELDS = ('id', 'title', 'description', 'completed', 'created_at')
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: en vez de guardar, devuelve lo escrito."""
+    def write(self, value):
+        return value
+
+
+def format_row(values):
+    """Da formato CSV a una tupla (id, title, description, completed, created_at)."""
+    pk, title, description, completed, created_at = values
+    return [
+        pk,
+        title,
+        description,
+        'true' if completed else 'false',
+        created_at.isoformat(),
+    ]
+
+
+def _values(queryset, named=False):
+    # named: la mezcla de varias fuentes lee el orden por nombre
+    return queryset.order_by('-created_at', '-id').values_list(*EXPORT_FIELDS, named=named)
+
+
+def export_rows(*querysets, chunk_size=CHUNK_SIZE):
+    """Genera las filas del CSV (ya formateadas) sin instanciar modelos."""
+    named = len(querysets) > 1
+    sources = [_values(queryset, named).iterator(chunk_size=chunk_size) for queryset in querysets]
+    rows = sources[0] if len(sources) == 1 else merge(sources)
+    for values in rows:
+        yield format_row(values)
+
+
+def stream_csv(*querysets, chunk_size=CHUNK_SIZE):
+    """Genera el CSV por bloques de chunk_size filas (primero la cabecera)."""
+    writer = csv.writer(Echo())
+    header = writer.writerow(EXPORT_FIELDS)
+    # COPY sale de una sola consulta: con varias fuentes se mezclan en Python
+    if len(querysets) == 1 and pgcopy.is_supported(connections[querysets[0].db]):
+        return pgcopy.stream_csv(querysets[0], header.encode(), chunk_size)
+    return _stream_rows(writer, header, querysets, chunk_size)
+
+
+def _stream_rows(writer, header, querysets, chunk_size):
+    yield header
+
+    buffer = []
+    for row in export_rows(*querysets, chunk_size=chunk_size):
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+async def astream_csv(*querysets, chunk_size=CHUNK_SIZE):
+    """Versión async de stream_csv: itera los querysets con async for (vistas ASGI)."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+
+    buffer = []
+    sources = [_values(queryset, len(querysets) > 1) for queryset in querysets]
+    rows = sources[0] if len(sources) == 1 else amerge(sources)
+    async for values in rows:
+        buffer.append(writer.writerow(format_row(values)))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+# EXPORTACIONES EN SEGUNDO PLANO
+
+STALE_SUFFIX = ':stale'
+
+
+def fingerprint(filter_type, archived, version):
+    return f"{filter_type}:{archived}:{version}"
+
+
+def enqueue(filter_type, archived='hot'):
+    """Encola una exportación o reutiliza una equivalente.
+
+    Si ya existe un trabajo con la misma huella (filtro + archivo + versión de la
+    tabla) que no falló y cuyo archivo sigue en disco, se devuelve ese mismo."""
+    key = fingerprint(filter_type, archived, counters.get_version())
+    job = (
+        ExportJob.objects.filter(fingerprint=key)
+        .exclude(status=ExportJob.STATUS_FAILED)
+        .order_by('-created_at')
+        .first()
+    )
+    if job and (job.status != ExportJob.STATUS_DONE or job.file_path.exists()):
+        return job
+    return ExportJob.objects.create(filter_type=filter_type, archived=archived, fingerprint=key)
+
+
+def requeue_stale(max_age):
+    """Devuelve a pendiente los trabajos 'en proceso' sin avance hace más de max_age
+       (worker caído); se retoman desde su checkpoint."""
+    limit = timezone.now() - timedelta(seconds=max_age)
+    return ExportJob.objects.filter(
+        status=ExportJob.STATUS_RUNNING, updated_at__lt=limit
+    ).update(status=ExportJob.STATUS_PENDING)
+
+
+def claim_next():
+    """Toma el trabajo pendiente más antiguo; el UPDATE condicional evita que
+       dos workers tomen el mismo."""
+    for job in ExportJob.objects.filter(status=ExportJob.STATUS_PENDING)[:10]:
+        claimed = ExportJob.objects.filter(
+            pk=job.pk, status=ExportJob.STATUS_PENDING
+        ).update(status=ExportJob.STATUS_RUNNING, updated_at=timezone.now())
+        if claimed:
+            job.status = ExportJob.STATUS_RUNNING
+            return job
+    return None
+
+
+def _checkpoint(job, data, fh, cursor='', rows=0):
+    """Escribe un bloque, lo baja a disco y recién entonces guarda el checkpoint."""
+    fh.write(data)
+    fh.flush()
+    os.fsync(fh.fileno())
+    job.bytes_written += len(data)
+    job.rows_written += rows
+    if cursor:
+        job.cursor = cursor
+    job.save(update_fields=['bytes_written', 'rows_written', 'cursor', 'updated_at'])
+
+
+def run_job(job, chunk_size=CHUNK_SIZE):
+    """Escribe el CSV del trabajo en disco por bloques de chunk_size filas.
+
+    Retoma desde el último checkpoint: trunca el archivo a los bytes confirmados
+    (descarta un bloque a medio escribir) y continúa después del cursor guardado."""
+    path = job.file_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        os.truncate(path, job.bytes_written)
+    else:
+        job.bytes_written = job.rows_written = 0
+        job.cursor = ''
+
+    writer = csv.writer(Echo())
+    querysets = [_values(manager.by_status(job.filter_type), named=True) for manager in archive.sources(job.archived)]
+    try:
+        with open(path, 'ab') as fh:
+            if job.bytes_written == 0:
+                _checkpoint(job, writer.writerow(EXPORT_FIELDS).encode(), fh)
+
+            while True:
+                # chunk_size filas de cada fuente desde el cursor; mezcladas, las primeras chunk_size
+                chunks = [
+                    list((after_cursor(queryset, job.cursor) if job.cursor else queryset)[:chunk_size])
+                    for queryset in querysets
+                ]
+                rows = list(merge(chunks))[:chunk_size]
+                if not rows:
+                    break
+                data = ''.join(writer.writerow(format_row(values)) for values in rows)
+                last = rows[-1]
+                _checkpoint(job, data.encode(), fh, encode_cursor(last.created_at, last.id), len(rows))
+    except Exception as exc:
+        job.status = ExportJob.STATUS_FAILED
+        job.error = str(exc)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        raise
+
+    job.status = ExportJob.STATUS_DONE
+    job.finished_at = timezone.now()
+    fields = ['status', 'finished_at', 'updated_at']
+    if not job.fingerprint.endswith(f':{counters.get_version()}'):
+        # la tabla cambió desde que se encoló: el archivo mezcla versiones
+        job.fingerprint += STALE_SUFFIX
+        fields.append('fingerprint')
+    job.save(update_fields=fields)
+    return job
+
+
+def prune(retention=None):
+    """Borra los trabajos (y sus archivos) reemplazados por uno terminado más nuevo
+       del mismo filtro y los fallidos, si terminaron hace más de retention segundos
+       (por defecto TASK_EXPORT_RETENTION_SECONDS). Devuelve cuántos borró."""
+    retention = settings.TASK_EXPORT_RETENTION_SECONDS if retention is None else retention
+    limit = timezone.now() - timedelta(seconds=retention)
+    latest = {}
+    for job in ExportJob.objects.filter(status=ExportJob.STATUS_DONE).order_by('-created_at'):
+        latest.setdefault((job.filter_type, job.archived), job.pk)
+    old = ExportJob.objects.filter(
+        status__in=[ExportJob.STATUS_DONE, ExportJob.STATUS_FAILED], updated_at__lt=limit,
+    ).exclude(pk__in=latest.values())
+    removed = 0
+    for job in old:
+        job.file_path.unlink(missing_ok=True)
+        job.delete()
+        removed += 1
+    return removed
@@ -0,0 +1,123 @@
+# filters.py: filtros, orden y campos parciales (fields=) de la API de tareas.
+# Todo se traduce a SQL: los filtros a WHERE sobre columnas indexadas, el orden
+# a una lista blanca de órdenes keyset (el cursor sigue funcionando) y fields=
+# a un SELECT con solo esas columnas (only) además de la salida del serializador.
+#
+# GET /api/tasks/?completed=false&created_after=2026-01-01&category=3
+#                &ids=1,2,3&ordering=created_at&fields=id,completed
+
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .pagination import DEFAULT_ORDERING
+
+# ordering=<clave> -> ORDER BY; todas terminan en id (cursor) y las cubre un índice
+ORDERINGS = {
+    '-created_at': DEFAULT_ORDERING,
+    'created_at': ('created_at', 'id'),
+    '-id': ('-id',),
+    'id': ('id',),
+}
+MAX_IDS = 500
+TRUE_VALUES = {'true', '1', 'yes'}
+FALSE_VALUES = {'false', '0', 'no'}
+
+
+def _boolean(name, value):
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError({name: ['Se esperaba true o false.']})
+
+
+def _datetime(name, value, end_of_day=False):
+    """Acepta fecha-hora ISO o solo fecha; sin zona horaria se usa la del proyecto."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValidationError({name: ['Fecha inválida, se esperaba formato ISO 8601.']})
+        parsed = datetime.combine(date, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _ids(name, value):
+    try:
+        ids = {int(part) for part in value.split(',') if part.strip()}
+    except ValueError:
+        raise ValidationError({name: ['Se esperaba una lista de ids separados por coma.']})
+    if len(ids) > MAX_IDS:
+        raise ValidationError({name: [f'Máximo {MAX_IDS} ids por consulta.']})
+    return ids
+
+
+def filter_tasks(queryset, params):
+    """Aplica completed, created_after, created_before, category (id o none) e ids."""
+    if params.get('completed'):
+        queryset = queryset.filter(completed__in=[_boolean('completed', params['completed'])])
+    if params.get('created_after'):
+        queryset = queryset.filter(created_at__gte=_datetime('created_after', params['created_after']))
+    if params.get('created_before'):
+        queryset = queryset.filter(
+            created_at__lte=_datetime('created_before', params['created_before'], end_of_day=True)
+        )
+    if params.get('category'):
+        if params['category'] == 'none':
+            queryset = queryset.filter(category__isnull=True)
+        else:
+            queryset = queryset.filter(category_id__in=_ids('category', params['category']))
+    if params.get('ids'):
+        queryset = queryset.filter(id__in=_ids('ids', params['ids']))
+    return queryset
+
+
+def order_tasks(queryset, params):
+    """ordering=<clave de ORDERINGS>; sin ordering se deja el orden del queryset
+       (fecha de creación, o relevancia si hubo búsqueda)."""
+    key = params.get('ordering')
+    if not key:
+        return queryset
+    if key not in ORDERINGS:
+        raise ValidationError({'ordering': [f'Valores posibles: {", ".join(ORDERINGS)}.']})
+    return queryset.order_by(*ORDERINGS[key])
+
+
+def sparse_fields(params, allowed):
+    """Lista de campos pedidos en fields=, en el orden del serializador; None si no se pidió."""
+    if not params.get('fields'):
+        return None
+    requested = {name.strip() for name in params['fields'].split(',') if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValidationError({'fields': [f'Campos desconocidos: {", ".join(sorted(unknown))}.']})
+    return [name for name in allowed if name in requested]
+
+
+def only_fields(queryset, fields):
+    """Reduce el SELECT a los campos pedidos más los que necesita el cursor."""
+    if fields is None:
+        return queryset
+    needed = {field.lstrip('-') for field in queryset.query.order_by} - set(queryset.query.annotations)
+    return queryset.only(*fields, *needed, 'id')
+
+
+def apply(queryset, params, fields=None):
+    """Filtros, búsqueda (q), orden y columnas: lo que hacen la API DRF y la vista async."""
+    queryset = filter_tasks(queryset, params).search(params.get('q'))
+    return only_fields(order_tasks(queryset, params), fields)
+
+
+class TaskFilterBackend(BaseFilterBackend):
+    """Filter backend de DRF para TaskViewSet (solo en list)."""
+
+    def filter_queryset(self, request, queryset, view):
+        fields = sparse_fields(request.query_params, view.get_serializer_class().Meta.fields)
+        return apply(queryset, request.query_params, fields)
@@ -0,0 +1,108 @@
+# fragments.py: caché del HTML renderizado de cada fila (task_row_partial.html).
+# La clave es el id de la tarea; la versión de la caché (VERSION en settings)
+# hace de sello de plantilla. Las vistas de escritura y la API invalidan las
+# filas que cambian, así una lista re-renderiza solo esas.
+# Cada entrada guarda además el sello de la fila (version, updated_at): si otro
+# proceso cambió la tarea y esta caché no se enteró, el sello no coincide y la
+# fila se vuelve a renderizar.
+#
+# El parcial de fila no debe depender del request (csrf, usuario): el mismo
+# HTML se sirve a todos.
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+ROW_TEMPLATE = "tasks/partials/task_row_partial.html"
+
+
+def get_cache():
+    return caches[settings.TASK_FRAGMENT_CACHE]
+
+
+def _key(pk):
+    return f"task-row:{pk}"
+
+
+def _stamp(task):
+    # una tarea archivada conserva id y versión, pero su fila es otra (sin acciones)
+    return (task.version, task.updated_at.timestamp(), task.is_archived)
+
+
+def _render(task):
+    return render_to_string(ROW_TEMPLATE, {'task': task})
+
+
+def _cached_html(entry, task):
+    if entry is not None and entry[0] == _stamp(task):
+        return entry[1]
+    return None
+
+
+def render_row(task):
+    """HTML de una fila desde la caché; si no está (o es de otra versión), se renderiza y se guarda."""
+    cache = get_cache()
+    html = _cached_html(cache.get(_key(task.pk)), task)
+    if html is None:
+        html = _render(task)
+        cache.set(_key(task.pk), (_stamp(task), html))
+    return mark_safe(html)
+
+
+async def arender_row(task):
+    """render_row para las vistas async: la caché se lee y escribe con su API async."""
+    cache = get_cache()
+    html = _cached_html(await cache.aget(_key(task.pk)), task)
+    if html is None:
+        html = _render(task)
+        await cache.aset(_key(task.pk), (_stamp(task), html))
+    return mark_safe(html)
+
+
+def _rows(tasks, cached):
+    """(filas en orden, entradas a guardar) a partir de lo que había en la caché."""
+    missing = {}
+    rows = []
+    for task in tasks:
+        html = _cached_html(cached.get(_key(task.pk)), task)
+        if html is None:
+            html = _render(task)
+            missing[_key(task.pk)] = (_stamp(task), html)
+        rows.append(mark_safe(html))
+    return rows, missing
+
+
+def render_rows(tasks):
+    """HTML de varias filas, en orden, con una lectura y una escritura a la caché."""
+    cache = get_cache()
+    rows, missing = _rows(tasks, cache.get_many([_key(task.pk) for task in tasks]))
+    if missing:
+        cache.set_many(missing)
+    return rows
+
+
+async def arender_rows(tasks):
+    """render_rows para las vistas async: la caché se lee y escribe con su API async."""
+    cache = get_cache()
+    rows, missing = _rows(tasks, await cache.aget_many([_key(task.pk) for task in tasks]))
+    if missing:
+        await cache.aset_many(missing)
+    return rows
+
+
+def out_of_band(html):
+    """La misma fila marcada para swap out-of-band (hx-swap-oob): una respuesta
+       puede reemplazar varias filas a la vez."""
+    return mark_safe(html.replace(' id="task-', ' hx-swap-oob="true" id="task-', 1))
+
+
+def invalidate(*pks, using='default'):
+    """Descarta las filas de esas tareas ahora y otra vez al hacer commit (de la
+       base using), por si otra petición guardó la versión vieja antes de que se
+       confirmara el cambio."""
+    keys = [_key(pk) for pk in pks]
+    if keys:
+        get_cache().delete_many(keys)
+        transaction.on_commit(lambda: get_cache().delete_many(keys), using=using)
@@ -0,0 +1,219 @@
+# imports.py: importación masiva de tareas (comando import_tasks).
+# Lee en streaming CSV (el mismo formato que escribe exports.py) o NDJSON, valida
+# por lotes con las reglas de TaskForm y escribe con bulk_create (COPY en
+# PostgreSQL) en transacciones de chunk_size filas: si la importación se corta,
+# los bloques anteriores ya quedaron confirmados, con sus contadores.
+# La validación (lo caro por fila) puede repartirse en un pool de procesos; la
+# lectura y la escritura quedan en el proceso principal (un solo escritor).
+
+import csv
+import json
+import multiprocessing
+import time
+from collections import deque
+from itertools import islice
+
+import django
+from django.db import connections, transaction
+from django.db.models.sql import InsertQuery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, events, pgcopy, rollups
+from .forms import TaskForm
+from .models import Task
+
+FORMATS = ('csv', 'ndjson')
+BATCH_SIZE = 1000
+CHUNK_SIZE = 20000
+# se guardan los errores de los primeros registros rechazados (el resto solo se cuenta)
+MAX_REPORTED_ERRORS = 100
+BOOLEANS = {'true': True, 'false': False, '1': True, '0': False, '': False}
+
+
+def detect_format(path):
+    """Formato según la extensión del archivo ('-' o desconocida: csv)."""
+    return 'ndjson' if str(path).endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def read_records(stream, fmt):
+    """Genera (número, registro) del archivo. En CSV el registro es un dict por
+       cabecera; en NDJSON la línea sin decodificar (se decodifica al validar)."""
+    if fmt == 'csv':
+        reader = csv.reader(stream)
+        header = next(reader, None) or []
+        for number, row in enumerate(reader, start=2):
+            if row:
+                yield number, dict(zip(header, row))
+    else:
+        for number, line in enumerate(stream, start=1):
+            if line.strip():
+                yield number, line
+
+
+def _parse_completed(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in BOOLEANS:
+        return BOOLEANS[value.strip().lower()]
+    raise ValueError('Se esperaba true o false.')
+
+
+def _parse_created_at(value):
+    if value in (None, ''):
+        return None
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError('Fecha inválida (se espera ISO 8601).')
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def clean_record(record, form=None):
+    """Valida un registro con TaskForm y los campos que el formulario no tiene.
+       Devuelve ((title, description, completed, created_at), None) o (None, errores).
+
+       form permite reutilizar un TaskForm entre registros: construirlo (copia
+       profunda de campos y widgets) cuesta tanto como validar."""
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as exc:
+            return None, {'__all__': [f'JSON inválido: {exc}']}
+    if not isinstance(record, dict):
+        return None, {'__all__': ['Se esperaba un objeto.']}
+
+    form = form or TaskForm()
+    form.data = {'title': record.get('title'), 'description': record.get('description') or ''}
+    form.is_bound = True
+    form.full_clean()
+    errors = {field: list(messages) for field, messages in form.errors.items()}
+    values = {}
+    for field, parse in (('completed', _parse_completed), ('created_at', _parse_created_at)):
+        try:
+            values[field] = parse(record.get(field, ''))
+        except ValueError as exc:
+            errors[field] = [str(exc)]
+    if errors:
+        return None, errors
+    data = form.cleaned_data
+    return (data['title'], data['description'], values['completed'], values['created_at']), None
+
+
+def clean_batch(batch):
+    """Valida un lote [(número, registro)]; devuelve (filas válidas, [(número, errores)])."""
+    rows, errors = [], []
+    form = TaskForm()
+    for number, record in batch:
+        values, record_errors = clean_record(record, form)
+        if record_errors:
+            errors.append((number, record_errors))
+        else:
+            rows.append(values)
+    return rows, errors
+
+
+def _batches(records, size):
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def _cleaned(batches, workers):
+    """Resultados de clean_batch en orden; con workers > 0 en un pool de procesos,
+       con a lo más 2 lotes por proceso en vuelo (la memoria no crece con el archivo)."""
+    if workers <= 0:
+        yield from map(clean_batch, batches)
+        return
+    with multiprocessing.Pool(workers, initializer=django.setup) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.apply_async(clean_batch, (batch,)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def _created_at_field():
+    # copia del campo sin auto_now_add: el INSERT escribe la fecha de cada objeto
+    # sin tocar el campo del modelo, que comparten todos los hilos del proceso
+    field = Task._meta.get_field('created_at')
+    name, path, args, kwargs = field.deconstruct()
+    copy = type(field)(*args, **{**kwargs, 'auto_now_add': False})
+    copy.set_attributes_from_name(name)
+    copy.model = Task
+    return copy
+
+
+def _bulk_insert(objs, batch_size, using):
+    """bulk_create que conserva el created_at de cada objeto: mismos INSERT por
+       lotes (con RETURNING donde se puede), una sola escritura por fila."""
+    connection = connections[using]
+    fields = [
+        _created_at_field() if field.attname == 'created_at' else field
+        for field in Task._meta.concrete_fields if not field.primary_key
+    ]
+    returning = Task._meta.db_returning_fields if connection.features.can_return_rows_from_bulk_insert else None
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(fields, objs) or batch_size)
+    for start in range(0, len(objs), batch_size):
+        batch = objs[start:start + batch_size]
+        query = InsertQuery(Task)
+        query.insert_values(fields, batch)
+        rows = query.get_compiler(using=using).execute_sql(returning)
+        for index, obj in enumerate(batch):
+            for field, value in zip(returning or (), rows[index] if rows else ()):
+                setattr(obj, field.attname, value)
+            obj._state.adding = False
+            obj._state.db = using
+
+
+def insert_tasks(objs, batch_size=BATCH_SIZE, using='default'):
+    """Inserta tareas nuevas (con su created_at) en una transacción y actualiza contadores y resúmenes."""
+    with transaction.atomic(using=using):
+        if pgcopy.is_supported(connections[using]):
+            pgcopy.copy_tasks(objs, using=using, keep_created_at=True)
+        else:
+            _bulk_insert(objs, batch_size, using)
+        counters.record_bulk(total=len(objs), completed=sum(1 for obj in objs if obj.completed), using=using)
+        rollups.record_tasks(objs, using)
+    return len(objs)
+
+
+def write_rows(rows, batch_size=BATCH_SIZE, using='default'):
+    """Inserta las filas validadas (sin fecha: ahora)."""
+    now = timezone.now()
+    objs = [
+        Task(title=title, description=description, completed=completed, created_at=created_at or now)
+        for title, description, completed, created_at in rows
+    ]
+    return insert_tasks(objs, batch_size, using)
+
+
+def import_tasks(stream, fmt='csv', batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE, workers=0,
+                 progress=None, using='default'):
+    """Importa todas las tareas del stream. progress(stats) se llama después de
+       cada transacción. Devuelve {'imported', 'invalid', 'errors', 'seconds'};
+       errors son (número de línea/fila, errores) de los primeros registros rechazados."""
+    started = time.perf_counter()
+    stats = {'imported': 0, 'invalid': 0, 'errors': [], 'seconds': 0.0}
+    pending = []
+
+    def flush():
+        stats['imported'] += write_rows(pending, batch_size, using)
+        stats['seconds'] = time.perf_counter() - started
+        pending.clear()
+        if progress:
+            progress(stats)
+
+    for rows, errors in _cleaned(_batches(read_records(stream, fmt), batch_size), workers):
+        pending.extend(rows)
+        stats['invalid'] += len(errors)
+        stats['errors'].extend(errors[:MAX_REPORTED_ERRORS - len(stats['errors'])])
+        if len(pending) >= chunk_size:
+            flush()
+    if pending:
+        flush()
+    if stats['imported']:
+        events.publish_resync('import')
+    stats['seconds'] = time.perf_counter() - started
+    return stats
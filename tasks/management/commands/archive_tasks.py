@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from tasks import archive
+
+class Command(BaseCommand):
+    help = 'Mueve las tareas completadas sin cambios hace más de N días de la tabla de tareas al archivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='Días sin cambios (por defecto TASK_ARCHIVE_AFTER_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE,
+                            help='Tareas por transacción.')
+        parser.add_argument('--limit', type=int, help='Máximo de tareas a mover en esta corrida.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta las tareas a archivar.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or (options['days'] is not None and options['days'] < 0):
+            raise CommandError('--batch-size debe ser positivo y --days >= 0.')
+        if options['dry_run']:
+            count = archive.candidates(archive.cutoff(options['days']), options['database']).count()
+            self.stdout.write(f'{count} tareas para archivar.')
+            return
+        started = time.perf_counter()
+
+        def progress(moved):
+            self.stderr.write(f'{moved} tareas archivadas ({moved / (time.perf_counter() - started):,.0f} filas/s)')
+
+        moved = archive.archive(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+            progress=progress if options['verbosity'] > 1 else None,
+            using=options['database'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'{moved} tareas archivadas.'))
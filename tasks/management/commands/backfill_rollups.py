@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from tasks import rollups
+
+class Command(BaseCommand):
+    help = 'Reconstruye los resúmenes por día y por hora del dashboard desde las tareas y el archivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Solo desde este día (AAAA-MM-DD, hora local); por defecto todo.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since debe tener el formato AAAA-MM-DD.')
+
+        days, hours = rollups.rebuild(since=since, using=options['database'])
+        self.stdout.write(self.style.SUCCESS(f'Resúmenes reconstruidos ({days} filas por día, {hours} por hora).'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from tasks import synthetic
+
+class Command(BaseCommand):
+    help = 'Genera tareas sintéticas con distribuciones realistas (pruebas de carga y benchmarks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help='Cantidad de tareas a crear (10000, 1000000...).')
+        parser.add_argument('--seed', type=int, default=0, help='Semilla (misma semilla, mismas filas).')
+        parser.add_argument('--batch-size', type=int, default=synthetic.BATCH_SIZE)
+        parser.add_argument('--chunk-size', type=int, default=synthetic.CHUNK_SIZE,
+                            help='Filas por transacción.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options['count'] < 0 or options['batch_size'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('count debe ser >= 0 y --batch-size/--chunk-size positivos.')
+        started = time.perf_counter()
+
+        def progress(created):
+            rate = created / (time.perf_counter() - started)
+            self.stderr.write(f'{created}/{options["count"]} tareas ({rate:,.0f} filas/s)')
+
+        created = synthetic.generate(
+            options['count'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+            progress=progress if options['verbosity'] > 0 else None,
+            using=options['database'],
+        )
+        seconds = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} tareas sintéticas creadas en {seconds:.1f} s ({created / seconds if seconds else 0:,.0f} filas/s).'
+        ))
@@ -0,0 +1,57 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from tasks import imports
+
+class Command(BaseCommand):
+    help = 'Importa tareas desde CSV (formato del export) o NDJSON, en lotes y transacciones por bloque'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Archivo a importar ('-' lee de stdin).")
+        parser.add_argument('--format', choices=imports.FORMATS,
+                            help='Formato de entrada (por defecto según la extensión; stdin: csv).')
+        parser.add_argument('--batch-size', type=int, default=imports.BATCH_SIZE,
+                            help='Filas por lote de validación y por INSERT.')
+        parser.add_argument('--chunk-size', type=int, default=imports.CHUNK_SIZE,
+                            help='Filas por transacción.')
+        parser.add_argument('--workers', type=int, default=0,
+                            help='Procesos que validan en paralelo (0 = en este proceso).')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--batch-size y --chunk-size deben ser positivos.')
+        path = options['path']
+        fmt = options['format'] or imports.detect_format(path)
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        else:
+            try:
+                stream = open(path, encoding='utf-8', newline='')
+            except OSError as exc:
+                raise CommandError(f'No se puede abrir {path}: {exc}')
+
+        def progress(stats):
+            rate = stats['imported'] / stats['seconds'] if stats['seconds'] else 0
+            self.stderr.write(f"{stats['imported']} filas importadas, {stats['invalid']} inválidas ({rate:,.0f} filas/s)")
+
+        with stream:
+            stats = imports.import_tasks(
+                stream, fmt,
+                batch_size=options['batch_size'],
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                progress=progress if options['verbosity'] > 0 else None,
+                using=options['database'],
+            )
+
+        for number, errors in stats['errors']:
+            messages = '; '.join(f'{field}: {" ".join(texts)}' for field, texts in errors.items())
+            self.stderr.write(f'Registro {number} rechazado: {messages}')
+        rate = stats['imported'] / stats['seconds'] if stats['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['imported']} tareas importadas, {stats['invalid']} inválidas, "
+            f"en {stats['seconds']:.1f} s ({rate:,.0f} filas/s)."
+        ))
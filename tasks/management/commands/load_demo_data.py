@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from tasks.models import Task
+from tasks import counters, rollups
 
 class Command(BaseCommand):
     help = 'Crea datos demo de tasks'
@@ -21,4 +22,6 @@ class Command(BaseCommand):
         ]
         for task in demo_tasks:
             Task.objects.create(**task)
+        counters.rebuild()
+        rollups.rebuild()
         self.stdout.write(self.style.SUCCESS('Demo tasks de gestión operacional creadas con éxito!'))
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from tasks import changes
+
+class Command(BaseCommand):
+    help = 'Borra las lápidas de tareas eliminadas más viejas que la retención del feed de cambios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TASK_TOMBSTONE_RETENTION_DAYS,
+                            help='Días de retención (por defecto TASK_TOMBSTONE_RETENTION_DAYS).')
+
+    def handle(self, *args, **options):
+        deleted = changes.prune(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} lápidas eliminadas.'))
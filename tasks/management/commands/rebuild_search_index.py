@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from tasks import search
+from tasks.models import Task
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda (FTS5) de tasks desde la tabla'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--optimize', action='store_true',
+                            help='Además fusiona los segmentos del índice (tras muchas escrituras).')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not search.is_supported(connection):
+            raise CommandError(f'La búsqueda indexada requiere SQLite (motor actual: {connection.vendor}).')
+
+        with transaction.atomic(using=options['database']):
+            # install es idempotente: recrea triggers perdidos y recarga el índice
+            search.install(connection, optimize=options['optimize'])
+
+        total = Task.objects.using(options['database']).count()
+        self.stdout.write(self.style.SUCCESS(f'Índice de búsqueda reconstruido ({total} tareas).'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tasks import counters
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores desnormalizados de tasks desde la tabla'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            before = counters.get_counts()
+            counters.rebuild()
+            after = counters.get_counts()
+
+        for key, value in after.items():
+            drift = value - before[key]
+            self.stdout.write(f'{key}: {value} (diferencia {drift:+d})')
+        self.stdout.write(self.style.SUCCESS('Contadores reconciliados con éxito!'))
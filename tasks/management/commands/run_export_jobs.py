@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from tasks import exports
+
+class Command(BaseCommand):
+    help = 'Worker local que procesa las exportaciones CSV encoladas (sin broker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Procesa los trabajos pendientes y termina')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE,
+                            help='Filas por bloque (cada bloque es un checkpoint)')
+        parser.add_argument('--poll', type=float, default=2.0,
+                            help='Segundos de espera cuando no hay trabajos')
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Segundos sin avance para retomar un trabajo en proceso')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Worker de exportaciones iniciado')
+        while True:
+            requeued = exports.requeue_stale(options['stale_after'])
+            if requeued:
+                self.stdout.write(f'{requeued} trabajo(s) retomados desde su checkpoint')
+            pruned = exports.prune()
+            if pruned:
+                self.stdout.write(f'{pruned} exportación(es) reemplazada(s) o fallida(s) borrada(s)')
+
+            job = exports.claim_next()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+                continue
+
+            self.stdout.write(f'Exportando {job.pk} (filtro {job.filter_type})...')
+            try:
+                exports.run_job(job, chunk_size=options['chunk_size'])
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f'Exportación {job.pk} fallida: {exc}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'Exportación {job.pk} terminada: {job.rows_written} filas'
+            ))
@@ -0,0 +1,325 @@
+# metrics.py: instrumentación por request (consultas SQL, render de templates y
+# tiempo total) para encontrar qué parte de una página lenta pesa.
+#
+# MetricsMiddleware abre una medición por request (RequestTimings en un contextvar,
+# que también ven las vistas async y sync_to_async). Los tiempos llegan por dos
+# ganchos fijos: un execute_wrapper que se instala en cada conexión al abrirse
+# (connection_created) y el backend de templates de tasks/template_backends.py.
+# Fuera de un request los ganchos no hacen nada.
+#
+# Cada request sale con un header Server-Timing (db, tpl, app, total) y se suma a
+# histogramas en memoria que GET /metrics expone en formato de texto de Prometheus.
+# Con varios workers cada proceso vuelca sus deltas cada TASK_METRICS_FLUSH_SECONDS
+# a un archivo SQLite compartido (TASK_METRICS_PATH), así /metrics muestra el total
+# de la máquina sin importar qué worker atienda el scrape.
+#
+# Costo por request: un par de perf_counter por consulta y por template, y unos
+# incrementos bajo un lock; el volcado es una transacción cada pocos segundos.
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# nombre: (ayuda, buckets)
+HISTOGRAMS = {
+    'tasks_http_request_duration_seconds': ('Tiempo total del request.', DURATION_BUCKETS),
+    'tasks_http_db_duration_seconds': ('Tiempo en consultas SQL por request.', DURATION_BUCKETS),
+    'tasks_http_db_queries': ('Consultas SQL por request.', QUERY_BUCKETS),
+    'tasks_http_template_duration_seconds': ('Tiempo de render de templates por request.', DURATION_BUCKETS),
+}
+RESPONSES = 'tasks_http_responses_total'
+
+current = ContextVar('task_request_timings', default=None)
+
+
+class RequestTimings:
+    """Acumuladores de un request."""
+    __slots__ = ('started', 'queries', 'db_time', 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def server_timing(self, total):
+        app = max(total - self.db_time - self.template_time, 0.0)
+        return (
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+            f'tpl;dur={self.template_time * 1000:.1f}, '
+            f'app;dur={app * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+
+
+# GANCHOS
+
+def record_query(execute, sql, params, many, context):
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_time += time.perf_counter() - started
+        timings.queries += 1
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed_render():
+    """Mide un render de template; los renders anidados (un template que renderiza
+       otro con render_to_string) se cuentan una sola vez, en el más externo."""
+    timings = current.get()
+    if timings is None:
+        yield
+        return
+    timings.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.template_depth -= 1
+        if not timings.template_depth:
+            timings.template_time += time.perf_counter() - started
+
+
+# REGISTRO
+
+class Registry:
+    """Histogramas y contadores del proceso. Los valores son deltas desde el último
+       volcado al archivo compartido (o totales, si no hay archivo)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (nombre, labels) -> [conteo por bucket..., +Inf, suma]
+        self.histograms = {}
+        # (nombre, labels) -> valor
+        self.counters = {}
+        self.last_flush = time.monotonic()
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        with self.lock:
+            series = self.histograms.get((name, labels))
+            if series is None:
+                series = self.histograms[(name, labels)] = [0] * (len(buckets) + 2)
+            series[bisect_left(buckets, value)] += 1
+            series[-1] += value
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+
+    def take(self):
+        with self.lock:
+            histograms, counters = self.histograms, self.counters
+            self.histograms, self.counters = {}, {}
+        return histograms, counters
+
+    def restore(self, histograms, counters):
+        """Devuelve al registro deltas que no se pudieron volcar."""
+        with self.lock:
+            for key, series in histograms.items():
+                mine = self.histograms.setdefault(key, [0] * len(series))
+                for index, value in enumerate(series):
+                    mine[index] += value
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+
+registry = Registry()
+
+
+# ARCHIVO COMPARTIDO
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS metric (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (name, labels, slot)
+) WITHOUT ROWID"""
+_local = threading.local()
+
+
+def _store():
+    path = settings.TASK_METRICS_PATH
+    if not path:
+        return None
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.key != (str(path), os.getpid()):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=1, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(SCHEMA)
+        _local.conn, _local.key = conn, (str(path), os.getpid())
+    return conn
+
+
+def _encode(labels):
+    return json.dumps(labels)
+
+
+def _decode(text):
+    return tuple(tuple(pair) for pair in json.loads(text))
+
+
+def _label_text(labels):
+    escape = lambda value: value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels)
+
+
+def flush(force=False):
+    """Vuelca los deltas del proceso al archivo compartido (como mucho una vez por
+       TASK_METRICS_FLUSH_SECONDS, salvo force). Si el archivo está ocupado, los
+       deltas quedan para el próximo volcado."""
+    now = time.monotonic()
+    if not force and now - registry.last_flush < settings.TASK_METRICS_FLUSH_SECONDS:
+        return
+    registry.last_flush = now
+    conn = _store()
+    if conn is None:
+        return
+    histograms, counters = registry.take()
+    rows = [
+        (name, _encode(labels), slot, value)
+        for (name, labels), series in histograms.items()
+        for slot, value in enumerate(series)
+        if value
+    ] + [(name, _encode(labels), 0, value) for (name, labels), value in counters.items()]
+    if not rows:
+        return
+    try:
+        conn.executemany(
+            """INSERT INTO metric (name, labels, slot, value) VALUES (?, ?, ?, ?)
+               ON CONFLICT (name, labels, slot) DO UPDATE SET value = value + excluded.value""",
+            rows,
+        )
+    except sqlite3.Error:
+        registry.restore(histograms, counters)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush(force=True)
+    except Exception:
+        pass
+
+
+def collect():
+    """Totales (archivo compartido + deltas del proceso) como
+       ({(nombre, labels): serie}, {(nombre, labels): valor})."""
+    with registry.lock:
+        histograms = {key: list(series) for key, series in registry.histograms.items()}
+        counters = dict(registry.counters)
+    conn = _store()
+    if conn is not None:
+        for name, labels, slot, value in conn.execute("SELECT name, labels, slot, value FROM metric"):
+            key = (name, _decode(labels))
+            if name in HISTOGRAMS:
+                series = histograms.setdefault(key, [0] * (len(HISTOGRAMS[name][1]) + 2))
+                series[slot] += value
+            else:
+                counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render():
+    """Texto de exposición de Prometheus (versión 0.0.4)."""
+    histograms, counters = collect()
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (series_name, labels), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            label_text = _label_text(labels)
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), series[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _number(bound)
+                lines.append(f'{name}_bucket{{{label_text},le="{le}"}} {_number(cumulative)}')
+            lines.append(f'{name}_sum{{{label_text}}} {_number(series[-1])}')
+            lines.append(f'{name}_count{{{label_text}}} {_number(cumulative)}')
+    lines += [f'# HELP {RESPONSES} Respuestas por vista y código de estado.', f'# TYPE {RESPONSES} counter']
+    for (name, labels), value in sorted(counters.items()):
+        if name == RESPONSES:
+            lines.append(f'{name}{{{_label_text(labels)}}} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+# MIDDLEWARE
+
+def _finish(request, response, timings):
+    total = time.perf_counter() - timings.started
+    match = getattr(request, 'resolver_match', None)
+    labels = (('view', match.view_name if match else 'unmatched'), ('method', request.method))
+    registry.observe('tasks_http_request_duration_seconds', labels, total)
+    registry.observe('tasks_http_db_duration_seconds', labels, timings.db_time)
+    registry.observe('tasks_http_db_queries', labels, timings.queries)
+    registry.observe('tasks_http_template_duration_seconds', labels, timings.template_time)
+    registry.inc(RESPONSES, (*labels, ('status', str(response.status_code))))
+    if settings.TASK_SERVER_TIMING:
+        # en respuestas en streaming cubre hasta que sale la cabecera, no el cuerpo
+        response['Server-Timing'] = timings.server_timing(total)
+    flush()
+    return response
+
+
+class MetricsMiddleware:
+    """Mide cada request (sync o async) y agrega Server-Timing a la respuesta."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return _finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return _finish(request, response, timings)
@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    """Inicializa la fila de contadores con el estado actual de la tabla."""
+    Task = apps.get_model('tasks', 'Task')
+    TaskCounter = apps.get_model('tasks', 'TaskCounter')
+    TaskCounter.objects.update_or_create(
+        pk=1,
+        defaults={
+            'total': Task.objects.count(),
+            'completed': Task.objects.filter(completed=True).count(),
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0, verbose_name='Total')),
+                ('completed', models.IntegerField(default=0, verbose_name='Completadas')),
+            ],
+            options={
+                'verbose_name': 'Contador de tareas',
+                'verbose_name_plural': 'Contadores de tareas',
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
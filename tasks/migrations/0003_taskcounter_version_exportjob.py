@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_taskcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskcounter',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Versión'),
+        ),
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filter_type', models.CharField(default='all', max_length=20, verbose_name='Filtro')),
+                ('fingerprint', models.CharField(db_index=True, max_length=64, verbose_name='Huella')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En proceso'), ('done', 'Terminada'), ('failed', 'Fallida')], default='pending', max_length=10, verbose_name='Estado')),
+                ('cursor', models.CharField(blank=True, max_length=100, verbose_name='Cursor')),
+                ('rows_written', models.PositiveIntegerField(default=0, verbose_name='Filas escritas')),
+                ('bytes_written', models.PositiveBigIntegerField(default=0, verbose_name='Bytes escritos')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última actualización')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de término')),
+            ],
+            options={
+                'verbose_name': 'Exportación',
+                'verbose_name_plural': 'Exportaciones',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
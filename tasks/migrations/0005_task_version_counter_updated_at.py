@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_category_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Versión'),
+        ),
+        migrations.AddField(
+            model_name='taskcounter',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Última actualización'),
+        ),
+    ]
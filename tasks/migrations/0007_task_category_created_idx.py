@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='task_category_created_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-18 16:08
+
+from django.db import migrations, models
+import django.utils.timezone
+from django.db.models import F
+from tasks import search
+
+
+def backfill_updated_at(apps, schema_editor):
+    # las tareas existentes no tienen historial: su última escritura es la creación
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.update(updated_at=F('created_at'))
+
+
+def reinstall_search(apps, schema_editor):
+    # en SQLite agregar la columna reconstruye tasks_task y se pierden los triggers FTS
+    search.install(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_category_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.PositiveBigIntegerField(verbose_name='Tarea')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de eliminación')),
+            ],
+            options={
+                'verbose_name': 'Tarea eliminada',
+                'verbose_name_plural': 'Tareas eliminadas',
+            },
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Última actualización'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.RunPython(reinstall_search, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['updated_at', 'id'], name='task_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ),
+    ]
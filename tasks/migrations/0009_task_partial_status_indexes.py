@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 18:40
+
+from django.db import migrations
+from tasks import pgcopy
+
+
+def install_indexes(apps, schema_editor):
+    # índices parciales por estado (solo PostgreSQL)
+    pgcopy.install(schema_editor.connection)
+
+
+def uninstall_indexes(apps, schema_editor):
+    pgcopy.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_task_updated_at_tombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_indexes, uninstall_indexes),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 16:34
+
+from django.db import migrations, models
+from tasks import rollups
+
+
+def backfill(apps, schema_editor):
+    # resúmenes de las tareas existentes (las escrituras siguientes los mantienen)
+    rollups.rebuild(using=schema_editor.connection.alias, apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_partial_status_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('category_id', models.PositiveBigIntegerField(default=0, verbose_name='Categoría')),
+                ('created', models.IntegerField(default=0, verbose_name='Creadas')),
+                ('completed', models.IntegerField(default=0, verbose_name='Completadas')),
+            ],
+            options={
+                'verbose_name': 'Resumen diario',
+                'verbose_name_plural': 'Resúmenes diarios',
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Hora')),
+                ('category_id', models.PositiveBigIntegerField(default=0, verbose_name='Categoría')),
+                ('created', models.IntegerField(default=0, verbose_name='Creadas')),
+                ('completed', models.IntegerField(default=0, verbose_name='Completadas')),
+            ],
+            options={
+                'verbose_name': 'Resumen por hora',
+                'verbose_name_plural': 'Resúmenes por hora',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskhourlyrollup',
+            constraint=models.UniqueConstraint(fields=('hour', 'category_id'), name='task_hourly_rollup_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'category_id'), name='task_daily_rollup_uniq'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-18 16:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Id')),
+                ('title', models.CharField(max_length=255, verbose_name='Título')),
+                ('description', models.TextField(blank=True, verbose_name='Descripción')),
+                ('completed', models.BooleanField(default=True, verbose_name='Completada')),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de Creación')),
+                ('updated_at', models.DateTimeField(verbose_name='Última actualización')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Versión')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de archivo')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_tasks', to='tasks.category', verbose_name='Categoría')),
+            ],
+            options={
+                'verbose_name': 'Tarea archivada',
+                'verbose_name_plural': 'Tareas archivadas',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='taskarchive',
+            index=models.Index(fields=['-created_at', '-id'], name='archive_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='archived',
+            field=models.CharField(default='hot', max_length=10, verbose_name='Archivadas'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 17:20
+
+from django.db import migrations
+import tasks.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_exportjob_archived'),
+    ]
+
+    # solo cambia la definición (Index con include -> CoveringIndex): el índice que
+    # crea cada base es el mismo, no hace falta reconstruirlo
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='task',
+                    name='task_created_cover_idx',
+                ),
+                migrations.AddIndex(
+                    model_name='task',
+                    index=tasks.models.CoveringIndex(covering=('completed', 'title', 'description'), fields=['-created_at', '-id'], name='task_created_cover_idx'),
+                ),
+            ],
+        ),
+    ]
@@ -1,25 +1,361 @@
-from django.db import models
+import uuid
+
+from django.conf import settings
+from django.db import connections, models
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from . import search as fts
 # models.py, define el modelo principal de la app (Task).
 
 
+# valores de ?filter= de la lista, el export y las exportaciones en segundo plano
+STATUS_FILTERS = ('all', 'pending', 'completed')
+# campos de Task cuyo valor leído se recuerda para los receptores de post_save
+LOADED_FIELDS = ('completed', 'category_id', 'created_at')
+
+
+class TaskQuerySet(models.QuerySet):
+    # la tabla tiene índice FTS (TaskArchive no: busca de forma lineal)
+    fts_indexed = True
+
+    def by_status(self, filter_type):
+        """Filtra por estado según el parámetro filter de la UI (all, pending, completed)."""
+        # completed__in en vez de completed=...: Django genera "WHERE completed" / "WHERE NOT completed"
+        # y SQLite no usa el índice con esas formas; "completed IN (...)" sí.
+        if filter_type == 'pending':
+            return self.filter(completed__in=[False])
+        if filter_type == 'completed':
+            return self.filter(completed__in=[True])
+        return self
+
+    def touch(self, **values):
+        """UPDATE por conjunto que además sube la versión y fija updated_at
+           (update() no pasa por save)."""
+        return self.update(version=F('version') + 1, updated_at=timezone.now(), **values)
+
+    def toggle(self):
+        """Invierte completed de todo el conjunto en un solo UPDATE, sin leer las filas
+           antes: dos toggles concurrentes sobre la misma tarea se aplican uno tras otro."""
+        return self.touch(completed=Case(When(completed=True, then=Value(False)), default=Value(True)))
+
+    def search(self, text):
+        """Filtra por texto (todas las palabras, como prefijo), anota search_rank
+           (menor = más relevante) y ordena por relevancia. Sin palabras devuelve el queryset tal cual."""
+        words = fts.terms(text)
+        if not words:
+            return self
+        if self.fts_indexed and fts.is_supported(connections[self.db]):
+            return self.filter(search_index__document__match=fts.build_query(text)).annotate(
+                search_rank=F('search_index__rank')
+            ).order_by('search_rank', 'id')
+        # sin FTS: búsqueda lineal, mismo contrato (todas las palabras, rank constante)
+        queryset = self
+        for word in words:
+            queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=models.FloatField())
+        ).order_by('search_rank', 'id')
+
+
+class FTSDocumentField(models.TextField):
+    """Columna oculta de una tabla FTS5 que lleva el nombre de la tabla; solo sirve para __match."""
+
+
+class CoveringIndex(models.Index):
+    """Índice con columnas INCLUDE (covering) solo en las bases que lo soportan
+       (PostgreSQL); en SQLite se crea con las claves nada más. A diferencia de
+       Index(include=...), no dispara el aviso models.W040, que es por modelo:
+       silenciarlo en settings taparía cualquier otro INCLUDE que SQLite ignore."""
+
+    def __init__(self, *args, covering=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.covering = tuple(covering)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        kwargs['covering'] = self.covering
+        return path, args, kwargs
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if self.covering and schema_editor.connection.features.supports_covering_indexes:
+            _, args, options = super().deconstruct()
+            index = models.Index(*args, **options, include=self.covering)
+            return index.create_sql(model, schema_editor, using, **kwargs)
+        return super().create_sql(model, schema_editor, using, **kwargs)
+
+
+@FTSDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
 class Task(models.Model):
     title = models.CharField(max_length=255, verbose_name='Título')
-    category = models.models.ForeignKey("Category", verbose_name=_("categoría"), on_delete=models.CASCADE)
+    # nullable: las tareas existentes no tienen categoría; la FK lleva su propio índice
+    category = models.ForeignKey(
+        "Category",
+        verbose_name='Categoría',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='tasks',
+    )
     description = models.TextField(blank=True, verbose_name='Descripción')
     completed = models.BooleanField(default=False, verbose_name='Completada')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
+    # última escritura: la usa el feed de cambios (tasks/changes.py); los UPDATE por conjunto la fijan a mano
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Última actualización')
+    # versión de la fila: sube con cada escritura (ETag del detalle)
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name='Versión')
+
+    objects = TaskQuerySet.as_manager()
+
+    # las filas del archivo (TaskArchive) dicen True; lo usan la fila de la lista y su caché
+    is_archived = False
 
     class Meta:
         # nombres legibles en admin y orden por defecto
         verbose_name = 'Tarea'
         verbose_name_plural = 'Lista de Tareas'
         ordering = ['-created_at']
+        indexes = [
+            # lista "todas", API y export: ORDER BY -created_at, -id (y cursor) sin ordenar en memoria;
+            # en PostgreSQL además cubre las columnas de lista/export (index-only scan)
+            CoveringIndex(
+                fields=['-created_at', '-id'],
+                covering=['completed', 'title', 'description'],
+                name='task_created_cover_idx',
+            ),
+            # filtros pending/completed ordenados y COUNT por estado
+            models.Index(fields=['completed', '-created_at', '-id'], name='task_completed_created_idx'),
+            # filtro por categoría de la API en orden de creación (el índice de la FK no sirve para ordenar)
+            models.Index(fields=['category', '-created_at', '-id'], name='task_category_created_idx'),
+            # feed de cambios: updated_at > token en orden
+            models.Index(fields=['updated_at', 'id'], name='task_updated_idx'),
+        ]
         
     def __str__(self):
         # representación corta y útil en admin y logs
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded()
+        return instance
+
+    def _remember_loaded(self):
+        # estado leído de la base (o recién guardado): al guardar, los receptores de
+        # post_save (tasks/counters.py, tasks/rollups.py) ven qué cambió. Un campo
+        # diferido no aparece: el receptor no puede comparar y recalcula.
+        self._loaded = {name: self.__dict__[name] for name in LOADED_FIELDS if name in self.__dict__}
+
+    def save(self, *args, **kwargs):
+        """Al actualizar, sube la versión con un UPDATE atómico (F) y la relee
+           (updated_at se guarda siempre, aunque se pasen update_fields)."""
+        if self._state.adding:
+            super().save(*args, **kwargs)
+        else:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version', 'updated_at'}
+            self.version = models.F('version') + 1
+            super().save(*args, **kwargs)
+            self.refresh_from_db(fields=['version'])
+        # post_save ya corrió: lo guardado pasa a ser el estado leído
+        self._remember_loaded()
     
     
 class Category(models.Model):
     name = models.CharField(max_length=50, verbose_name="Nombre categoría")
+
+    class Meta:
+        verbose_name = 'Categoría'
+        verbose_name_plural = 'Categorías'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class TaskSearchIndex(models.Model):
+    # tabla virtual FTS5 (ver tasks/search.py); la crean la migración y los triggers, no Django
+    task = models.OneToOneField(
+        Task,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search_index',
+    )
+    title = models.TextField()
+    description = models.TextField()
+    document = FTSDocumentField(db_column=fts.FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = fts.FTS_TABLE
+
+
+class ArchiveQuerySet(TaskQuerySet):
+    fts_indexed = False
+
+
+class TaskArchive(models.Model):
+    # tareas completadas que salieron de la tabla caliente (tasks/archive.py); mismas
+    # columnas e id que tenían en Task, más la fecha en que se archivaron
+    id = models.BigIntegerField(primary_key=True, verbose_name='Id')
+    title = models.CharField(max_length=255, verbose_name='Título')
+    category = models.ForeignKey(
+        "Category",
+        verbose_name='Categoría',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_tasks',
+    )
+    description = models.TextField(blank=True, verbose_name='Descripción')
+    completed = models.BooleanField(default=True, verbose_name='Completada')
+    created_at = models.DateTimeField(verbose_name='Fecha de Creación')
+    updated_at = models.DateTimeField(verbose_name='Última actualización')
+    version = models.PositiveIntegerField(default=1, verbose_name='Versión')
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name='Fecha de archivo')
+
+    objects = ArchiveQuerySet.as_manager()
+
+    is_archived = True
+
+    class Meta:
+        verbose_name = 'Tarea archivada'
+        verbose_name_plural = 'Tareas archivadas'
+        ordering = ['-created_at']
+        indexes = [
+            # lista, API y export con ?archived=: mismo orden y cursor que en Task
+            models.Index(fields=['-created_at', '-id'], name='archive_created_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class TaskTombstone(models.Model):
+    # registro de tareas eliminadas para el feed de cambios; se purga con prune_tombstones
+    task_id = models.PositiveBigIntegerField(verbose_name='Tarea')
+    deleted_at = models.DateTimeField(default=timezone.now, verbose_name='Fecha de eliminación')
+
+    class Meta:
+        verbose_name = 'Tarea eliminada'
+        verbose_name_plural = 'Tareas eliminadas'
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} ({self.deleted_at:%Y-%m-%d %H:%M})"
+
+
+class TaskCounter(models.Model):
+    # contadores desnormalizados (una sola fila) para que stats no haga COUNT(*)
+    total = models.IntegerField(default=0, verbose_name='Total')
+    completed = models.IntegerField(default=0, verbose_name='Completadas')
+    # versión de la tabla: sube con cada escritura, sirve para invalidar cachés
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Versión')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Última actualización')
+
+    class Meta:
+        verbose_name = 'Contador de tareas'
+        verbose_name_plural = 'Contadores de tareas'
+
+    def __str__(self):
+        return f"{self.completed}/{self.total}"
     
+
+
+class TaskDailyRollup(models.Model):
+    # tareas creadas por día (hora local) y categoría, y cuántas de ellas están
+    # completadas; las mantiene tasks/rollups.py. category_id 0 = sin categoría
+    day = models.DateField(verbose_name='Día')
+    category_id = models.PositiveBigIntegerField(default=0, verbose_name='Categoría')
+    created = models.IntegerField(default=0, verbose_name='Creadas')
+    completed = models.IntegerField(default=0, verbose_name='Completadas')
+
+    class Meta:
+        verbose_name = 'Resumen diario'
+        verbose_name_plural = 'Resúmenes diarios'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category_id'], name='task_daily_rollup_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.category_id}: {self.completed}/{self.created}"
+
+
+class TaskHourlyRollup(models.Model):
+    # lo mismo por hora (UTC, truncada), para rangos cortos del dashboard
+    hour = models.DateTimeField(verbose_name='Hora')
+    category_id = models.PositiveBigIntegerField(default=0, verbose_name='Categoría')
+    created = models.IntegerField(default=0, verbose_name='Creadas')
+    completed = models.IntegerField(default=0, verbose_name='Completadas')
+
+    class Meta:
+        verbose_name = 'Resumen por hora'
+        verbose_name_plural = 'Resúmenes por hora'
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'category_id'], name='task_hourly_rollup_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} {self.category_id}: {self.completed}/{self.created}"
+
+
+class ExportJob(models.Model):
+    # exportación CSV en segundo plano; el worker escribe el archivo por bloques
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En proceso'),
+        (STATUS_DONE, 'Terminada'),
+        (STATUS_FAILED, 'Fallida'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filter_type = models.CharField(max_length=20, default='all', verbose_name='Filtro')
+    # modo de ?archived= (tasks/archive.py): hot, include u only
+    archived = models.CharField(max_length=10, default='hot', verbose_name='Archivadas')
+    # filtro + archivo + versión de la tabla al encolar; misma huella = mismo archivo
+    # (termina en ":stale" si la tabla cambió mientras se escribía)
+    fingerprint = models.CharField(max_length=64, db_index=True, verbose_name='Huella')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='Estado')
+    # checkpoint: cursor de la última fila escrita y bytes confirmados en disco
+    cursor = models.CharField(max_length=100, blank=True, verbose_name='Cursor')
+    rows_written = models.PositiveIntegerField(default=0, verbose_name='Filas escritas')
+    bytes_written = models.PositiveBigIntegerField(default=0, verbose_name='Bytes escritos')
+    error = models.TextField(blank=True, verbose_name='Error')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Última actualización')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de término')
+
+    class Meta:
+        verbose_name = 'Exportación'
+        verbose_name_plural = 'Exportaciones'
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.filter_type} ({self.get_status_display()})"
+
+    @property
+    def file_path(self):
+        return settings.EXPORT_ROOT / f"{self.pk}.csv"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
@@ -0,0 +1,71 @@
+# pagecache.py: respuestas renderizadas de stats y de la lista (parciales HTMX)
+# en la caché compartida entre workers (settings.TASK_SHARED_CACHE).
+# La clave lleva el ETag (versión de la tabla, URL, HX) y la hora del último
+# cambio: una escritura cambia la clave en todos los procesos a la vez, sin
+# invalidar nada; las entradas viejas salen por LRU o por TIMEOUT.
+#
+# La página completa (index.html) no se guarda: trae el token CSRF del usuario.
+
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from . import conditional
+
+
+def get_cache():
+    return caches[settings.TASK_SHARED_CACHE]
+
+
+def cache_key(prefix, etag, state):
+    return f"page:{prefix}:{etag}:{state.updated_at.timestamp()}"
+
+
+def get(key):
+    entry = get_cache().get(key)
+    if entry is None:
+        return None
+    content, content_type = entry
+    return HttpResponse(content, content_type=content_type)
+
+
+def store(key, response):
+    if response.status_code == 200 and not response.streaming:
+        get_cache().set(key, (response.content, response['Content-Type']))
+    return response
+
+
+async def aget(key):
+    entry = await get_cache().aget(key)
+    if entry is None:
+        return None
+    content, content_type = entry
+    return HttpResponse(content, content_type=content_type)
+
+
+async def astore(key, response):
+    if response.status_code == 200 and not response.streaming:
+        await get_cache().aset(key, (response.content, response['Content-Type']))
+    return response
+
+
+def shared_cache(prefix, etag_func, only_htmx=False):
+    """Decorador de vistas GET: sirve la respuesta desde la caché compartida o la
+       renderiza y la guarda. Va debajo de condition (el 304 se resuelve antes)."""
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if only_htmx and not request.headers.get('HX-Request'):
+                return view(request, *args, **kwargs)
+            key = cache_key(prefix, etag_func(request, *args, **kwargs), conditional.table_state(request))
+            response = get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response = response.render()
+                store(key, response)
+            return response
+        return inner
+    return decorator
@@ -0,0 +1,234 @@
+# pagination.py: paginación por cursor (keyset) sobre (created_at, id).
+# En vez de OFFSET, cada página continúa desde la última fila vista, por lo que
+# pedir la página N cuesta lo mismo que pedir la primera.
+# Varias fuentes en el mismo orden (tareas y archivo, ver tasks/archive.py) se
+# paginan con el mismo cursor: cada una aporta su ventana y se mezclan.
+
+import base64
+import binascii
+import heapq
+from datetime import datetime
+from operator import attrgetter
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no se puede decodificar."""
+
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+# campos por los que se puede paginar y cómo se leen desde el cursor;
+# cada orden termina en id para que la posición sea única
+CURSOR_FIELDS = {
+    'created_at': datetime.fromisoformat,
+    'updated_at': datetime.fromisoformat,
+    'deleted_at': datetime.fromisoformat,
+    'id': int,
+    'search_rank': float,
+}
+
+
+def _format(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def encode_cursor(*values):
+    """Codifica la posición (por defecto created_at, id) como string opaco para la URL."""
+    raw = '|'.join(_format(value) for value in values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ordering=DEFAULT_ORDERING):
+    """Devuelve los valores de la posición (por defecto (created_at, id)) a partir de
+       un cursor generado por encode_cursor."""
+    names = [field.lstrip('-') for field in ordering]
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        if len(parts) != len(names):
+            raise ValueError(cursor)
+        return tuple(CURSOR_FIELDS[name](part) for name, part in zip(names, parts))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def is_keyset_ordering(ordering):
+    """True si se puede paginar por cursor en ese orden."""
+    return (
+        bool(ordering)
+        and ordering[-1].lstrip('-') == 'id'
+        and all(field.lstrip('-') in CURSOR_FIELDS for field in ordering)
+    )
+
+
+def after_cursor(queryset, cursor, ordering=DEFAULT_ORDERING):
+    """Filtra las filas que van después del cursor en el orden dado.
+       El rango redundante sobre el primer campo (p. ej. created_at <= cursor)
+       permite buscar por rango en el índice."""
+    values = decode_cursor(cursor, ordering)
+    lookups = [
+        (field.lstrip('-'), 'lt' if field.startswith('-') else 'gt')
+        for field in ordering
+    ]
+    condition = Q()
+    for position, (name, op) in enumerate(lookups):
+        equal = {prefix: values[i] for i, (prefix, _) in enumerate(lookups[:position])}
+        condition |= Q(**equal, **{f'{name}__{op}': values[position]})
+    if len(lookups) > 1:
+        name, op = lookups[0]
+        queryset = queryset.filter(**{f'{name}__{op}e': values[0]})
+    return queryset.filter(condition)
+
+
+def _merge_key(ordering):
+    """(clave, reverse) para mezclar filas en ese orden; los órdenes keyset de la
+       app van todos en la misma dirección."""
+    return attrgetter(*(field.lstrip('-') for field in ordering)), ordering[0].startswith('-')
+
+
+def merge(sources, ordering=DEFAULT_ORDERING):
+    """Mezcla iterables ya ordenados en ese orden en uno solo, sin juntarlos en memoria."""
+    key, reverse = _merge_key(ordering)
+    return heapq.merge(*sources, key=key, reverse=reverse)
+
+
+async def amerge(sources, ordering=DEFAULT_ORDERING):
+    """Versión async de merge (pocas fuentes: elige la cabeza con una pasada)."""
+    key, reverse = _merge_key(ordering)
+    pick = max if reverse else min
+    iterators = [aiter(source) for source in sources]
+    end = object()
+    heads = [await anext(iterator, end) for iterator in iterators]
+    live = [index for index, head in enumerate(heads) if head is not end]
+    while live:
+        index = pick(live, key=lambda i: key(heads[i]))
+        yield heads[index]
+        heads[index] = await anext(iterators[index], end)
+        if heads[index] is end:
+            live.remove(index)
+
+
+class KeysetPaginator:
+    """Pagina un queryset de tareas en un orden keyset (por defecto -created_at, -id).
+
+    Lee page_size + 1 filas para saber si existe una página siguiente sin
+    ejecutar un COUNT sobre toda la tabla."""
+
+    def __init__(self, page_size, ordering=DEFAULT_ORDERING):
+        self.page_size = page_size
+        self.ordering = tuple(ordering)
+
+    def paginate(self, queryset, cursor=None):
+        """Devuelve (filas de la página, cursor siguiente o None)."""
+        queryset = self._window(queryset, cursor)
+        return self._page(list(queryset[:self.page_size + 1]))
+
+    async def apaginate(self, queryset, cursor=None):
+        """Igual que paginate, con iteración async del queryset."""
+        queryset = self._window(queryset, cursor)
+        return self._page([row async for row in queryset[:self.page_size + 1]])
+
+    def paginate_many(self, querysets, cursor=None):
+        """Como paginate sobre varios querysets a la vez (ids distintos entre sí): lee
+           page_size + 1 filas de cada uno desde el cursor y se queda con las primeras."""
+        if len(querysets) == 1:
+            return self.paginate(querysets[0], cursor)
+        windows = [list(self._window(queryset, cursor)[:self.page_size + 1]) for queryset in querysets]
+        return self._page(list(merge(windows, self.ordering))[:self.page_size + 1])
+
+    async def apaginate_many(self, querysets, cursor=None):
+        """Versión async de paginate_many."""
+        windows = [
+            [row async for row in self._window(queryset, cursor)[:self.page_size + 1]]
+            for queryset in querysets
+        ]
+        return self._page(list(merge(windows, self.ordering))[:self.page_size + 1])
+
+    def _window(self, queryset, cursor):
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = after_cursor(queryset, cursor, self.ordering)
+        return queryset
+
+    def cursor_for(self, row):
+        return encode_cursor(*(getattr(row, field.lstrip('-')) for field in self.ordering))
+
+    def _page(self, rows):
+        if len(rows) <= self.page_size:
+            return rows, None
+        rows = rows[:self.page_size]
+        return rows, self.cursor_for(rows[-1])
+
+
+def paginator_for(queryset, page_size):
+    """Paginador en el orden del queryset si admite cursor (p. ej. relevancia de
+       search() u ordering de la API); si no, por fecha de creación."""
+    ordering = tuple(queryset.query.order_by)
+    if not is_keyset_ordering(ordering):
+        ordering = DEFAULT_ORDERING
+    return KeysetPaginator(page_size, ordering)
+
+
+class TaskCursorPagination(BasePagination):
+    """Paginación DRF por cursor para la API de tareas.
+       GET /tasks/?cursor=<cursor>&page_size=<n>; el cursor sigue el orden del queryset
+       (fecha, ordering pedido o relevancia de la búsqueda)"""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        return self.page_size_from(request.query_params)
+
+    def page_size_from(self, params):
+        """Tamaño pedido en los parámetros, acotado a [1, max_page_size]."""
+        try:
+            size = int(params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """queryset puede ser una lista de querysets en el mismo orden (tareas y archivo)."""
+        self.request = request
+        querysets = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+        paginator = paginator_for(querysets[0], self.get_page_size(request))
+        try:
+            rows, self.next_cursor = paginator.paginate_many(
+                querysets, request.query_params.get(self.cursor_query_param)
+            )
+        except InvalidCursor:
+            raise NotFound('Cursor inválido.')
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,138 @@
+# pgcopy.py: caminos rápidos propios de PostgreSQL (psycopg 3).
+# COPY ... TO STDOUT genera el CSV de la exportación en el servidor: Python solo
+# reenvía bytes, sin tuplas ni csv.writer por fila. COPY ... FROM STDIN carga
+# muchas tareas en un solo flujo (creates de la API masiva, importaciones) con
+# ids reservados antes a la secuencia, así se conocen sin RETURNING.
+# Además, índices parciales por estado (WHERE completed / WHERE NOT completed)
+# para los filtros ordenados y los COUNT por estado.
+#
+# En otros motores (o con psycopg2) is_supported es False y se usan los caminos
+# genéricos de exports.py y bulk.py.
+
+from django.db import connections
+from django.db.models import Case, F, Func, TextField, Value, When
+from django.db.models.functions import NullIf
+
+from .models import Task
+
+PARTIAL_INDEXES = {
+    'task_pending_created_idx': 'NOT completed',
+    'task_done_created_idx': 'completed',
+}
+
+CREATE_SQL = [
+    f"CREATE INDEX IF NOT EXISTS {name} ON tasks_task (created_at DESC, id DESC) WHERE {condition}"
+    for name, condition in PARTIAL_INDEXES.items()
+]
+
+DROP_SQL = [f"DROP INDEX IF EXISTS {name}" for name in PARTIAL_INDEXES]
+
+
+def is_supported(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return is_psycopg3
+
+
+def install(connection):
+    """Crea los índices parciales por estado (idempotente; solo PostgreSQL)."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+
+
+def uninstall(connection):
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+class ISOTimestamp(Func):
+    """Texto de datetime.isoformat() de un valor en UTC (microsegundos solo si los hay)."""
+    output_field = TextField()
+    template = (
+        "to_char(%(expressions)s AT TIME ZONE 'UTC', 'YYYY-MM-DD\"T\"HH24:MI:SS')"
+        " || CASE to_char(%(expressions)s, 'US') WHEN '000000' THEN ''"
+        " ELSE to_char(%(expressions)s, '.US') END || '+00:00'"
+    )
+
+
+def _csv_columns(queryset):
+    """Columnas de exports.EXPORT_FIELDS con el mismo texto que format_row."""
+    # todo como anotaciones: values_list mezclado con campos no respeta el orden en el SQL
+    return queryset.annotate(
+        csv_id=F('id'),
+        csv_title=F('title'),
+        # NULL sale vacío sin comillas, como lo escribe csv.writer ('' saldría "")
+        csv_description=NullIf('description', Value('')),
+        csv_completed=Case(When(completed=True, then=Value('true')), default=Value('false')),
+        csv_created_at=ISOTimestamp('created_at'),
+    ).values_list('csv_id', 'csv_title', 'csv_description', 'csv_completed', 'csv_created_at')
+
+
+def stream_csv(queryset, header, chunk_size):
+    """CSV desde COPY en bloques de chunk_size filas, después de header (ya escrita).
+       Los bytes son los mismos que los del camino genérico de exports.stream_csv."""
+    queryset = _csv_columns(queryset.order_by('-created_at', '-id'))
+    sql, params = queryset.query.sql_with_params()
+    connection = connections[queryset.db]
+    yield header
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)", params) as copy:
+            buffer = []
+            # libpq entrega una fila por bloque; csv.writer termina las líneas en \r\n
+            for row in copy:
+                buffer.append(bytes(row[:-1]) + b'\r\n')
+                if len(buffer) >= chunk_size:
+                    yield b''.join(buffer)
+                    buffer = []
+            if buffer:
+                yield b''.join(buffer)
+
+
+def reserve_ids(connection, count):
+    """Saca count ids de la secuencia de tasks_task (no necesariamente contiguos)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence('tasks_task', 'id')) FROM generate_series(1, %s)",
+            [count],
+        )
+        return [pk for (pk,) in cursor.fetchall()]
+
+
+def copy_tasks(objs, using='default', keep_created_at=False):
+    """Inserta tareas nuevas con COPY FROM STDIN y les asigna su pk.
+       Como bulk_create, no llama a save() ni dispara señales. Con keep_created_at
+       se escribe el created_at de cada objeto en vez de ahora (importaciones)."""
+    if not objs:
+        return objs
+    connection = connections[using]
+    fields = list(Task._meta.concrete_fields)
+    for obj, pk in zip(objs, reserve_ids(connection, len(objs))):
+        obj.pk = pk
+    # auto_now_add / auto_now (y demás pre_save) como los aplica bulk_create
+    kept = {'created_at'} if keep_created_at else set()
+    rows = (
+        [
+            field.get_db_prep_save(
+                getattr(obj, field.attname) if field.attname in kept else field.pre_save(obj, add=True),
+                connection,
+            )
+            for field in fields
+        ]
+        for obj in objs
+    )
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY {Task._meta.db_table} ({columns}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = using
+    return objs
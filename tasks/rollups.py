@@ -0,0 +1,327 @@
+# rollups.py: resúmenes precalculados por día y por hora para el dashboard.
+# Por cada día (hora local) y cada hora (UTC) de creación, y por categoría, se
+# guarda cuántas tareas se crearon y cuántas de ellas están completadas (las
+# pendientes son la diferencia). El dashboard lee solo estas filas: su costo
+# depende del rango de fechas y no del tamaño de la tabla Task.
+#
+# Se actualizan en la misma transacción que la tarea, como los contadores: cada
+# cambio es un delta sobre el bucket de la fecha de creación de la tarea, aplicado
+# con un solo INSERT ... ON CONFLICT DO UPDATE por tabla (SQLite y PostgreSQL).
+# Task.save() y Task.delete() (vistas, API, admin, shell) los mueven con los
+# receptores post_save/post_delete de abajo; las escrituras por conjunto (toggle,
+# acciones masivas, importación) no disparan señales y llaman a record* ellas mismas.
+# Completar una tarea antigua mueve el bucket de su día de creación, no el de hoy:
+# el modelo no guarda la fecha en que se completó.
+#
+# Archivar una tarea (tasks/archive.py) no los toca; backfill_rollups los reconstruye
+# desde Task y el archivo (todo, o desde una fecha).
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import connections, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import LOADED_FIELDS, Category, Task, TaskArchive, TaskDailyRollup, TaskHourlyRollup
+
+NO_CATEGORY = 0
+# rangos del dashboard: nombre -> (granularidad, cantidad de buckets)
+RANGES = {
+    '24h': ('hour', 24),
+    '48h': ('hour', 48),
+    '7d': ('day', 7),
+    '30d': ('day', 30),
+    '90d': ('day', 90),
+    '365d': ('day', 365),
+}
+DEFAULT_RANGE = '30d'
+# tope de buckets para un rango explícito (from/to): 5 años de días
+MAX_DAYS = 5 * 366
+BATCH_SIZE = 1000
+
+
+def buckets(created_at, tz=None):
+    """(día local, hora UTC truncada) en que cae una fecha de creación."""
+    return (
+        created_at.astimezone(tz or timezone.get_current_timezone()).date(),
+        created_at.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0),
+    )
+
+
+# ESCRITURA
+
+def _upsert(model, bucket_field, deltas, using):
+    """Suma los deltas {(bucket, categoría): [creadas, completadas]} con un solo
+       INSERT ... ON CONFLICT DO UPDATE (executemany)."""
+    connection = connections[using]
+    adapt = connection.ops.adapt_datefield_value if bucket_field == 'day' else connection.ops.adapt_datetimefield_value
+    rows = [
+        (adapt(bucket), category_id, created, completed)
+        for (bucket, category_id), (created, completed) in deltas.items()
+        if created or completed
+    ]
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    table, column = quote(model._meta.db_table), quote(bucket_field)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} ({column}, category_id, created, completed) VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT ({column}, category_id) DO UPDATE SET "
+            f"created = {table}.created + excluded.created, "
+            f"completed = {table}.completed + excluded.completed",
+            rows,
+        )
+
+
+def record(changes, using='default'):
+    """Aplica cambios [(created_at, category_id, delta creadas, delta completadas)],
+       agrupados por bucket (una sentencia por tabla aunque sean miles de tareas)."""
+    daily, hourly = defaultdict(lambda: [0, 0]), defaultdict(lambda: [0, 0])
+    tz = timezone.get_current_timezone()
+    for created_at, category_id, created, completed in changes:
+        day, hour = buckets(created_at, tz)
+        category_id = category_id or NO_CATEGORY
+        for deltas, key in ((daily, (day, category_id)), (hourly, (hour, category_id))):
+            deltas[key][0] += created
+            deltas[key][1] += completed
+    _upsert(TaskDailyRollup, 'day', daily, using)
+    _upsert(TaskHourlyRollup, 'hour', hourly, using)
+
+
+def record_toggled(task):
+    """Registra un cambio de estado; task.completed es el valor nuevo."""
+    record([(task.created_at, task.category_id, 0, 1 if task.completed else -1)])
+
+
+def record_tasks(tasks, using='default'):
+    """Registra tareas creadas en bloque (bulk_create, COPY, importación)."""
+    record(((task.created_at, task.category_id, 1, 1 if task.completed else 0) for task in tasks), using)
+
+
+def record_set(queryset, created=0, done=0, pending=0, using='default'):
+    """Registra un cambio sobre todas las tareas del queryset sin traerlas: un
+       GROUP BY por tabla, antes de aplicar el cambio. Cada tarea suma created a
+       creadas y done o pending a completadas según esté completada o no.
+       Devuelve (tareas, completadas) del conjunto."""
+    counts = {'total': Count('id'), 'done': Count('id', filter=Q(completed=True))}
+    queryset = queryset.using(using).order_by()
+    for model, bucket_field, trunc in (
+        (TaskDailyRollup, 'day', TruncDate('created_at')),
+        (TaskHourlyRollup, 'hour', TruncHour('created_at', tzinfo=dt_timezone.utc)),
+    ):
+        deltas = {}
+        total = completed = 0
+        for group in queryset.annotate(bucket=trunc).values('bucket', 'category_id').annotate(**counts):
+            deltas[(group['bucket'], group['category_id'] or NO_CATEGORY)] = [
+                created * group['total'],
+                done * group['done'] + pending * (group['total'] - group['done']),
+            ]
+            total += group['total']
+            completed += group['done']
+        _upsert(model, bucket_field, deltas, using)
+    return total, completed
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, using, **kwargs):
+    """Toda tarea guardada con save() mueve los resúmenes: sale del bucket leído
+       (fecha, categoría, estado) y entra en el nuevo; si nada cambió, no escribe."""
+    new = (instance.created_at, instance.category_id, instance.completed)
+    if created:
+        record([(new[0], new[1], 1, int(new[2]))], using)
+        return
+    loaded = getattr(instance, '_loaded', {})
+    if any(name not in loaded for name in LOADED_FIELDS):
+        # instancia sin el estado leído (campos diferidos o armada a mano): se
+        # reconstruye desde el día de creación
+        rebuild(since=timezone.localdate(instance.created_at), using=using)
+        return
+    old = (loaded['created_at'], loaded['category_id'], loaded['completed'])
+    if old != new:
+        record([(old[0], old[1], -1, -int(old[2])), (new[0], new[1], 1, int(new[2]))], using)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, using, **kwargs):
+    """Toda eliminación con delete() (de la tarea o de un QuerySet) resta la tarea."""
+    record([(instance.created_at, instance.category_id, -1, -1 if instance.completed else 0)], using)
+
+
+@receiver(post_delete, sender=Category)
+def merge_deleted_category(sender, instance, using, **kwargs):
+    """Las tareas de una categoría eliminada quedan sin categoría (SET_NULL):
+       sus resúmenes pasan a la fila sin categoría del mismo bucket."""
+    for model, bucket_field in ((TaskDailyRollup, 'day'), (TaskHourlyRollup, 'hour')):
+        rows = model.objects.using(using).filter(category_id=instance.pk)
+        deltas = {
+            (bucket, NO_CATEGORY): [created, completed]
+            for bucket, created, completed in rows.values_list(bucket_field, 'created', 'completed')
+        }
+        rows.delete()
+        _upsert(model, bucket_field, deltas, using)
+
+
+def rebuild(since=None, using='default', apps=None):
+    """Reconstruye los resúmenes desde Task y TaskArchive: todos o, con since (fecha),
+       desde ese día local. Un GROUP BY por tabla y granularidad dentro de una
+       transacción. apps permite usarla desde una migración (modelos históricos; antes
+       de 0011 no hay archivo). Devuelve (días, horas) escritos."""
+    if apps:
+        daily_model, hourly_model = (apps.get_model('tasks', name) for name in ('TaskDailyRollup', 'TaskHourlyRollup'))
+        sources = [apps.get_model('tasks', 'Task')]
+        try:
+            sources.append(apps.get_model('tasks', 'TaskArchive'))
+        except LookupError:
+            pass
+    else:
+        daily_model, hourly_model, sources = TaskDailyRollup, TaskHourlyRollup, [Task, TaskArchive]
+    tasks = [model.objects.using(using).order_by() for model in sources]
+    daily = daily_model.objects.using(using)
+    hourly = hourly_model.objects.using(using)
+    if since is not None:
+        start = timezone.make_aware(datetime.combine(since, time.min))
+        hour = start.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+        daily, daily_tasks = daily.filter(day__gte=since), [qs.filter(created_at__gte=start) for qs in tasks]
+        hourly, hourly_tasks = hourly.filter(hour__gte=hour), [qs.filter(created_at__gte=hour) for qs in tasks]
+    else:
+        daily_tasks = hourly_tasks = tasks
+
+    counts = {
+        'created': Count('id'),
+        'completed': Count('id', filter=Q(completed=True)),
+    }
+    written = []
+    with transaction.atomic(using=using):
+        for model, bucket_field, querysets, rollups, trunc in (
+            (daily_model, 'day', daily_tasks, daily, TruncDate('created_at')),
+            (hourly_model, 'hour', hourly_tasks, hourly, TruncHour('created_at', tzinfo=dt_timezone.utc)),
+        ):
+            rollups.delete()
+            totals = defaultdict(lambda: [0, 0])
+            for queryset in querysets:
+                groups = queryset.annotate(bucket=trunc).values('bucket', 'category_id').annotate(**counts)
+                for group in groups.iterator():
+                    total = totals[group['bucket'], group['category_id'] or NO_CATEGORY]
+                    total[0] += group['created']
+                    total[1] += group['completed']
+            rows = [
+                model(**{bucket_field: bucket}, category_id=category_id, created=created, completed=completed)
+                for (bucket, category_id), (created, completed) in totals.items()
+            ]
+            model.objects.using(using).bulk_create(rows, batch_size=BATCH_SIZE)
+            written.append(len(rows))
+    return tuple(written)
+
+
+# LECTURA
+
+class Window:
+    """Rango del dashboard: granularidad ('day' u 'hour') y buckets [start, end)."""
+
+    def __init__(self, granularity, start, end, name=None):
+        self.granularity = granularity
+        self.start = start
+        self.end = end
+        self.name = name
+
+    def buckets(self):
+        step = timedelta(days=1) if self.granularity == 'day' else timedelta(hours=1)
+        bucket = self.start
+        while bucket < self.end:
+            yield bucket
+            bucket += step
+
+
+def parse_window(params, now=None):
+    """Rango desde los parámetros: ?range=24h|48h|7d|30d|90d|365d o ?from=AAAA-MM-DD&to=AAAA-MM-DD
+       (días, ambos incluidos). Lanza ValueError si no es válido."""
+    now = now or timezone.now()
+    if params.get('from') or params.get('to'):
+        today = timezone.localdate(now)
+        try:
+            end = date.fromisoformat(params['to']) if params.get('to') else today
+            start = date.fromisoformat(params['from']) if params.get('from') else end - timedelta(days=29)
+        except ValueError:
+            raise ValueError('Fechas inválidas (se espera AAAA-MM-DD).')
+        if start > end:
+            raise ValueError('from debe ser anterior o igual a to.')
+        if (end - start).days >= MAX_DAYS:
+            raise ValueError(f'El rango no puede superar {MAX_DAYS} días.')
+        return Window('day', start, end + timedelta(days=1))
+
+    name = params.get('range') or DEFAULT_RANGE
+    if name not in RANGES:
+        raise ValueError(f"range debe ser uno de: {', '.join(RANGES)}.")
+    granularity, count = RANGES[name]
+    if granularity == 'day':
+        end = timezone.localdate(now) + timedelta(days=1)
+        return Window('day', end - timedelta(days=count), end, name)
+    end = buckets(now)[1] + timedelta(hours=1)
+    return Window('hour', end - timedelta(hours=count), end, name)
+
+
+def parse_category(value):
+    """?category=<id>|none -> id de categoría (0 = sin categoría) o None (todas)."""
+    if value in (None, ''):
+        return None
+    if value == 'none':
+        return NO_CATEGORY
+    if not value.isdigit():
+        raise ValueError('category debe ser un id o none.')
+    return int(value)
+
+
+def _counts(created, completed):
+    return {'created': created, 'completed': completed, 'pending': created - completed}
+
+
+def summary(window, category_id=None):
+    """Serie densa (un punto por bucket, con ceros), totales y desglose por
+       categoría del rango, leyendo solo los resúmenes."""
+    if window.granularity == 'day':
+        rollups = TaskDailyRollup.objects.filter(day__gte=window.start, day__lt=window.end)
+        bucket_field = 'day'
+    else:
+        rollups = TaskHourlyRollup.objects.filter(hour__gte=window.start, hour__lt=window.end)
+        bucket_field = 'hour'
+    sums = {'created_sum': Sum('created'), 'completed_sum': Sum('completed')}
+
+    by_category = list(rollups.values('category_id').annotate(**sums).order_by('-created_sum', 'category_id'))
+    names = Category.objects.in_bulk([row['category_id'] for row in by_category if row['category_id']])
+    categories = [
+        {
+            'id': row['category_id'] or None,
+            'name': names[row['category_id']].name if row['category_id'] in names else 'Sin categoría',
+            **_counts(row['created_sum'], row['completed_sum']),
+        }
+        for row in by_category
+        if row['created_sum']
+    ]
+
+    if category_id is not None:
+        rollups = rollups.filter(category_id=category_id)
+    points = {
+        row[bucket_field]: (row['created_sum'], row['completed_sum'])
+        for row in rollups.values(bucket_field).annotate(**sums).order_by()
+    }
+    series = []
+    for bucket in window.buckets():
+        created, completed = points.get(bucket, (0, 0))
+        label = bucket.isoformat() if window.granularity == 'day' else timezone.localtime(bucket).isoformat()
+        series.append({'bucket': label, **_counts(created, completed)})
+
+    return {
+        'granularity': window.granularity,
+        'range': window.name,
+        'start': window.start.isoformat(),
+        'end': window.end.isoformat(),
+        'category': category_id,
+        'totals': _counts(sum(p['created'] for p in series), sum(p['completed'] for p in series)),
+        'series': series,
+        'categories': categories,
+    }
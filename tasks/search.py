@@ -0,0 +1,93 @@
+# search.py: búsqueda de texto completo sobre título y descripción (SQLite FTS5).
+# tasks_task_fts es una tabla virtual de contenido externo: guarda solo el índice
+# invertido y lee el texto desde tasks_task. Los triggers la mantienen al día en
+# cada INSERT, DELETE y UPDATE de título/descripción, así que también cubren
+# bulk_create y los UPDATE por conjunto (un toggle no toca el índice).
+#
+# En otros motores no hay índice: TaskQuerySet.search cae a icontains.
+
+import re
+
+FTS_TABLE = 'tasks_task_fts'
+# peso de cada columna en el ranking bm25: el título pesa más que la descripción
+RANK_FUNCTION = 'bm25(10.0, 1.0)'
+# se ignoran los términos que pasen de este número (consultas absurdamente largas)
+MAX_TERMS = 8
+TOKEN_RE = re.compile(r'\w+')
+
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='tasks_task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES('rank', '{RANK_FUNCTION}')",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def is_supported(connection):
+    return connection.vendor == 'sqlite'
+
+
+def install(connection, optimize=False):
+    """Crea la tabla FTS y los triggers (idempotente) y carga las filas existentes.
+       Las migraciones que reconstruyen tasks_task en SQLite borran los triggers:
+       deben volver a llamar a esta función."""
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+    rebuild(connection, optimize=optimize)
+
+
+def uninstall(connection):
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+def rebuild(connection, optimize=False):
+    """Regenera el índice completo desde tasks_task; con optimize además fusiona
+       los segmentos (consultas más rápidas después de muchas escrituras)."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+        if optimize:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('optimize')")
+
+
+def terms(text):
+    """Palabras de la búsqueda del usuario (sin operadores ni comillas)."""
+    return TOKEN_RE.findall(text or '')[:MAX_TERMS]
+
+
+def build_query(text):
+    """Convierte el texto del usuario en una consulta FTS5: todas las palabras,
+       cada una como prefijo ("pan" encuentra "panadería"). None si no hay palabras."""
+    words = terms(text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
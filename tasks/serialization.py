@@ -0,0 +1,158 @@
+# serialization.py: camino rápido de lectura para las listas de la API.
+# En páginas grandes el costo de TaskSerializer está en la maquinaria de campos de
+# DRF y en instanciar Task, no en el SQL. FastTaskSerializer lee tuplas con
+# values_list() y aplica un conversor precalculado por campo (solo created_at
+# necesita uno); el resultado es el mismo dict que produce TaskSerializer y, con
+# FastJSONRenderer, los mismos bytes.
+#
+# Renderers: JSON con orjson si está instalado, NDJSON en streaming y MessagePack
+# (si está instalado msgpack). Ambas dependencias son opcionales.
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+from . import exports
+from .pagination import merge
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def _datetime_converter():
+    """Mismo formato que DateTimeField.to_representation de DRF (zona horaria actual,
+       ISO 8601 con 'Z' para UTC o DATETIME_FORMAT si se configuró otro)."""
+    output_format = api_settings.DATETIME_FORMAT
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def convert(value):
+        if value is None:
+            return None
+        if tz is not None:
+            value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+        if output_format is None:
+            return value
+        if output_format.lower() == 'iso-8601':
+            text = value.isoformat()
+            return text[:-6] + 'Z' if text.endswith('+00:00') else text
+        return value.strftime(output_format)
+
+    return convert
+
+
+class FastTaskSerializer:
+    """Serializador de solo lectura para listas de tareas a partir de values_list().
+
+    fields son los nombres de TaskSerializer a incluir, en su orden. Las filas
+    leídas traen además las columnas del orden (para el cursor), que no salen en
+    la respuesta."""
+
+    def __init__(self, model, fields):
+        self.fields = list(fields)
+        self.datetime_fields = {
+            name for name in self.fields
+            if model._meta.get_field(name).get_internal_type() == 'DateTimeField'
+        }
+
+    def values(self, queryset):
+        """Queryset de namedtuples con los campos pedidos y los del orden del queryset."""
+        ordering = [field.lstrip('-') for field in queryset.query.order_by]
+        extra = [name for name in ordering if name not in self.fields]
+        return queryset.values_list(*self.fields, *extra, named=True)
+
+    def converters(self):
+        """[(nombre, posición, conversor o None)]; se calcula una vez por respuesta."""
+        to_datetime = _datetime_converter()
+        return [
+            (name, index, to_datetime if name in self.datetime_fields else None)
+            for index, name in enumerate(self.fields)
+        ]
+
+    def to_representation(self, rows, converters=None):
+        converters = converters or self.converters()
+        return [
+            {name: convert(row[index]) if convert else row[index] for name, index, convert in converters}
+            for row in rows
+        ]
+
+    def stream_ndjson(self, *querysets, chunk_size=exports.CHUNK_SIZE):
+        """Todas las filas como NDJSON, por bloques, sin paginar. Varios querysets en el
+           mismo orden (tareas y archivo) se mezclan."""
+        converters = self.converters()
+        sources = [self.values(queryset).iterator(chunk_size=chunk_size) for queryset in querysets]
+        rows = sources[0] if len(sources) == 1 else merge(sources, querysets[0].query.order_by)
+        buffer = []
+        for row in rows:
+            buffer.append(dumps(self.to_representation([row], converters)[0]) + b'\n')
+            if len(buffer) >= chunk_size:
+                yield b''.join(buffer)
+                buffer = []
+        if buffer:
+            yield b''.join(buffer)
+
+
+def dumps(data):
+    """JSON compacto en UTF-8 con los mismos bytes que JSONRenderer de DRF."""
+    # orjson solo escribe el formato por defecto de DRF (compacto, sin escapar unicode)
+    if orjson is not None and api_settings.UNICODE_JSON and api_settings.COMPACT_JSON:
+        try:
+            content = orjson.dumps(data)
+        except TypeError:
+            # tipos que solo conoce el encoder de DRF (Decimal, textos lazy...)
+            pass
+        else:
+            # DRF escapa los separadores de línea/párrafo de unicode (JSON válido como JS)
+            return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer que usa dumps (orjson si está instalado); con indent cae al de DRF."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """application/x-ndjson: un objeto por línea. La lista de la API no pasa por aquí
+       (responde en streaming); sirve para errores y respuestas sueltas."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return b''.join(dumps(item) + b'\n' for item in items)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """application/msgpack (requiere msgpack)."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True)
+
+
+def renderer_classes():
+    """Renderers de la API de tareas según las dependencias instaladas."""
+    classes = [FastJSONRenderer, BrowsableAPIRenderer, NDJSONRenderer]
+    if msgpack is not None:
+        classes.append(MessagePackRenderer)
+    return classes
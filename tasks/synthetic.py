@@ -0,0 +1,96 @@
+# synthetic.py: tareas sintéticas para pruebas de carga y benchmarks
+# (comando generate_tasks, benchmarks/suite.py).
+# Las distribuciones imitan el uso real: más tareas recientes que antiguas, creadas
+# en horario hábil y sobre todo en días de semana; cerca de un tercio completadas
+# (más entre las antiguas); títulos de largo variable y muchas descripciones vacías;
+# categorías desparejas (unas pocas concentran la mayoría). Con la misma semilla se
+# generan las mismas filas.
+#
+# Se escriben por bloques con imports.insert_tasks (bulk_create o COPY, una
+# transacción y una actualización de contadores por bloque).
+
+import math
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import imports
+from .models import Category, Task
+
+CATEGORIES = ['Finanzas', 'Combustible', 'Mantención', 'Compras', 'Personal', 'Bodega', 'Seguridad', 'Clientes']
+VERBS = ['Revisar', 'Cargar', 'Registrar', 'Programar', 'Cerrar', 'Aprobar', 'Enviar', 'Actualizar',
+         'Inspeccionar', 'Conciliar', 'Solicitar', 'Documentar']
+OBJECTS = ['facturas de proveedores', 'desviación presupuestaria', 'consumo de combustible',
+           'mantención preventiva', 'orden de trabajo', 'abastecimiento semanal', 'inventario de bodega',
+           'reporte mensual', 'cotizaciones', 'turnos del personal', 'checklist de seguridad',
+           'reclamo de cliente', 'contrato de servicio', 'rendición de gastos']
+QUALIFIERS = ['', '', '', 'urgente', 'de la semana', 'pendiente', 'del mes anterior', 'planta norte',
+              'sucursal centro', 'máquina 3']
+SENTENCES = ['Analizar la diferencia con lo planificado.', 'Registrar los gastos en el sistema de control.',
+             'Coordinar con el área responsable.', 'Adjuntar respaldo en la carpeta compartida.',
+             'Validar montos antes de aprobar.', 'Informar a jefatura al terminar.',
+             'Revisar los registros de la semana.', 'Documentar la reparación en la máquina.']
+DAYS = 3 * 365
+BATCH_SIZE = 1000
+CHUNK_SIZE = 20000
+
+
+def ensure_categories(using='default'):
+    """Ids de las categorías sintéticas (las crea si faltan)."""
+    existing = dict(Category.objects.using(using).filter(name__in=CATEGORIES).values_list('name', 'id'))
+    missing = [Category(name=name) for name in CATEGORIES if name not in existing]
+    for category in Category.objects.using(using).bulk_create(missing):
+        existing[category.name] = category.pk
+    return [existing[name] for name in CATEGORIES]
+
+
+class TaskFactory:
+    """Construye tareas sintéticas sin guardar (una semilla = la misma secuencia)."""
+
+    def __init__(self, category_ids, seed=0, now=None, days=DAYS):
+        self.rng = random.Random(seed)
+        self.category_ids = category_ids
+        # pesos de Zipf: la primera categoría es la más usada
+        self.category_weights = [1 / rank for rank in range(1, len(category_ids) + 1)]
+        self.now = now or timezone.now()
+        self.days = days
+
+    def created_at(self):
+        rng = self.rng
+        # la edad sigue una exponencial: la mitad de las tareas tiene menos de ~4 meses
+        age = min(rng.expovariate(1 / 180), self.days)
+        day = self.now - timedelta(days=int(age))
+        if day.weekday() >= 5 and rng.random() < 0.8:
+            day -= timedelta(days=day.weekday() - 4)
+        hour = min(max(int(rng.gauss(13, 3)), 0), 23)
+        return day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60),
+                           microsecond=rng.randrange(1000000))
+
+    def build(self):
+        rng = self.rng
+        created_at = min(self.created_at(), self.now)
+        age_days = (self.now - created_at).days
+        title = ' '.join(filter(None, [rng.choice(VERBS), rng.choice(OBJECTS), rng.choice(QUALIFIERS)]))
+        sentences = int(rng.paretovariate(2)) - 1 if rng.random() < 0.6 else 0
+        description = ' '.join(rng.choice(SENTENCES) for _ in range(min(sentences, 8)))
+        # 5 % de las nuevas, casi todas las de hace años; ~35 % en total
+        completed = rng.random() < 0.05 + 0.9 * (1 - math.exp(-age_days / 365))
+        category_id = (
+            rng.choices(self.category_ids, self.category_weights)[0]
+            if self.category_ids and rng.random() < 0.7 else None
+        )
+        return Task(title=title, description=description, completed=completed,
+                    created_at=created_at, category_id=category_id)
+
+
+def generate(count, seed=0, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE, progress=None, using='default'):
+    """Crea count tareas sintéticas por bloques de chunk_size; progress(creadas) tras cada bloque."""
+    factory = TaskFactory(ensure_categories(using), seed=seed)
+    created = 0
+    while created < count:
+        objs = [factory.build() for _ in range(min(chunk_size, count - created))]
+        created += imports.insert_tasks(objs, batch_size, using)
+        if progress:
+            progress(created)
+    return created
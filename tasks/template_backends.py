@@ -0,0 +1,65 @@
+# template_backends.py: backend de templates de Django que mide cada render para
+# las métricas por request (tasks/metrics.py). Es DjangoTemplates tal cual; solo
+# envuelve los templates que entrega (render_to_string, TemplateResponse, DRF).
+#
+#   TEMPLATES = [{'BACKEND': 'tasks.template_backends.DjangoTemplates', ...}]
+#
+# warm() compila de antemano los templates de la app en el loader cacheado
+# (settings.TEMPLATES); la llaman wsgi.py y asgi.py al arrancar cada worker, así
+# el primer request no paga leer y parsear la página y sus parciales.
+
+from pathlib import Path
+
+from django.template import TemplateDoesNotExist, engines
+from django.template.backends import django as django_backend
+
+from . import metrics
+
+
+class Template(django_backend.Template):
+
+    def render(self, context=None, request=None):
+        with metrics.timed_render():
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+def template_names(engine, prefix):
+    """Nombres de los templates bajo prefix en los directorios de los loaders del engine."""
+    loaders = []
+    for loader in engine.template_loaders:
+        # el loader cacheado envuelve a los que leen de disco
+        loaders += getattr(loader, 'loaders', [loader])
+    names = set()
+    for loader in loaders:
+        for directory in loader.get_dirs():
+            root = Path(directory)
+            names.update(
+                path.relative_to(root).as_posix()
+                for path in (root / prefix).rglob('*.html')
+            )
+    return sorted(names)
+
+
+def warm(prefix='tasks/'):
+    """Carga y compila en el loader cacheado de cada engine de Django los templates
+       bajo prefix. Devuelve cuántos cargó (sin loader cacheado no sirve de nada:
+       se compilan de nuevo en cada render)."""
+    count = 0
+    for backend in engines.all():
+        if isinstance(backend, django_backend.DjangoTemplates):
+            for name in template_names(backend.engine, prefix):
+                backend.engine.get_template(name)
+                count += 1
+    return count
@@ -1,3 +1,1550 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import multiprocessing
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models.sql.compiler import SQLInsertCompiler
+from django.http import Http404
+from django.template import engines
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from besimplit_tasks.db.base import DatabaseWrapper as ProfileDatabaseWrapper
+from tasks import admission, archive, async_views, bulk, compression, counters, events, exports, fragments, imports, metrics, pagecache, pgcopy, rollups, serialization, synthetic, template_backends, views
+from tasks.api import TaskSerializer
+from tasks.cache_backends import SQLiteCache
+from tasks.models import Category, ExportJob, Task, TaskArchive, TaskCounter, TaskDailyRollup, TaskHourlyRollup, TaskTombstone
+from tasks.pagination import InvalidCursor, KeysetPaginator, after_cursor, decode_cursor, encode_cursor
+
+
+# La suite no toca cache/ del repo (caché compartida y métricas de un servidor de
+# desarrollo): cachés locmem y métricas por proceso. Las pruebas que necesitan
+# SQLiteCache lo apuntan a un archivo temporal.
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+isolated_caches = override_settings(
+    CACHES={
+        alias: {**config, 'BACKEND': LOCMEM, 'LOCATION': f'test-{alias}'}
+        for alias, config in settings.CACHES.items()
+    },
+    TASK_METRICS_PATH=None,
+)
+
+
+def setUpModule():
+    isolated_caches.enable()
+
+
+def tearDownModule():
+    # lo medido durante la suite no se vuelca al archivo real al salir (atexit)
+    metrics.registry.take()
+    isolated_caches.disable()
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN es propio de SQLite')
+class TaskQueryPlanTests(TestCase):
+    """Las consultas calientes deben resolverse con índices: sin recorrer la
+       tabla completa y sin ordenar en un B-tree temporal."""
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertNotIn('TEMP B-TREE', plan, plan)
+        for line in plan.splitlines():
+            if 'tasks_task' in line and 'SCAN' in line:
+                self.assertIn('INDEX', line, plan)
+
+    def test_list_queries(self):
+        qs = Task.objects.order_by('-created_at', '-id')
+        cursor = encode_cursor(timezone.now(), 100)
+        for filter_type in ('all', 'pending', 'completed'):
+            with self.subTest(filter_type=filter_type):
+                filtered = qs.by_status(filter_type)
+                self.assertUsesIndex(filtered[:51])
+                self.assertUsesIndex(after_cursor(filtered, cursor)[:51])
+
+    def test_category_filter(self):
+        qs = Task.objects.order_by('-created_at', '-id').filter(category_id__in=[1])
+        self.assertIn('USING INDEX task_category_created_idx', qs[:51].explain())
+        self.assertUsesIndex(qs[:51])
+
+    def test_filtered_queries_seek_the_index(self):
+        qs = Task.objects.order_by('-created_at', '-id').by_status('pending')
+        plan = after_cursor(qs, encode_cursor(timezone.now(), 100))[:51].explain()
+        self.assertIn('SEARCH tasks_task USING INDEX task_completed_created_idx', plan)
+
+    def test_status_count(self):
+        self.assertUsesIndex(Task.objects.by_status('completed').values('id'))
+        self.assertIn('COVERING INDEX', Task.objects.by_status('completed').values('id').explain())
+
+    def test_export_query(self):
+        for filter_type in ('all', 'pending', 'completed'):
+            with self.subTest(filter_type=filter_type):
+                queryset = Task.objects.by_status(filter_type).order_by('-created_at', '-id')
+                self.assertUsesIndex(queryset.values_list(*exports.EXPORT_FIELDS))
+
+
+    def test_covering_index_includes_columns_only_where_supported(self):
+        index = next(index for index in Task._meta.indexes if index.name == 'task_created_cover_idx')
+        editor = connection.SchemaEditorClass(connection, collect_sql=True)
+        self.assertNotIn('INCLUDE', str(index.create_sql(Task, editor)))
+        with mock.patch.object(connection.features, 'supports_covering_indexes', True):
+            self.assertIn('INCLUDE ("completed", "title", "description")', str(index.create_sql(Task, editor)))
+        # sin avisos silenciados en settings: el índice no dispara models.W040
+        self.assertFalse([error for error in Task.check() if error.id == 'models.W040'])
+
+class TaskRowFragmentCacheTests(TestCase):
+    def setUp(self):
+        fragments.get_cache().clear()
+        self.task = Task.objects.create(title='Revisar facturas')
+
+    def test_list_reuses_cached_rows(self):
+        self.client.get('/')
+        cached = fragments.get_cache().get(f'task-row:{self.task.pk}')[1]
+        self.assertIn('Revisar facturas', cached)
+
+    def test_toggle_invalidates_row(self):
+        self.client.get('/')
+        response = self.client.post(f'/toggle/{self.task.pk}/')
+        self.assertIn(b'line-through', response.content)
+        self.assertIn('line-through', fragments.get_cache().get(f'task-row:{self.task.pk}')[1])
+
+    async def test_async_rows_match_and_use_async_cache(self):
+        tasks = [task async for task in Task.objects.all()]
+        cache = fragments.get_cache()
+        with mock.patch.object(type(cache), 'get_many', side_effect=AssertionError('caché sync')):
+            rows = await fragments.arender_rows(tasks)
+        self.assertIn('Revisar facturas', rows[0])
+        self.assertEqual(rows, await sync_to_async(fragments.render_rows)(tasks))
+        self.assertEqual((await cache.aget(f'task-row:{self.task.pk}'))[1], rows[0])
+
+    async def test_async_detail_and_toggle_use_async_cache(self):
+        factory = RequestFactory()
+        with mock.patch.object(fragments, 'render_row', side_effect=AssertionError('caché sync')):
+            detail = await async_views.TaskDetailView.as_view()(factory.get('/'), pk=self.task.pk)
+            toggled = await async_views.TaskToggleView.as_view()(factory.post('/'), pk=self.task.pk)
+        self.assertIn(b'Revisar facturas', detail.content)
+        self.assertIn(b'line-through', toggled.content)
+        self.assertIn('line-through', (await fragments.get_cache().aget(f'task-row:{self.task.pk}'))[1])
+
+
+def _set_from_other_process(location, key, value):
+    SQLiteCache(location, {}).set(key, value)
+
+
+class SharedCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = f'{directory.name}/shared.sqlite3'
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': {'TOUCH_INTERVAL': 0, **options}})
+
+    def test_visible_across_processes(self):
+        process = multiprocessing.get_context('fork').Process(
+            target=_set_from_other_process, args=(self.location, 'stats', '<b>3</b>')
+        )
+        process.start()
+        process.join()
+        self.assertEqual(self.make_cache().get('stats'), '<b>3</b>')
+
+    def test_basic_operations_and_expiry(self):
+        cache = self.make_cache()
+        cache.set_many({'a': 1, 'b': [2]})
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': [2]})
+        self.assertFalse(cache.add('a', 9))
+        self.assertTrue(cache.add('c', 3))
+        self.assertEqual(cache.get('a', version=2), None)
+        cache.set('gone', 1, timeout=-1)
+        self.assertIsNone(cache.get('gone'))
+        cache.delete_many(['a', 'b'])
+        self.assertFalse(cache.has_key('a'))
+
+    def test_evicts_least_recently_used(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3, CULL_EVERY=1)
+        for key in ('viejo', 'usado', 'otro'):
+            cache.set(key, key)
+            time.sleep(0.01)
+        cache.get('usado')
+        cache.set('nuevo', 'nuevo')
+        self.assertEqual(set(cache.get_many(['viejo', 'usado', 'otro', 'nuevo'])), {'usado', 'otro', 'nuevo'})
+
+    def test_size_is_checked_every_few_writes(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_EVERY=10)
+        with mock.patch('tasks.cache_backends.random.random', return_value=0.5), \
+                mock.patch.object(SQLiteCache, '_cull', wraps=cache._cull) as cull:
+            for n in range(5):
+                cache.set(f'k{n}', n)
+            self.assertEqual(cull.call_count, 0)
+            # un set_many grande controla el tamaño con más probabilidad
+            cache.set_many({f'm{n}': n for n in range(6)})
+        self.assertEqual(cull.call_count, 1)
+        self.assertLessEqual(len(cache.get_many([f'k{n}' for n in range(5)] + [f'm{n}' for n in range(6)])), 3)
+
+    def test_partials_are_served_from_the_shared_cache(self):
+        shared = {**settings.CACHES[settings.TASK_SHARED_CACHE], 'BACKEND': 'tasks.cache_backends.SQLiteCache',
+                  'LOCATION': self.location}
+        self.enterContext(override_settings(CACHES={**settings.CACHES, settings.TASK_SHARED_CACHE: shared}))
+        self.assertIsInstance(pagecache.get_cache(), SQLiteCache)
+        Task.objects.create(title='Revisar facturas')
+        counters.rebuild()
+        pagecache.get_cache().clear()
+        for url, headers in (('/stats/', {}), ('/?filter=pending', {'HTTP_HX_REQUEST': 'true'})):
+            with self.subTest(url=url):
+                first = self.client.get(url, **headers)
+                # otro worker: solo lee la fila de contadores
+                with self.assertNumQueries(1):
+                    second = self.client.get(url, **headers)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second['ETag'], first['ETag'])
+
+
+class SQLiteProfileTests(TestCase):
+    """Backend del perfil de producción (besimplit_tasks.db) sobre un archivo temporal."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f'{directory.name}/profile.sqlite3'
+        self.wrapper = ProfileDatabaseWrapper({
+            **connection.settings_dict,
+            'NAME': self.path,
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 1234},
+            },
+        })
+        self.addCleanup(self.wrapper.close)
+
+    def test_pragmas_on_connect(self):
+        with self.wrapper.cursor() as cursor:
+            for pragma, expected in (('journal_mode', 'wal'), ('synchronous', 1), ('busy_timeout', 1234)):
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], expected)
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        self.wrapper.ensure_connection()
+        self.wrapper._start_transaction_under_autocommit()
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        with self.assertRaises(sqlite3.OperationalError):
+            other.execute('BEGIN IMMEDIATE')
+        # en WAL los lectores siguen leyendo
+        other.execute('SELECT 1').fetchone()
+
+
+class CSVExportTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.rows = [
+            ('Café, "comillas"', 'línea\nnueva', True, now - timedelta(minutes=1)),
+            ('Pendiente', '', False, now - timedelta(minutes=2)),
+            ('Hecha', 'sí', True, now - timedelta(minutes=3)),
+        ]
+        imports.insert_tasks([
+            Task(title=title, description=description, completed=completed, created_at=created_at)
+            for title, description, completed, created_at in self.rows
+        ])
+
+    def exported(self, **params):
+        response = self.client.get('/export/csv/', params)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="tasks_export.csv"')
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(io.StringIO(content, newline='')))
+
+    def test_streams_header_and_rows_in_list_order(self):
+        header, *rows = self.exported()
+        self.assertEqual(tuple(header), exports.EXPORT_FIELDS)
+        self.assertEqual([(title, description) for _, title, description, _, _ in rows],
+                         [(title, description) for title, description, _, _ in self.rows])
+        self.assertEqual([int(pk) for pk, *_ in rows],
+                         list(Task.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_filter_parameter(self):
+        for filter_type, titles in (('pending', ['Pendiente']), ('completed', ['Café, "comillas"', 'Hecha'])):
+            with self.subTest(filter_type=filter_type):
+                self.assertEqual([row[1] for row in self.exported(filter=filter_type)[1:]], titles)
+        self.assertEqual(self.client.get('/export/csv/', {'archived': 'tal vez'}).status_code, 400)
+
+    def test_streams_in_chunks(self):
+        chunks = list(exports.stream_csv(Task.objects.order_by('-created_at', '-id'), chunk_size=2))
+        # cabecera, un bloque de 2 filas y el resto
+        self.assertEqual(len(chunks), 3)
+        response = self.client.get('/export/csv/')
+        self.assertEqual(b''.join(response.streaming_content).decode(), ''.join(chunks))
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(EXPORT_ROOT=Path(directory.name)))
+        now = timezone.now()
+        imports.insert_tasks([
+            Task(title=f'Tarea {n}', completed=n % 2 == 0, created_at=now - timedelta(minutes=n))
+            for n in range(25)
+        ])
+        counters.rebuild()
+
+    def streamed(self, **params):
+        return b''.join(self.client.get('/export/csv/', params).streaming_content)
+
+    def test_claim_takes_each_job_once(self):
+        first, second = exports.enqueue('all'), exports.enqueue('pending')
+        claimed = [exports.claim_next() for _ in range(3)]
+        self.assertEqual([job.pk for job in claimed[:2]], [first.pk, second.pk])
+        self.assertIsNone(claimed[2])
+        self.assertEqual(set(ExportJob.objects.values_list('status', flat=True)), {ExportJob.STATUS_RUNNING})
+
+    def test_resumes_from_checkpoint_after_a_crash(self):
+        exports.enqueue('pending')
+        job = exports.claim_next()
+        real_checkpoint = exports._checkpoint
+        calls = []
+
+        def dies_on_third_block(*args, **kwargs):
+            if len(calls) == 3:
+                raise SystemExit('worker caído')
+            calls.append(1)
+            return real_checkpoint(*args, **kwargs)
+
+        with mock.patch.object(exports, '_checkpoint', dies_on_third_block), self.assertRaises(SystemExit):
+            exports.run_job(job, chunk_size=5)
+        # bloque a medio escribir que el checkpoint no confirmó
+        with open(job.file_path, 'ab') as fh:
+            fh.write(b'999,basura')
+        self.assertEqual(exports.requeue_stale(max_age=-1), 1)
+        resumed = exports.claim_next()
+        self.assertEqual(resumed.rows_written, 10)
+        exports.run_job(resumed, chunk_size=5)
+        self.assertEqual(resumed.file_path.read_bytes(), self.streamed(filter='pending'))
+        self.assertEqual(resumed.rows_written, 12)
+
+    def test_reuses_artifact_until_the_table_changes(self):
+        job = exports.enqueue('all')
+        self.assertEqual(exports.enqueue('all').pk, job.pk)
+        exports.run_job(exports.claim_next())
+        self.assertEqual(exports.enqueue('all').pk, job.pk)
+        self.assertNotEqual(exports.enqueue('all', 'include').pk, job.pk)
+        job.file_path.unlink()
+        self.assertNotEqual(exports.enqueue('all').pk, job.pk)
+        Task.objects.create(title='Nueva')
+        self.assertNotEqual(exports.enqueue('all').pk, job.pk)
+
+    def test_write_during_the_run_marks_the_job_stale(self):
+        job = exports.enqueue('all')
+        real_checkpoint = exports._checkpoint
+
+        def write_meanwhile(*args, **kwargs):
+            Task.objects.create(title='Mientras tanto')
+            return real_checkpoint(*args, **kwargs)
+
+        with mock.patch.object(exports, '_checkpoint', write_meanwhile):
+            exports.run_job(exports.claim_next(), chunk_size=10)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_DONE)
+        self.assertTrue(job.fingerprint.endswith(exports.STALE_SUFFIX))
+        self.assertNotEqual(exports.enqueue('all').pk, job.pk)
+
+    def test_archived_jobs_match_the_streaming_export(self):
+        archive.archive(days=0)
+        for mode in ('include', 'only'):
+            with self.subTest(mode=mode):
+                exports.enqueue('all', mode)
+                job = exports.run_job(exports.claim_next(), chunk_size=4)
+                self.assertEqual(job.file_path.read_bytes(), self.streamed(archived=mode))
+
+    def test_prune_removes_superseded_and_failed_artifacts(self):
+        exports.enqueue('all')
+        old = exports.run_job(exports.claim_next())
+        Task.objects.create(title='Nueva')
+        exports.enqueue('all')
+        new = exports.run_job(exports.claim_next())
+        failed = exports.enqueue('pending')
+        ExportJob.objects.filter(pk=failed.pk).update(status=ExportJob.STATUS_FAILED)
+        self.assertEqual(exports.prune(retention=3600), 0)
+        self.assertEqual(exports.prune(retention=-1), 2)
+        self.assertFalse(old.file_path.exists())
+        self.assertTrue(new.file_path.exists())
+        self.assertEqual(list(ExportJob.objects.values_list('pk', flat=True)), [new.pk])
+
+    def test_create_view_validates_filter_from_the_post_body(self):
+        self.assertEqual(self.client.post('/export/jobs/', {'filter': 'x' * 30}).status_code, 400)
+        self.assertEqual(self.client.post('/export/jobs/', {'archived': 'todas'}).status_code, 400)
+        response = self.client.post('/export/jobs/?filter=completed', {'filter': 'pending', 'archived': 'only'})
+        self.assertEqual(response.status_code, 202)
+        job = ExportJob.objects.get(pk=response.json()['id'])
+        self.assertEqual((job.filter_type, job.archived), ('pending', 'only'))
+        self.assertEqual(ExportJob.objects.get(pk=self.client.post('/export/jobs/?filter=completed').json()['id']).filter_type, 'all')
+
+
+class CounterTests(TestCase):
+    def assertCountsMatchTable(self):
+        completed = Task.objects.filter(completed=True).count()
+        total = Task.objects.count()
+        self.assertEqual(counters.get_counts(), {
+            'total_count': total, 'completed_count': completed, 'pending_count': total - completed,
+        })
+
+    def test_model_writes_outside_the_views_move_counters(self):
+        task = Task.objects.create(title='Sola')
+        self.assertCountsMatchTable()
+        task.completed = True
+        task.save()
+        self.assertEqual(counters.get_counts()['completed_count'], 1)
+        loaded = Task.objects.get(pk=task.pk)
+        loaded.title = 'Renombrada'
+        loaded.save()
+        self.assertEqual(counters.get_counts()['completed_count'], 1)
+        Task.objects.filter(pk=task.pk).delete()
+        self.assertEqual(counters.get_counts()['total_count'], 0)
+
+    def test_admin_delete_moves_counters(self):
+        task = Task.objects.create(title='Desde el admin', completed=True)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'clave'))
+        response = self.client.post(f'/admin/tasks/task/{task.pk}/delete/', {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(counters.get_counts(), {'total_count': 0, 'completed_count': 0, 'pending_count': 0})
+
+    def test_views_count_each_write_once(self):
+        self.client.post('/create/', {'title': 'Nueva'})
+        task = Task.objects.get()
+        self.client.post(f'/toggle/{task.pk}/')
+        self.client.post(f'/update/{task.pk}/', {'title': 'Editada'})
+        self.client.post('/api/tasks/', {'title': 'Desde la API', 'completed': True}, content_type='application/json')
+        self.assertCountsMatchTable()
+        self.client.post(f'/delete/{task.pk}/')
+        self.assertCountsMatchTable()
+
+    def test_reconcile_counters_fixes_drift(self):
+        Task.objects.bulk_create([Task(title='Uno', completed=True), Task(title='Dos')])
+        TaskCounter.objects.update_or_create(pk=counters.COUNTER_PK, defaults={'total': 9, 'completed': 0})
+        version = counters.get_version()
+        out = io.StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertCountsMatchTable()
+        self.assertGreater(counters.get_version(), version)
+        self.assertIn('total_count: 2 (diferencia -7)', out.getvalue())
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.task = Task.objects.create(title='Revisar facturas')
+        counters.rebuild()
+
+    def assertNotModifiedUntilWrite(self, url, **headers):
+        etag = self.client.get(url, **headers)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.client.post(f'/toggle/{self.task.pk}/')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_stats(self):
+        self.assertNotModifiedUntilWrite('/stats/')
+
+    def test_list_partial(self):
+        self.assertNotModifiedUntilWrite('/?filter=pending', HTTP_HX_REQUEST='true')
+
+    def test_detail(self):
+        self.assertNotModifiedUntilWrite(f'/detail/{self.task.pk}/')
+
+    def test_api_list(self):
+        self.assertNotModifiedUntilWrite('/api/tasks/')
+
+    def test_model_writes_outside_the_views_change_the_etag(self):
+        urls = ['/api/tasks/', '/stats/', f'/detail/{self.task.pk}/']
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        # como el admin o el shell: save() y delete() directos
+        self.task.title = 'Revisar facturas de marzo'
+        self.task.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+                if url != '/stats/':
+                    self.assertContains(response, 'marzo')
+        etag = self.client.get('/api/tasks/')['ETag']
+        Task.objects.get(pk=self.task.pk).delete()
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_not_modified_is_a_single_query(self):
+        etag = self.client.get('/stats/')['ETag']
+        with self.assertNumQueries(1):
+            self.client.get('/stats/', HTTP_IF_NONE_MATCH=etag)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'el índice FTS5 es propio de SQLite')
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        self.in_title = Task.objects.create(title='Comprar pan', description='en la panadería')
+        self.in_description = Task.objects.create(title='Recados', description='pasar a comprar leche')
+        Task.objects.create(title='Llamar al banco')
+
+    def titles(self, queryset):
+        return [task.title for task in queryset]
+
+    def test_prefix_and_ranking(self):
+        # "compr" es prefijo en ambas; pesa más la coincidencia en el título
+        self.assertEqual(self.titles(Task.objects.search('compr')), ['Comprar pan', 'Recados'])
+        self.assertEqual(self.titles(Task.objects.search('comprar leche')), ['Recados'])
+        self.assertEqual(self.titles(Task.objects.search('panaderia')), ['Comprar pan'])
+
+    def test_index_follows_writes(self):
+        self.in_title.title = 'Vender bicicleta'
+        self.in_title.save()
+        Task.objects.filter(pk=self.in_description.pk).update(description='nada')
+        Task.objects.bulk_create([Task(title='Comprar sellos')])
+        self.assertEqual(self.titles(Task.objects.search('compr')), ['Comprar sellos'])
+        Task.objects.filter(title='Comprar sellos').delete()
+        self.assertFalse(Task.objects.search('compr').exists())
+
+    def test_list_and_api(self):
+        self.client.post(f'/toggle/{self.in_title.pk}/')
+        response = self.client.get('/?filter=pending&q=compr', HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'Recados')
+        self.assertNotContains(response, 'Comprar pan')
+        data = self.client.get('/api/tasks/?q=compr&page_size=1').json()
+        self.assertEqual([task['title'] for task in data['results']], ['Comprar pan'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual([task['title'] for task in data['results']], ['Recados'])
+        self.assertIsNone(data['next'])
+
+    def test_query_is_driven_by_the_index(self):
+        plan = Task.objects.search('compr').by_status('pending').order_by('search_rank', 'id')[:51].explain()
+        self.assertIn('VIRTUAL TABLE INDEX', plan)
+        self.assertIn('SEARCH tasks_task USING INTEGER PRIMARY KEY', plan)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        # cinco tareas con el mismo created_at: el orden lo decide id
+        self.tasks = [Task.objects.create(title=f'Tarea {i}') for i in range(5)]
+        Task.objects.update(created_at=timezone.now())
+
+    def pages(self, page_size):
+        paginator, cursor, pages = KeysetPaginator(page_size), None, []
+        while True:
+            rows, cursor = paginator.paginate(Task.objects.all(), cursor)
+            pages.append([task.pk for task in rows])
+            if cursor is None:
+                return pages
+
+    def test_ties_on_created_at_are_broken_by_id(self):
+        expected = sorted((task.pk for task in self.tasks), reverse=True)
+        pages = self.pages(2)
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+    def test_last_page_has_no_cursor(self):
+        # múltiplo exacto del tamaño de página: no queda una página vacía al final
+        self.assertEqual([len(page) for page in self.pages(5)], [5])
+        self.assertEqual([len(page) for page in self.pages(3)], [3, 2])
+        response = self.client.get('/api/tasks/?page_size=5').json()
+        self.assertEqual((len(response['results']), response['next']), (5, None))
+
+    def test_api_follows_next_across_ties(self):
+        seen, url = [], '/api/tasks/?page_size=2'
+        while url:
+            response = self.client.get(url).json()
+            seen += [task['id'] for task in response['results']]
+            url = response['next']
+        self.assertEqual(seen, sorted((task.pk for task in self.tasks), reverse=True))
+
+    def test_cursor_round_trip(self):
+        created_at = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(created_at, 42)), (created_at, 42))
+
+    def test_tampered_cursors(self):
+        valid = encode_cursor(timezone.now(), 1)
+        for cursor in ('!!basura', valid[:-3], encode_cursor('ayer', 1), encode_cursor(timezone.now()),
+                       encode_cursor(timezone.now(), 'x'), 'gA'):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    decode_cursor(cursor)
+                self.assertEqual(self.client.get(f'/api/tasks/?cursor={cursor}').status_code, 404)
+                self.assertEqual(self.client.get(f'/?cursor={cursor}').status_code, 404)
+
+
+class TaskAPIFilterTests(TestCase):
+    def setUp(self):
+        self.home = Category.objects.create(name='Casa')
+        self.first = Task.objects.create(title='Primera', description='larga ' * 50, category=self.home)
+        self.second = Task.objects.create(title='Segunda', completed=True)
+        self.third = Task.objects.create(title='Tercera', category=self.home)
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [task['id'] for task in response.json()['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.ids('/api/tasks/?completed=false'), [self.third.pk, self.first.pk])
+        self.assertEqual(self.ids(f'/api/tasks/?category={self.home.pk}&completed=0'), [self.third.pk, self.first.pk])
+        self.assertEqual(self.ids('/api/tasks/?category=none'), [self.second.pk])
+        self.assertEqual(self.ids(f'/api/tasks/?ids={self.first.pk},{self.second.pk}'), [self.second.pk, self.first.pk])
+        Task.objects.filter(pk=self.first.pk).update(created_at=timezone.now() - timedelta(days=3))
+        yesterday = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(self.ids(f'/api/tasks/?created_before={yesterday}'), [self.first.pk])
+        self.assertEqual(self.ids(f'/api/tasks/?created_after={yesterday}'), [self.third.pk, self.second.pk])
+
+    def test_ordering_keeps_cursor(self):
+        response = self.client.get('/api/tasks/?ordering=created_at&page_size=2').json()
+        self.assertEqual([task['id'] for task in response['results']], [self.first.pk, self.second.pk])
+        self.assertEqual(self.ids(response['next']), [self.third.pk])
+        self.assertEqual(self.ids('/api/tasks/?ordering=-id&completed=false'), [self.third.pk, self.first.pk])
+
+    def test_sparse_fields_shrink_select_and_payload(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/?fields=id,completed')
+        self.assertEqual(response.json()['results'][0], {'id': self.third.pk, 'completed': False})
+        select = next(q['sql'] for q in queries.captured_queries if 'FROM "tasks_task"' in q['sql'])
+        self.assertNotIn('"description"', select)
+
+    def test_invalid_parameters(self):
+        for query in ('completed=tal vez', 'ordering=title', 'fields=id,secreto', 'created_after=ayer', 'ids=1,x'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/tasks/?{query}').status_code, 400)
+
+    async def test_async_api_matches(self):
+        url = f'/api/tasks/async/?category={self.home.pk}&ordering=created_at&fields=id,title'
+        sync_response = await sync_to_async(self.client.get)(url.replace('/async', ''))
+        async_response = await self.async_client.get(url)
+        self.assertEqual(async_response.content, sync_response.content)
+
+
+class FastSerializationTests(TestCase):
+    def setUp(self):
+        Task.objects.create(title='Café ☕ "comillas"', description='línea\u2028separada\n\\ fin')
+        Task.objects.create(title='Otra', completed=True)
+
+    def drf_bytes(self, queryset, fields=None):
+        data = TaskSerializer(list(queryset.order_by('-created_at', '-id')), many=True, fields=fields).data
+        return JSONRenderer().render({'next': None, 'results': data})
+
+    def assertSameBytes(self, url, fields=None):
+        self.assertEqual(self.client.get(url).content, self.drf_bytes(Task.objects.all(), fields))
+
+    def test_list_is_byte_identical(self):
+        self.assertSameBytes('/api/tasks/')
+        self.assertSameBytes('/api/tasks/?fields=created_at,id', ['id', 'created_at'])
+        with override_settings(TIME_ZONE='UTC'):
+            self.assertSameBytes('/api/tasks/')
+        with mock.patch.object(serialization, 'orjson', None):
+            self.assertSameBytes('/api/tasks/')
+
+    def test_ndjson_streams_every_row(self):
+        response = self.client.get('/api/tasks/?format=ndjson&page_size=1')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).splitlines()
+        results = JSONRenderer().render(TaskSerializer(Task.objects.order_by('-created_at', '-id'), many=True).data)
+        self.assertEqual(b'[' + b','.join(lines) + b']', results)
+
+
+@skipUnless(pgcopy.is_supported(connection), 'COPY e índices parciales son propios de PostgreSQL')
+class PostgresFastPathTests(TestCase):
+    def setUp(self):
+        Task.objects.create(title='Café, "comillas"', description='línea\nnueva')
+        Task.objects.create(title='Sin descripción', completed=True)
+        Task.objects.create(title=' espacios ', description='a;b')
+        counters.rebuild()
+
+    def generic_csv(self, queryset):
+        with mock.patch.object(pgcopy, 'is_supported', return_value=False):
+            return ''.join(exports.stream_csv(queryset)).encode()
+
+    def test_copy_export_is_byte_identical(self):
+        for filter_type in ('all', 'pending', 'completed'):
+            queryset = Task.objects.by_status(filter_type)
+            self.assertEqual(b''.join(exports.stream_csv(queryset)), self.generic_csv(queryset))
+
+    def test_copy_tasks_assigns_ids(self):
+        objs = pgcopy.copy_tasks([Task(title=f'Copia {i}', completed=i % 2 == 0) for i in range(3)])
+        self.assertEqual(
+            list(Task.objects.filter(pk__in=[obj.pk for obj in objs]).order_by('pk').values_list('title', 'completed')),
+            [('Copia 0', True), ('Copia 1', False), ('Copia 2', True)],
+        )
+        self.assertTrue(all(obj.created_at and obj.updated_at for obj in objs))
+
+    def test_bulk_create_uses_copy(self):
+        items = [{'title': f'Masiva {i}'} for i in range(bulk.COPY_MIN_ROWS)]
+        with mock.patch.object(pgcopy, 'copy_tasks', wraps=pgcopy.copy_tasks) as copy_tasks:
+            response = self.client.post('/api/tasks/bulk/', items, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        copy_tasks.assert_called_once()
+        self.assertEqual(counters.get_counts()['total_count'], 3 + bulk.COPY_MIN_ROWS)
+
+    def test_status_filter_can_use_partial_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            sql, params = Task.objects.by_status('pending').order_by('-created_at', '-id').query.sql_with_params()
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('task_pending_created_idx', plan)
+
+
+class ImportTasksTests(TestCase):
+    def test_csv_export_round_trip(self):
+        Task.objects.create(title='Café, "comillas"', description='línea\nnueva', completed=True)
+        Task.objects.create(title='Sin descripción')
+        exported = ''.join(exports.stream_csv(Task.objects.all()))
+        before = list(Task.objects.order_by('created_at').values_list('title', 'completed', 'created_at'))
+        Task.objects.all().delete()
+
+        stats = imports.import_tasks(io.StringIO(exported, newline=''), 'csv', batch_size=1, chunk_size=1)
+        self.assertEqual((stats['imported'], stats['invalid']), (2, 0))
+        self.assertEqual(list(Task.objects.order_by('created_at').values_list('title', 'completed', 'created_at')), before)
+        self.assertEqual(counters.get_counts()['completed_count'], 1)
+        # las tareas nuevas siguen tomando la fecha de ahora
+        self.assertGreater(Task.objects.create(title='Nueva').created_at, before[-1][2])
+
+    def test_insert_keeps_created_at_in_one_write_per_row(self):
+        field = Task._meta.get_field('created_at')
+        flags = []
+        execute_sql = SQLInsertCompiler.execute_sql
+
+        def spy(compiler, *args, **kwargs):
+            flags.append(field.auto_now_add)
+            return execute_sql(compiler, *args, **kwargs)
+
+        old = timezone.now() - timedelta(days=400)
+        objs = [Task(title=f'Vieja {n}', created_at=old - timedelta(days=n), completed=True) for n in range(3)]
+        with mock.patch.object(SQLInsertCompiler, 'execute_sql', spy), \
+                mock.patch.object(counters, 'record_bulk', wraps=counters.record_bulk) as record_bulk, \
+                CaptureQueriesContext(connection) as queries:
+            imports.insert_tasks(objs, batch_size=2)
+        # el campo del modelo no se toca: otro hilo que crea una tarea sigue teniendo auto_now_add
+        self.assertTrue(flags)
+        self.assertTrue(all(flags))
+        # cada fila se escribe una vez: sin UPDATE para restaurar la fecha
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE "tasks_task"')])
+        self.assertEqual(
+            list(Task.objects.filter(pk__in=[obj.pk for obj in objs]).order_by('-created_at').values_list('created_at', flat=True)),
+            [obj.created_at for obj in objs],
+        )
+        self.assertEqual(record_bulk.call_args.kwargs['using'], 'default')
+
+    def test_ndjson_rejects_invalid_records(self):
+        lines = [
+            '{"title": "  Revisar   facturas ", "completed": true}',
+            '{"title": "12345"}',
+            'no es json',
+            '{"title": "Fecha mala", "created_at": "ayer"}',
+            '',
+            '{"title": "Otra tarea", "description": "x"}',
+        ]
+        stats = imports.import_tasks(io.StringIO('\n'.join(lines)), 'ndjson', workers=2)
+        self.assertEqual((stats['imported'], stats['invalid']), (2, 3))
+        self.assertEqual([number for number, _ in stats['errors']], [2, 3, 4])
+        self.assertIn('title', stats['errors'][0][1])
+        self.assertEqual(
+            sorted(Task.objects.values_list('title', 'completed')),
+            [('Otra tarea', False), ('Revisar facturas', True)],
+        )
+
+    def test_command_reports_rate(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', encoding='utf-8') as fh:
+            fh.write('{"title": "Desde archivo"}\n')
+            fh.flush()
+            out = io.StringIO()
+            call_command('import_tasks', fh.name, stdout=out, stderr=io.StringIO())
+        self.assertIn('1 tareas importadas, 0 inválidas', out.getvalue())
+        self.assertIn('filas/s', out.getvalue())
+
+
+class SyntheticDataTests(TestCase):
+    def test_same_seed_same_rows(self):
+        now = timezone.now()
+        first = [synthetic.TaskFactory([1, 2], seed=7, now=now).build() for _ in range(20)]
+        second = [synthetic.TaskFactory([1, 2], seed=7, now=now).build() for _ in range(20)]
+        fields = lambda task: (task.title, task.description, task.completed, task.created_at, task.category_id)
+        self.assertEqual([fields(task) for task in first], [fields(task) for task in second])
+        self.assertTrue(all(task.created_at <= now for task in first))
+
+    def test_command_generates_in_chunks(self):
+        out = io.StringIO()
+        call_command('generate_tasks', '250', '--chunk-size', '100', stdout=out, stderr=io.StringIO())
+        self.assertIn('250 tareas sintéticas creadas', out.getvalue())
+        counts = counters.get_counts()
+        self.assertEqual(counts['total_count'], Task.objects.count())
+        self.assertEqual(counts['completed_count'], Task.objects.filter(completed=True).count())
+        # fechas repartidas en el pasado, no todas "ahora"
+        self.assertGreater(Task.objects.filter(created_at__lt=timezone.now() - timedelta(days=30)).count(), 0)
+        self.assertEqual(Category.objects.count(), len(synthetic.CATEGORIES))
+
+
+class BulkActionTests(TestCase):
+    HTMX = {'HX-Request': 'true'}
+
+    def setUp(self):
+        for title in ['Revisar facturas', 'Revisar inventario', 'Cargar combustible', 'Cerrar orden']:
+            Task.objects.create(title=title)
+        counters.rebuild()
+        rollups.rebuild()
+
+    def assertDerivedDataConsistent(self):
+        state = counters.get_counts()
+        daily = sorted(TaskDailyRollup.objects.exclude(created=0, completed=0).values_list('day', 'category_id', 'created', 'completed'))
+        self.assertEqual(state, counters.get_counts(counters.rebuild()))
+        rollups.rebuild()
+        self.assertEqual(daily, sorted(TaskDailyRollup.objects.values_list('day', 'category_id', 'created', 'completed')))
+
+    def task_updates(self, queries):
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "tasks_task"')]
+
+    def test_toggle_is_a_single_update(self):
+        task = Task.objects.get(title='Cerrar orden')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/toggle/{task.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.task_updates(queries)), 1)
+        self.assertFalse(any('FOR UPDATE' in q['sql'] for q in queries.captured_queries))
+        self.client.post(f'/toggle/{task.pk}/')
+        task.refresh_from_db()
+        self.assertEqual((task.completed, task.version), (False, 3))
+        self.assertEqual(self.client.post('/toggle/999999/').status_code, 404)
+        self.assertDerivedDataConsistent()
+
+    def test_complete_all_uses_current_list_filter(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/bulk/complete/', headers={
+                **self.HTMX, 'HX-Current-URL': 'http://testserver/?filter=pending&q=revisar',
+            })
+        self.assertEqual(len(self.task_updates(queries)), 1)
+        self.assertEqual(
+            set(Task.objects.filter(completed=True).values_list('title', flat=True)),
+            {'Revisar facturas', 'Revisar inventario'},
+        )
+        html = response.content.decode()
+        self.assertIn('id="task-list" class="space-y-2" hx-swap-oob="true"', html)
+        self.assertIn('hx-swap-oob="true"\n     hx-get="/stats/"', html.replace('\r', ''))
+        self.assertIn('2 tareas completadas.', html)
+        self.assertDerivedDataConsistent()
+
+    def test_toggle_and_delete_selected(self):
+        ids = list(Task.objects.filter(title__startswith='Revisar').values_list('id', flat=True))
+        response = self.client.post('/bulk/toggle/', {'ids': ids}, headers=self.HTMX)
+        for pk in ids:
+            self.assertContains(response, f'hx-swap-oob="true" id="task-{pk}"')
+        self.assertEqual(Task.objects.filter(completed=True).count(), 2)
+        self.assertDerivedDataConsistent()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/bulk/delete/', {'ids': [*ids, 999999]}, headers=self.HTMX)
+        self.assertEqual(sum(q['sql'].startswith('DELETE FROM "tasks_task"') for q in queries.captured_queries), 1)
+        for pk in ids:
+            self.assertContains(response, f'<div id="task-{pk}" hx-swap-oob="delete"></div>')
+        self.assertFalse(Task.objects.filter(id__in=ids).exists())
+        self.assertEqual(set(TaskTombstone.objects.values_list('task_id', flat=True)), set(ids))
+        self.assertDerivedDataConsistent()
+
+        self.assertEqual(self.client.post('/bulk/delete/', {}).status_code, 400)
+        self.assertContains(self.client.post('/bulk/toggle/', {}, headers=self.HTMX), 'Selecciona entre 1 y')
+
+
+class BulkAPITests(TestCase):
+    def setUp(self):
+        self.pending = Task.objects.create(title='Pendiente')
+        self.done = Task.objects.create(title='Hecha', completed=True)
+        counters.rebuild()
+
+    def post(self, items):
+        return self.client.post('/api/tasks/bulk/', items, content_type='application/json')
+
+    def test_applies_every_operation_and_bumps_counters(self):
+        version = counters.get_version()
+        response = self.post([
+            {'op': 'create', 'title': 'Nueva', 'completed': True},
+            {'op': 'update', 'id': self.pending.pk, 'title': 'Renombrada'},
+            {'op': 'toggle', 'id': self.pending.pk},
+            {'op': 'delete', 'id': self.done.pk},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.json()['results']], [201, 200, 200, 204])
+        self.pending.refresh_from_db()
+        self.assertEqual((self.pending.title, self.pending.completed), ('Renombrada', True))
+        self.assertFalse(Task.objects.filter(pk=self.done.pk).exists())
+        self.assertGreater(counters.get_version(), version)
+        self.assertEqual(counters.get_counts(), counters.get_counts(counters.rebuild()))
+        self.assertEqual(counters.get_counts()['total_count'], 2)
+
+    def test_missing_ids_do_not_block_the_rest(self):
+        version = counters.get_version()
+        response = self.post([
+            {'op': 'toggle', 'id': self.pending.pk},
+            {'op': 'toggle', 'id': 999999},
+            {'op': 'update', 'id': 999998, 'title': 'Nada'},
+            {'op': 'delete', 'id': 999997},
+        ])
+        self.assertEqual([r['status'] for r in response.json()['results']], [200, 404, 404, 404])
+        self.assertTrue(Task.objects.get(pk=self.pending.pk).completed)
+        self.assertGreater(counters.get_version(), version)
+
+    def test_invalid_items_are_reported_per_item(self):
+        response = self.post([
+            {'op': 'archivar', 'id': self.pending.pk},
+            {'op': 'toggle'},
+            'texto',
+            {'op': 'create', 'title': ''},
+            {'op': 'create', 'title': 'Válida'},
+        ])
+        results = response.json()['results']
+        self.assertEqual([r['status'] for r in results], [400, 400, 400, 400, 201])
+        self.assertIn('op', results[0]['errors'])
+        self.assertFalse(Task.objects.get(pk=self.pending.pk).completed)
+
+    def test_nothing_applied_leaves_the_version(self):
+        version = counters.get_version()
+        response = self.post([{'op': 'delete', 'id': 999999}, {'op': 'borrar', 'id': 1}])
+        self.assertEqual([r['status'] for r in response.json()['results']], [404, 400])
+        self.assertEqual(counters.get_version(), version)
+
+    def test_size_limit(self):
+        with mock.patch.object(bulk, 'MAX_ITEMS', 2):
+            response = self.post([{'op': 'toggle', 'id': self.pending.pk}] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Máximo 2', response.json()['non_field_errors'][0])
+        self.assertFalse(Task.objects.get(pk=self.pending.pk).completed)
+        self.assertEqual(self.post({'op': 'toggle'}).status_code, 400)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Finanzas')
+        self.now = timezone.make_aware(datetime(2026, 10, 18, 12, 30))
+        # 3 tareas el 16/10 (una completada y con categoría) y 1 el 18/10
+        imports.insert_tasks([
+            Task(title='Antigua 1', created_at=self.now - timedelta(days=2), completed=True, category=self.category),
+            Task(title='Antigua 2', created_at=self.now - timedelta(days=2)),
+            Task(title='Antigua 3', created_at=self.now - timedelta(days=2, hours=1)),
+            Task(title='Reciente', created_at=self.now - timedelta(minutes=10)),
+        ])
+
+    def snapshot(self):
+        return (
+            sorted(TaskDailyRollup.objects.exclude(created=0, completed=0)
+                   .values_list('day', 'category_id', 'created', 'completed')),
+            sorted(TaskHourlyRollup.objects.exclude(created=0, completed=0)
+                   .values_list('hour', 'category_id', 'created', 'completed')),
+        )
+
+    def test_write_paths_match_rebuild(self):
+        task = Task.objects.get(title='Antigua 2')
+        self.client.post('/create/', {'title': 'Nueva tarea', 'description': ''})
+        self.client.post(f'/toggle/{task.pk}/')
+        self.client.post(f'/delete/{Task.objects.get(title="Antigua 3").pk}/')
+        self.client.post('/api/tasks/', {'title': 'Desde la API', 'completed': True}, content_type='application/json')
+        others = list(Task.objects.filter(title__startswith='Antigua').values_list('id', flat=True))
+        self.client.post('/api/tasks/bulk/', [
+            {'op': 'create', 'title': 'Masiva'},
+            {'op': 'toggle', 'id': others[0]},
+            {'op': 'update', 'id': task.pk, 'completed': False},
+            {'op': 'delete', 'id': others[-1]},
+        ], content_type='application/json')
+
+        incremental = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_model_writes_outside_the_views_move_the_rollups(self):
+        params = {'from': '2026-10-16', 'to': '2026-10-18'}
+        totals = lambda category_id=None: rollups.summary(rollups.parse_window(params), category_id)['totals']
+        task = Task.objects.get(title='Antigua 2')
+        task.completed = True
+        task.category = self.category
+        task.save()
+        self.assertEqual(totals(), {'created': 4, 'completed': 2, 'pending': 2})
+        self.assertEqual(totals(self.category.pk), {'created': 2, 'completed': 2, 'pending': 0})
+        # editar sin cambiar estado ni categoría no escribe resúmenes
+        task.title = 'Renombrada'
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        self.assertFalse(any('rollup' in query['sql'] for query in queries.captured_queries))
+
+        Task.objects.create(title='Desde el shell', created_at=self.now, completed=True)
+        Task.objects.get(title='Antigua 1').delete()
+        self.assertEqual(totals(), {'created': 4, 'completed': 2, 'pending': 2})
+        self.assertEqual(totals(self.category.pk), {'created': 1, 'completed': 1, 'pending': 0})
+        # instancia sin el estado leído: se recalcula desde su día
+        deferred = Task.objects.only('id', 'title', 'created_at').get(title='Reciente')
+        deferred.completed = True
+        deferred.save()
+        incremental = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_admin_edits_move_the_rollups(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'clave'))
+        task = Task.objects.get(title='Antigua 3')
+        response = self.client.post(f'/admin/tasks/task/{task.pk}/change/', {
+            'title': task.title, 'description': '', 'completed': 'on', 'category': self.category.pk,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.client.post(f'/admin/tasks/task/{Task.objects.get(title="Reciente").pk}/delete/', {'post': 'yes'})
+        incremental = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(TaskDailyRollup.objects.get(day=date(2026, 10, 16), category_id=self.category.pk).completed, 2)
+
+    def test_summary_reads_rollups(self):
+        params = {'from': '2026-10-16', 'to': '2026-10-18'}
+        data = rollups.summary(rollups.parse_window(params))
+        self.assertEqual([p['created'] for p in data['series']], [3, 0, 1])
+        self.assertEqual(data['totals'], {'created': 4, 'completed': 1, 'pending': 3})
+        self.assertEqual(
+            [(c['name'], c['created']) for c in data['categories']],
+            [('Sin categoría', 3), ('Finanzas', 1)],
+        )
+        finanzas = rollups.summary(rollups.parse_window(params), self.category.pk)
+        self.assertEqual(finanzas['totals'], {'created': 1, 'completed': 1, 'pending': 0})
+
+        hourly = rollups.summary(rollups.parse_window({'range': '48h'}, now=self.now))
+        self.assertEqual(len(hourly['series']), 48)
+        # las del 16/10 (9:30 y 10:30) quedan antes de la ventana; la reciente cae en la última hora
+        self.assertEqual(hourly['totals']['created'], 1)
+        self.assertEqual(hourly['series'][-1]['created'], 1)
+
+    def test_dashboard_cost_does_not_depend_on_table_size(self):
+        self.client.get('/dashboard/data/')
+        with CaptureQueriesContext(connection) as before:
+            self.client.get('/dashboard/data/')
+        imports.insert_tasks([Task(title=f'Tarea {n}', created_at=self.now) for n in range(200)])
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get('/dashboard/data/')
+        self.assertEqual(len(before), len(after))
+        self.assertFalse(any('tasks_task"' in query['sql'] for query in after.captured_queries))
+        self.assertEqual(response.json()['granularity'], 'day')
+
+        self.assertEqual(self.client.get('/dashboard/data/?range=2y').status_code, 400)
+        self.assertContains(self.client.get('/dashboard/?range=7d'), 'Dashboard')
+        self.assertEqual(self.client.get('/dashboard/', headers={'HX-Request': 'true'}).status_code, 200)
+
+    def test_deleted_category_moves_to_no_category(self):
+        self.category.delete()
+        incremental = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_backfill_command(self):
+        TaskDailyRollup.objects.all().delete()
+        TaskHourlyRollup.objects.all().delete()
+        call_command('backfill_rollups', '--since', '2026-10-17', stdout=io.StringIO())
+        self.assertEqual(list(TaskDailyRollup.objects.values_list('day', 'created')), [(date(2026, 10, 18), 1)])
+        call_command('backfill_rollups', stdout=io.StringIO())
+        self.assertEqual(TaskDailyRollup.objects.filter(day=date(2026, 10, 16)).count(), 2)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        old = self.now - timedelta(days=120)
+        # creadas en días alternados: las archivadas quedan intercaladas con las que siguen en Task
+        imports.insert_tasks([
+            Task(title=f'Tarea {n}', completed=n % 2 == 0, created_at=self.now - timedelta(days=10 - n))
+            for n in range(10)
+        ])
+        Task.objects.filter(completed=True).exclude(title='Tarea 8').update(updated_at=old)
+        Task.objects.filter(title='Tarea 1').update(updated_at=old)
+        counters.rebuild()
+        rollups.rebuild()
+        self.ordered = list(Task.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def archive(self, **options):
+        call_command('archive_tasks', stdout=io.StringIO(), **options)
+
+    def test_command_moves_old_completed_tasks_in_batches(self):
+        daily = sorted(TaskDailyRollup.objects.values_list('day', 'category_id', 'created', 'completed'))
+        out = io.StringIO()
+        call_command('archive_tasks', dry_run=True, stdout=out)
+        self.assertIn('4 tareas', out.getvalue())
+        with CaptureQueriesContext(connection) as queries:
+            self.archive(batch_size=3)
+        # Tareas 0, 2, 4, 6: completadas y sin cambios hace 120 días (8 es reciente, 1 está pendiente)
+        self.assertEqual(sorted(TaskArchive.objects.values_list('title', flat=True)),
+                         ['Tarea 0', 'Tarea 2', 'Tarea 4', 'Tarea 6'])
+        self.assertEqual(Task.objects.count(), 6)
+        self.assertEqual(set(TaskTombstone.objects.values_list('task_id', flat=True)),
+                         set(TaskArchive.objects.values_list('id', flat=True)))
+        self.assertEqual(len([q for q in queries.captured_queries if q['sql'].startswith('DELETE FROM "tasks_task"')]), 2)
+        self.assertEqual(counters.get_counts(), counters.get_counts(counters.rebuild()))
+        rollups.rebuild()
+        self.assertEqual(daily, sorted(TaskDailyRollup.objects.values_list('day', 'category_id', 'created', 'completed')))
+        self.archive()
+        self.assertEqual(TaskArchive.objects.count(), 4)
+
+    def test_batch_writes_derived_data_on_the_same_database(self):
+        with mock.patch.object(counters, 'record_bulk', wraps=counters.record_bulk) as record_bulk, \
+                mock.patch.object(fragments, 'invalidate', wraps=fragments.invalidate) as invalidate:
+            moved, _ = archive.archive_batch(archive.cutoff(None), using='default')
+        self.assertEqual(moved, 4)
+        self.assertEqual(record_bulk.call_args.kwargs['using'], 'default')
+        self.assertEqual(invalidate.call_args.kwargs['using'], 'default')
+
+    def test_list_api_and_export_read_archive_on_request(self):
+        self.archive()
+        archived = set(TaskArchive.objects.values_list('id', flat=True))
+        response = self.client.get('/', {'filter': 'completed'})
+        self.assertEqual([task.pk for task in response.context['tasks']], [self.ordered[1]])
+
+        # la lista con archivo pagina ambas fuentes con el mismo cursor
+        seen, cursor = [], None
+        while True:
+            params = {'archived': 'include', **({'cursor': cursor} if cursor else {})}
+            with mock.patch('tasks.views.TaskListView.paginate_by', 3):
+                response = self.client.get('/', params, headers={'HX-Request': 'true'})
+            seen += [task.pk for task in response.context['tasks']]
+            cursor = response.context['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, self.ordered)
+        self.assertContains(self.client.get('/', {'archived': 'only'}), 'Archivada</span>', count=4)
+        self.assertEqual(self.client.get('/', {'archived': 'sí'}).status_code, 400)
+
+        ids, url = [], '/api/tasks/?archived=include&page_size=4&fields=id'
+        while url:
+            data = self.client.get(url).json()
+            ids += [task['id'] for task in data['results']]
+            url = data['next']
+        self.assertEqual(ids, self.ordered)
+        only = self.client.get('/api/tasks/', {'archived': 'only', 'q': 'tarea'}).json()['results']
+        self.assertEqual({task['id'] for task in only}, archived)
+        self.assertEqual(self.client.get('/api/tasks/', {'archived': 'x'}).status_code, 400)
+        ndjson = self.client.get('/api/tasks/?archived=include&format=ndjson')
+        self.assertEqual(len(b''.join(ndjson.streaming_content).splitlines()), 10)
+
+        exported = b''.join(self.client.get('/export/csv/', {'archived': 'include'}).streaming_content).decode()
+        self.assertEqual([int(line.split(',')[0]) for line in exported.splitlines()[1:]], self.ordered)
+
+    async def test_async_views_read_archive(self):
+        await sync_to_async(self.archive)()
+        response = await self.async_client.get('/api/tasks/async/', {'archived': 'include', 'fields': 'id'})
+        self.assertEqual([task['id'] for task in response.json()['results']], self.ordered)
+        request = RequestFactory().get('/export/csv/', {'archived': 'include'})
+        response = await async_views.TaskExportCSVView.as_view()(request)
+        exported = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertEqual([int(line.split(',')[0]) for line in exported.splitlines()[1:]], self.ordered)
+
+
+@override_settings(TASK_METRICS_PATH=None, TASK_METRICS_TOKEN=None)
+class MetricsTests(TestCase):
+    def setUp(self):
+        Task.objects.create(title='Medida')
+        patcher = mock.patch.object(metrics, 'registry', metrics.Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/', headers={'HX-Request': 'true'})
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        for metric in ('db;dur=', 'tpl;dur=', 'app;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        tpl = float(timing.split('tpl;dur=')[1].split(',')[0])
+        self.assertGreater(tpl, 0)
+
+    def test_prometheus_histograms(self):
+        for _ in range(3):
+            self.client.get('/stats/')
+        text = self.client.get('/metrics').content.decode()
+        self.assertIn('# TYPE tasks_http_request_duration_seconds histogram', text)
+        self.assertIn('tasks_http_request_duration_seconds_count{view="tasks:stats",method="GET"} 3', text)
+        self.assertIn('tasks_http_db_queries_bucket{view="tasks:stats",method="GET",le="+Inf"} 3', text)
+        self.assertIn('tasks_http_responses_total{view="tasks:stats",method="GET",status="200"} 3', text)
+
+    def test_workers_share_totals_through_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with override_settings(TASK_METRICS_PATH=f'{directory.name}/metrics.sqlite3'):
+            self.client.get('/stats/')
+            metrics.flush(force=True)
+            self.assertEqual(metrics.registry.histograms, {})
+            # otro "worker": registro propio, mismo archivo
+            with mock.patch.object(metrics, 'registry', metrics.Registry()):
+                self.client.get('/stats/')
+                text = metrics.render()
+        self.assertIn('tasks_http_request_duration_seconds_count{view="tasks:stats",method="GET"} 2', text)
+
+    @override_settings(TASK_METRICS_TOKEN='secreto')
+    def test_token_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer secreto'}).status_code, 200)
+
+
+class CompressionTests(TestCase):
+    GZIP = {'Accept-Encoding': 'gzip, deflate'}
+
+    def setUp(self):
+        now = timezone.now()
+        imports.insert_tasks([
+            Task(title=f'Revisar facturas {n}', description='Detalle ' * 10, created_at=now - timedelta(minutes=n))
+            for n in range(60)
+        ])
+        counters.rebuild()
+
+    def test_html_and_json_are_compressed_with_weak_etag(self):
+        for url, headers in (('/', {'HX-Request': 'true'}), ('/api/tasks/', {})):
+            with self.subTest(url=url):
+                plain = self.client.get(url, headers=headers)
+                response = self.client.get(url, headers={**headers, **self.GZIP})
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(gzip.decompress(response.content), plain.content)
+                self.assertLess(len(response.content), len(plain.content) / 4)
+                self.assertTrue(response['ETag'].startswith('W/'))
+                again = self.client.get(url, headers={**headers, **self.GZIP, 'If-None-Match': response['ETag']})
+                self.assertEqual(again.status_code, 304)
+
+    def test_streaming_csv_is_compressed_per_chunk(self):
+        plain = b''.join(self.client.get('/export/csv/').streaming_content)
+        response = self.client.get('/export/csv/', headers=self.GZIP)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+        # cada bloque se puede descomprimir apenas llega, sin esperar al siguiente
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = compression.compress_stream(iter(['id,title\r\n', b'1,Uno\r\n', '2,Dos\r\n']), 'gzip')
+        self.assertEqual(decompressor.decompress(next(chunks)), b'id,title\r\n')
+        self.assertEqual(decompressor.decompress(next(chunks)), b'1,Uno\r\n')
+        self.assertEqual(decompressor.decompress(b''.join(chunks)), b'2,Dos\r\n')
+
+    def test_skips_small_unaccepted_and_disabled(self):
+        stats = self.client.get('/stats/', headers=self.GZIP)
+        self.assertFalse(stats.has_header('Content-Encoding'))
+        refused = self.client.get('/', headers={'HX-Request': 'true', 'Accept-Encoding': 'gzip;q=0, identity'})
+        self.assertFalse(refused.has_header('Content-Encoding'))
+        with override_settings(TASK_COMPRESSION=False):
+            self.assertFalse(self.client.get('/', headers=self.GZIP).has_header('Content-Encoding'))
+        self.assertEqual(compression.accepted_encodings('br;q=1.0, gzip;q=0.5, *;q=0'), {'br', 'gzip'})
+
+    @skipUnless(compression.brotli, 'requiere brotli')
+    def test_brotli_preferred_when_installed(self):
+        plain = self.client.get('/', headers={'HX-Request': 'true'})
+        response = self.client.get('/', headers={'HX-Request': 'true', 'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
+
+    def test_warm_compiles_app_templates_once(self):
+        loader = engines.all()[0].engine.template_loaders[0]
+        loader.reset()
+        self.assertGreaterEqual(template_backends.warm(), 10)
+        self.assertIn('tasks/partials/task_row_partial.html', loader.get_template_cache)
+        with mock.patch.object(loader.loaders[1], 'get_contents') as read:
+            self.client.get('/', headers={'HX-Request': 'true'})
+        read.assert_not_called()
+
+
+@override_settings(TASK_CHANGES_SETTLE_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.kept = Task.objects.create(title='Se queda')
+        self.edited = Task.objects.create(title='Se edita')
+        self.deleted = Task.objects.create(title='Se borra')
+
+    def changes(self, query=''):
+        response = self.client.get(f'/api/tasks/changes/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_only_churn_since_token(self):
+        first = self.changes()
+        self.assertEqual(len(first['updated']), 3)
+        self.assertFalse(first['has_more'])
+
+        self.client.post(f'/toggle/{self.edited.pk}/')
+        self.client.post(f'/delete/{self.deleted.pk}/')
+        created = Task.objects.create(title='Nueva')
+        data = self.changes(f"since={first['token']}&fields=id,completed")
+        self.assertEqual(data['updated'], [
+            {'id': self.edited.pk, 'completed': True},
+            {'id': created.pk, 'completed': False},
+        ])
+        self.assertEqual(data['deleted'], [self.deleted.pk])
+        self.assertEqual(self.changes(f"since={data['token']}")['updated'], [])
+
+    def test_pages_with_limit(self):
+        token, seen = '', []
+        while True:
+            data = self.changes(f'limit=2&since={token}' if token else 'limit=2')
+            seen += [task['id'] for task in data['updated']]
+            token = data['token']
+            if not data['has_more']:
+                break
+        self.assertEqual(seen, [self.kept.pk, self.edited.pk, self.deleted.pk])
+
+    def test_bulk_and_model_deletes_leave_tombstones(self):
+        token = self.changes()['token']
+        ids = [self.deleted.pk, self.edited.pk]
+        self.deleted.delete()
+        self.client.post('/api/tasks/bulk/', [{'op': 'delete', 'id': self.edited.pk}], content_type='application/json')
+        self.assertEqual(self.changes(f'since={token}')['deleted'], ids)
+
+    def test_bulk_delete_writes_tombstones_in_one_statement(self):
+        extra = Task.objects.bulk_create([Task(title=f'Extra {i}') for i in range(20)])
+        ids = [task.pk for task in extra]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/tasks/bulk/', [{'op': 'delete', 'id': pk} for pk in ids], content_type='application/json'
+            )
+        self.assertEqual({item['status'] for item in response.json()['results']}, {204})
+        inserts = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "tasks_tasktombstone"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(set(TaskTombstone.objects.values_list('task_id', flat=True)), set(ids))
+        self.assertFalse(Task.objects.filter(pk__in=ids).exists())
+
+    def test_archived_tasks_leave_the_feed(self):
+        first = self.changes()
+        Task.objects.filter(pk=self.kept.pk).update(completed=True, updated_at=timezone.now() - timedelta(days=365))
+        self.assertEqual(archive.archive(), 1)
+        data = self.changes(f"since={first['token']}")
+        self.assertEqual(data['deleted'], [self.kept.pk])
+        # el espejo que sigue el feed coincide con una descarga completa
+        mirror = {task['id'] for task in first['updated']} - set(data['deleted'])
+        listed = {task['id'] for task in self.client.get('/api/tasks/').json()['results']}
+        self.assertEqual(mirror, listed)
+
+    def test_expired_and_invalid_tokens(self):
+        token = self.changes()['token']
+        with override_settings(TASK_TOMBSTONE_RETENTION_DAYS=0):
+            self.assertEqual(self.client.get(f'/api/tasks/changes/?since={token}').status_code, 410)
+        self.assertEqual(self.client.get('/api/tasks/changes/?since=basura').status_code, 400)
+
+
+@override_settings(TASK_WRITE_RATE=1, TASK_WRITE_BURST=2)
+class AdmissionTests(TestCase):
+    def setUp(self):
+        self.task = Task.objects.create(title='Uno')
+        counters.rebuild()
+        caches['shared'].delete('write-bucket:127.0.0.1')
+        self.addCleanup(caches['shared'].delete, 'write-bucket:127.0.0.1')
+
+    def test_token_bucket_refills_at_rate(self):
+        bucket = admission.TokenBucket(rate=2, burst=2, cache=caches['default'])
+        self.assertEqual([bucket.take('k', now=100) for _ in range(2)], [0, 0])
+        self.assertAlmostEqual(bucket.take('k', now=100), 0.5)
+        self.assertEqual(bucket.take('k', now=100.5), 0)
+
+    def test_writes_over_the_burst_get_429_with_retry_after(self):
+        for _ in range(2):
+            created = self.client.post('/api/tasks/', {'title': 'Nueva'}, content_type='application/json')
+            self.assertEqual(created.status_code, 201)
+        throttled = self.client.post('/api/tasks/', {'title': 'Nueva'}, content_type='application/json')
+        self.assertEqual(throttled.status_code, 429)
+        self.assertEqual(throttled['Retry-After'], '1')
+        # el balde es del cliente, no de la vista; las lecturas no lo gastan
+        toggle = self.client.post(f'/toggle/{self.task.pk}/', headers={'HX-Request': 'true'})
+        self.assertEqual(toggle.status_code, 429)
+        self.assertEqual(toggle['Retry-After'], '1')
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertFalse(Task.objects.get(pk=self.task.pk).completed)
+        with override_settings(TASK_WRITE_RATE=None):
+            self.assertEqual(self.client.post(f'/toggle/{self.task.pk}/').status_code, 200)
+
+    @override_settings(TASK_WRITE_RATE=None, TASK_WRITE_QUEUE_TIMEOUT=0.05)
+    def test_busy_writer_sheds_with_503(self):
+        gate = admission.WriteGate(concurrency=1, queue_size=1)
+        gate.slots.acquire()
+        self.addCleanup(gate.slots.release)
+        with mock.patch.object(admission, '_backend', return_value=gate):
+            # espera su turno hasta el plazo y se rinde
+            timed_out = self.client.post(f'/toggle/{self.task.pk}/', headers={'HX-Request': 'true'})
+            gate.waiting = 1
+            # cola llena: rechazo inmediato, en JSON fuera de HTMX
+            full = self.client.post('/api/tasks/', {'title': 'Nueva'}, content_type='application/json')
+        self.assertEqual((timed_out.status_code, timed_out['Retry-After']), (503, '1'))
+        self.assertEqual((full.status_code, full['Retry-After']), (503, '1'))
+        self.assertIn('detail', full.json())
+        self.assertFalse(Task.objects.get(pk=self.task.pk).completed)
+        self.assertEqual(Task.objects.count(), 1)
+
+    @override_settings(TASK_WRITE_RATE=None)
+    def test_database_locked_becomes_503(self):
+        with mock.patch('tasks.views.toggle_task', side_effect=OperationalError('database is locked')):
+            response = self.client.post(f'/toggle/{self.task.pk}/', headers={'HX-Request': 'true'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+@override_settings(TASK_WRITE_RATE=None)
+class GroupCommitTests(TransactionTestCase):
+    def setUp(self):
+        self.tasks = [Task.objects.create(title=f'Tarea {i}') for i in range(3)]
+        counters.rebuild()
+        self.writes = admission.WriteQueue(size=8, group_size=8)
+
+    def submit_all(self, funcs):
+        """Envía funcs mientras el hilo escritor está ocupado, para que entren juntas."""
+        busy, release = threading.Event(), threading.Event()
+        results = [None] * len(funcs)
+
+        def block():
+            busy.set()
+            release.wait()
+
+        def submit(index, func):
+            try:
+                results[index] = self.writes.submit(func, timeout=5)
+            except Exception as exc:
+                results[index] = exc
+
+        blocker = threading.Thread(target=self.writes.submit, args=(block, 5))
+        blocker.start()
+        busy.wait()
+        threads = [threading.Thread(target=submit, args=item) for item in enumerate(funcs)]
+        for thread in threads:
+            thread.start()
+        while self.writes.jobs.qsize() < len(funcs):
+            time.sleep(0.001)
+        release.set()
+        for thread in threads + [blocker]:
+            thread.join()
+        return results
+
+    def test_queued_writes_share_one_transaction(self):
+        def toggle(pk):
+            return lambda: (views.toggle_task(pk), connection.atomic_blocks[0])[1]
+
+        results = self.submit_all([toggle(task.pk) for task in self.tasks] + [toggle(0)])
+        outer = results[:3]
+        self.assertTrue(all(block is outer[0] for block in outer))
+        # el error de una escritura no deshace las demás del grupo
+        self.assertIsInstance(results[3], Http404)
+        self.assertEqual(Task.objects.filter(completed=True).count(), 3)
+        self.assertEqual(counters.get_counts()['completed_count'], 3)
+
+    def test_expired_write_is_dropped_not_run(self):
+        with self.assertRaises(admission.Overloaded):
+            self.writes.submit(lambda: views.toggle_task(self.tasks[0].pk), timeout=-1)
+        self.assertFalse(Task.objects.filter(completed=True).exists())
+
+    def test_views_go_through_the_queue(self):
+        with mock.patch.object(admission, '_backend', return_value=self.writes):
+            response = self.client.post(f'/toggle/{self.tasks[0].pk}/', headers={'HX-Request': 'true'})
+            created = self.client.post('/api/tasks/', {'title': 'Nueva'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(created.status_code, 201)
+        self.assertTrue(Task.objects.get(pk=self.tasks[0].pk).completed)
+        self.assertEqual(Task.objects.count(), 4)
+
+
+@override_settings(TASK_EVENTS_BROKER='tasks.events.RecordingBroker')
+class TaskEventsTests(TestCase):
+    def setUp(self):
+        events.get_broker.cache_clear()
+        self.task = Task.objects.create(title='Revisar facturas')
+
+    def test_toggle_publishes_row_and_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/toggle/{self.task.pk}/')
+        published = events.get_broker().events
+        self.assertEqual([event_type for event_type, _ in published], ['task', 'stats'])
+        self.assertTrue(published[0][1]['task']['completed'])
+        self.assertIn(f'id="task-{self.task.pk}"', published[0][1]['html'])
+
+    def test_delete_publishes_id(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/delete/{self.task.pk}/')
+        self.assertIn(('delete', {'id': self.task.pk}), events.get_broker().events)
+
+    async def test_stream_sends_published_events(self):
+        events.get_broker().publish('delete', {'id': 7})
+        response = await self.async_client.get('/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = response.streaming_content
+        self.assertEqual(await anext(content), b': conectado\n\n')
+        self.assertEqual(await anext(content), b'event: delete\ndata: {"id": 7}\n\n')
+        await content.aclose()
+
+
+# urlconf de AsyncLoadTests: variantes async sin depender de TASKS_ASYNC_VIEWS
+urlpatterns = [
+    path('async/export/csv/', async_views.TaskExportCSVView.as_view()),
+    path('async/stats/', async_views.TaskStatsView.as_view()),
+    path('async/api/tasks/', async_views.TaskAPIListView.as_view()),
+    path('', include('besimplit_tasks.urls')),
+]
+
+
+async def slow_client(app, url, delay):
+    """Cliente HTTP mínimo sobre ASGI que tarda `delay` segundos en leer cada bloque."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': url, 'raw_path': url.encode(),
+        'query_string': b'', 'root_path': '', 'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 1), 'server': ('testserver', 80),
+    }
+    requested = False
+    result = {'status': None, 'bytes': 0}
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+        elif message.get('body'):
+            result['bytes'] += len(message['body'])
+            await asyncio.sleep(delay)
+
+    await app(scope, receive, send)
+    return result
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class AsyncLoadTests(TransactionTestCase):
+    """Prueba de carga: cientos de clientes lentos concurrentes contra un solo proceso
+       ASGI. Con vistas async todos avanzan a la vez; atendidos de a uno (un worker
+       sync bloqueado por cliente) tardarían clients * delay * bloques."""
+    clients = 300
+    delay = 0.05
+
+    def setUp(self):
+        Task.objects.bulk_create([Task(title=f'Tarea {i}') for i in range(300)])
+        counters.rebuild()
+
+    async def run_clients(self, url):
+        app = ASGIHandler()
+        started = time.perf_counter()
+        results = await asyncio.gather(*(slow_client(app, url, self.delay) for _ in range(self.clients)))
+        return results, time.perf_counter() - started
+
+    def assertConcurrent(self, url, min_blocks):
+        results, elapsed = asyncio.run(self.run_clients(url))
+        self.assertEqual({result['status'] for result in results}, {200})
+        sequential = self.clients * self.delay * min_blocks
+        # al menos 5 veces más rápido que atender a los clientes de a uno
+        self.assertLess(elapsed, sequential / 5, f'{url}: {elapsed:.2f}s para {self.clients} clientes')
+
+    def test_slow_export_clients(self):
+        # cabecera + filas: dos bloques por cliente
+        self.assertConcurrent('/async/export/csv/', min_blocks=2)
+
+    def test_slow_api_clients(self):
+        self.assertConcurrent('/async/api/tasks/', min_blocks=1)
+
+    def test_slow_stats_clients(self):
+        self.assertConcurrent('/async/stats/', min_blocks=1)
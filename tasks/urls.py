@@ -1,16 +1,30 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = "tasks"
 
+# con TASKS_ASYNC_VIEWS (servidor ASGI) las vistas calientes usan sus variantes async
+hot = async_views if settings.TASKS_ASYNC_VIEWS else views
+
 urlpatterns = [
-    path("", views.TaskListView.as_view(), name="index"),
+    path("", hot.TaskListView.as_view(), name="index"),
     path("create/", views.TaskCreateView.as_view(), name="create"),
-    path("toggle/<int:pk>/", views.TaskToggleView.as_view(), name="toggle"),#url para toggle
+    path("toggle/<int:pk>/", hot.TaskToggleView.as_view(), name="toggle"),#url para toggle
+    path("bulk/complete/", views.TaskBulkCompleteView.as_view(), name="bulk-complete"),
+    path("bulk/toggle/", views.TaskBulkToggleView.as_view(), name="bulk-toggle"),
+    path("bulk/delete/", views.TaskBulkDeleteView.as_view(), name="bulk-delete"),
     path("delete/<int:pk>/", views.TaskDeleteView.as_view(), name="delete"),
     path("update/<int:pk>/", views.TaskUpdateView.as_view(), name="update"),
     path("edit-form/<int:pk>/", views.TaskEditFormView.as_view(), name="edit-form"),
-    path("detail/<int:pk>/", views.TaskDetailView.as_view(), name="detail"),
-    path("stats/", views.TaskStatsView.as_view(), name="stats"),
-    path("export/csv/", views.TaskExportCSVView.as_view(), name="export-csv"),
+    path("detail/<int:pk>/", hot.TaskDetailView.as_view(), name="detail"),
+    path("stats/", hot.TaskStatsView.as_view(), name="stats"),
+    path("events/", views.TaskEventsView.as_view(), name="events"),
+    path("export/csv/", hot.TaskExportCSVView.as_view(), name="export-csv"),
+    path("export/jobs/", views.ExportJobCreateView.as_view(), name="export-job-create"),
+    path("export/jobs/<uuid:pk>/", views.ExportJobStatusView.as_view(), name="export-job"),
+    path("export/jobs/<uuid:pk>/download/", views.ExportJobDownloadView.as_view(), name="export-job-download"),
+    path("dashboard/", views.DashboardView.as_view(), name="dashboard"),
+    path("dashboard/data/", views.DashboardDataView.as_view(), name="dashboard-data"),
+    path("metrics", views.MetricsView.as_view(), name="metrics"),
 ]
@@ -1,55 +1,111 @@
 # tasks/views.py
 # Vistas del módulo de tareas. Aquí se maneja:
-# listado (con filtro),
+# listado (con filtro y, si se pide, con las tareas archivadas),
 # creación, edición y eliminación,
 # alternar completado,
+# acciones masivas (completar lo filtrado, alternar y eliminar seleccionadas),
 # parciales HTMX (lista, fila, stats),
-# exportación CSV.
+# eventos SSE con los cambios (requiere ASGI),
+# exportación CSV (streaming y en segundo plano),
+# dashboard (desde los resúmenes precalculados),
+# métricas en formato Prometheus.
 
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, CreateView, UpdateView, View
-from django.http import HttpResponse
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, QueryDict, StreamingHttpResponse
 from django.template.loader import render_to_string
 from django.urls import reverse_lazy
-from .models import Task
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+from .models import STATUS_FILTERS, ExportJob, Task
 from .forms import TaskForm
-import csv
+from . import admission, archive, bulk, conditional, counters, events, exports, fragments, metrics, pagecache, rollups
+from .pagination import InvalidCursor, paginator_for
+
+
+def filter_tasks(queryset, params):
+    """Aplica el filtro (all, pending, completed) y la búsqueda q de la lista."""
+    return queryset.by_status(params.get('filter', 'all')).search(params.get('q'))
+
+
+def list_querysets(params):
+    """Querysets de la lista (tareas, archivo o ambos según ?archived=), filtrados y
+       en el orden de la lista. BadRequest si archived no es válido."""
+    try:
+        return archive.querysets(
+            params, lambda queryset: filter_tasks(queryset.order_by('-created_at', '-id'), params)
+        )
+    except ValueError as exc:
+        raise BadRequest(str(exc))
 
 
 # LISTAR TAREAS
+@method_decorator(cache_control(no_cache=True), name='get')
+@method_decorator(vary_on_headers('HX-Request'), name='get')
+@method_decorator(condition(etag_func=conditional.list_etag,
+                            last_modified_func=conditional.table_last_modified), name='get')
+@method_decorator(pagecache.shared_cache('list', conditional.list_etag, only_htmx=True), name='get')
 class TaskListView(ListView):
-    """Vista principal que lista todas las tareas y si es HTMX devuelve el parcial de la lista."""
+    """Vista principal que lista todas las tareas y si es HTMX devuelve el parcial de la lista.
+       Pagina por cursor: con ?cursor=... devuelve solo la página siguiente (scroll infinito).
+       Con ?q=... busca en título y descripción (índice FTS) y ordena por relevancia.
+       Con ?archived=include suma las tareas archivadas y con ?archived=only muestra solo esas.
+       ETag por versión de la tabla: si no hubo cambios responde 304.
+       Los parciales HTMX se comparten entre workers por la caché compartida."""
     model = Task
     template_name = "tasks/index.html"
     context_object_name = "tasks"
+    paginate_by = 50
 
     def get_queryset(self):
-        """Filtra tareas según parámetro filter en la URL (all, pending, completed)."""
-        qs = super().get_queryset().order_by('-created_at')
-        filter_type = self.request.GET.get('filter', 'all')
-
-        if filter_type == 'pending':
-            qs = qs.filter(completed=False)
-        elif filter_type == 'completed':
-            qs = qs.filter(completed=True)
-        return qs
+        """Filtra tareas según parámetro filter en la URL (all, pending, completed) y búsqueda q.
+           Con ?archived= las fuentes a leer quedan en self.sources (la primera se devuelve)."""
+        self.sources = list_querysets(self.request.GET)
+        return self.sources[0]
+
+    def paginate_queryset(self, queryset, page_size):
+        """Pagina por (created_at, id) en vez de OFFSET; el costo no crece con la profundidad.
+           Los resultados de búsqueda se paginan por (relevancia, id). Con varias fuentes
+           cada una aporta su página desde el mismo cursor y se mezclan."""
+        try:
+            rows, self.next_cursor = paginator_for(queryset, page_size).paginate_many(
+                self.sources, self.request.GET.get('cursor')
+            )
+        except InvalidCursor:
+            raise Http404('Cursor inválido.')
+        return (None, None, rows, self.next_cursor is not None)
 
     def get_context_data(self, **kwargs):
-        """Agrega contadores al contexto para usarlos en la ui"""
+        """Agrega contadores y cursor de la página siguiente al contexto para usarlos en la ui"""
         context = super().get_context_data(**kwargs)
-        all_tasks = Task.objects.all()
-        context['completed_count'] = all_tasks.filter(completed=True).count()
-        context['pending_count'] = all_tasks.filter(completed=False).count()
+        context['next_cursor'] = self.next_cursor
+        context['filter_type'] = self.request.GET.get('filter', 'all')
+        context['query'] = self.request.GET.get('q', '')
+        context['archived'] = self.request.GET.get(archive.PARAM, '')
+        # filas desde la caché de fragmentos: solo se renderizan las que cambiaron
+        context['task_rows'] = fragments.render_rows(context['tasks'])
+        context.update(counters.get_counts(conditional.table_state(self.request)))
         return context
 
     def get_template_names(self):
-        """Si es una petición HTMX, responde con el parcial para actualizar solo la lista."""
+        """Si es una petición HTMX, responde con el parcial para actualizar solo la lista
+           o, si trae cursor, solo con las filas de la página siguiente."""
         if self.request.headers.get('HX-Request'):
+            if self.request.GET.get('cursor'):
+                return ["tasks/partials/task_page_partial.html"]
             return ["tasks/partials/task_list_partial.html"]
         return [self.template_name]
 
 
 # CREAR TAREA
+@method_decorator(admission.throttle_writes, name='dispatch')
 class TaskCreateView(CreateView):
     """Crea una nueva tarea con HTMX devuelve la fila recién creada y un formulario limpio."""
     model = Task
@@ -57,15 +113,11 @@ class TaskCreateView(CreateView):
     template_name = "tasks/partials/task_form_partial.html"
 
     def form_valid(self, form):
-        self.object = form.save()
+        self.object = admission.run_write(lambda: self.create(form))
 
         if self.request.headers.get('HX-Request'):
             # Renderizar la nueva tarea (fila) para insertarla en la lista
-            task_html = render_to_string(
-                "tasks/partials/task_row_partial.html",
-                {'task': self.object},
-                request=self.request
-            )
+            task_html = fragments.render_row(self.object)
             
             # devolver la nueva fila y disparar actualización de estadísticas (contador)
             response = HttpResponse(task_html)
@@ -75,6 +127,12 @@ class TaskCreateView(CreateView):
 
         return redirect(reverse_lazy('tasks:index'))
 
+    def create(self, form):
+        with transaction.atomic():
+            task = form.save()
+            events.publish_task(task, created=True)
+        return task
+
     def form_invalid(self, form):
         # Si hay errores con HTMX devolvemos el mismo form con errores y dónde hacer swap
         if self.request.headers.get('HX-Request'):
@@ -91,32 +149,113 @@ class TaskCreateView(CreateView):
 
 
 # TOGGLE COMPLETADO
+def toggle_task(pk):
+    """Invierte el estado de la tarea con un solo UPDATE y relee la fila (como haría
+       RETURNING); actualiza contadores, resúmenes, caché y eventos en la misma transacción."""
+    with transaction.atomic():
+        if not Task.objects.filter(pk=pk).toggle():
+            raise Http404('No existe la tarea.')
+        task = Task.objects.get(pk=pk)
+        counters.record_toggled(task)
+        rollups.record_toggled(task)
+        fragments.invalidate(task.pk)
+        events.publish_task(task)
+    return task
+
+
+@method_decorator(admission.throttle_writes, name='dispatch')
 class TaskToggleView(View):
     """Marca o desmarca una tarea como completada y devuelve la fila actualizada."""
     def post(self, request, pk):
-        task = get_object_or_404(Task, pk=pk)
-        task.completed = not task.completed
-        task.save()
-
-        html = render_to_string(
-            "tasks/partials/task_row_partial.html",
-            {'task': task},
-            request=request
-        )
+        task = admission.run_write(lambda: toggle_task(pk))
+        html = fragments.render_row(task)
         response = HttpResponse(html)
         # dispara actualización de contadores que escuchen 'taskChanged'
         response['HX-Trigger'] = 'taskChanged'
         return response
 
 
+# ACCIONES MASIVAS
+def list_params(request):
+    """Filtro y búsqueda de la lista que está viendo el usuario: los de la URL actual
+       (HX-Current-URL, que sigue a hx-push-url) o, sin HTMX, los del formulario."""
+    current = request.headers.get('HX-Current-URL')
+    return QueryDict(urlsplit(current).query) if current else request.POST
+
+
+@method_decorator(admission.throttle_writes, name='dispatch')
+class TaskBulkActionView(View):
+    """Base de las acciones masivas de la lista. Con HTMX responde una sola vez con
+       swaps out-of-band (filas, lista, contadores y mensaje); sin HTMX redirige."""
+    def post(self, request):
+        context = admission.run_write(lambda: self.apply(request))
+        if context is None:
+            message = f'Selecciona entre 1 y {bulk.MAX_SELECTED} tareas.'
+            if not request.headers.get('HX-Request'):
+                return HttpResponseBadRequest(message)
+            # HTMX no hace swaps con un 400: el mensaje va como cualquier otro resultado
+            context = {'message': message}
+        elif not request.headers.get('HX-Request'):
+            return redirect(reverse_lazy('tasks:index'))
+        context.update(counters.get_counts())
+        html = render_to_string("tasks/partials/bulk_result_partial.html", context, request=request)
+        return HttpResponse(html)
+
+    def selected_ids(self, request):
+        """Ids marcados (name="ids"); None si no hay o superan el máximo."""
+        ids = {int(value) for value in request.POST.getlist('ids') if value.isdigit()}
+        return sorted(ids) if 0 < len(ids) <= bulk.MAX_SELECTED else None
+
+
+class TaskBulkCompleteView(TaskBulkActionView):
+    """Completa todas las tareas del filtro y búsqueda actuales (no solo la página
+       visible) y devuelve la primera página de la lista ya actualizada."""
+    def apply(self, request):
+        params = list_params(request)
+        count = bulk.complete_all(filter_tasks(Task.objects.all(), params))
+        querysets = list_querysets(params)
+        rows, next_cursor = paginator_for(querysets[0], TaskListView.paginate_by).paginate_many(querysets)
+        return {
+            'message': f'{count} tareas completadas.',
+            'list': True,
+            'task_rows': fragments.render_rows(rows),
+            'next_cursor': next_cursor,
+            'filter_type': params.get('filter', 'all'),
+            'query': params.get('q', ''),
+            'archived': params.get(archive.PARAM, ''),
+        }
+
+
+class TaskBulkToggleView(TaskBulkActionView):
+    """Alterna el estado de las tareas seleccionadas y devuelve sus filas."""
+    def apply(self, request):
+        ids = self.selected_ids(request)
+        if ids is None:
+            return None
+        tasks = bulk.toggle_selected(ids)
+        return {
+            'message': f'{len(tasks)} tareas actualizadas.',
+            'rows': [fragments.out_of_band(row) for row in fragments.render_rows(tasks)],
+        }
+
+
+class TaskBulkDeleteView(TaskBulkActionView):
+    """Elimina las tareas seleccionadas y quita sus filas."""
+    def apply(self, request):
+        ids = self.selected_ids(request)
+        if ids is None:
+            return None
+        deleted = bulk.delete_selected(ids)
+        return {'message': f'{len(deleted)} tareas eliminadas.', 'deleted': deleted}
+
+
 # ELIMINAR TAREA
+@method_decorator(admission.throttle_writes, name='dispatch')
 class TaskDeleteView(View):
     """Elimina una tarea. Devuelve 200 vacío y dispara 'taskChanged' para refrescar contadores."""
 
     def post(self, request, pk):
-       
-        task = get_object_or_404(Task, pk=pk)
-        task.delete()
+        admission.run_write(lambda: self.delete_task(pk))
         # Respuesta vacía, el frontend se encarga de remover el nodo si corresponde
         response = HttpResponse("")
         response['HX-Trigger'] = 'taskChanged'
@@ -126,6 +265,14 @@ class TaskDeleteView(View):
     def delete(self, request, pk):
         return self.post(request, pk)
 
+    def delete_task(self, pk):
+        with transaction.atomic():
+            task = get_object_or_404(Task.objects.select_for_update(), pk=pk)
+            pk = task.pk
+            task.delete()
+            fragments.invalidate(pk)
+            events.publish_deleted(pk)
+
 
 # MOSTRAR FORMULARIO DE EDICIÓN
 class TaskEditFormView(View):
@@ -143,6 +290,7 @@ class TaskEditFormView(View):
 
 
 #ACTUALIZAR TAREA
+@method_decorator(admission.throttle_writes, name='dispatch')
 class TaskUpdateView(UpdateView):
     """Actualiza una tarea existente:
        HTMX: devuelve la fila actualizada y dispara 'taskChanged'.
@@ -152,14 +300,10 @@ class TaskUpdateView(UpdateView):
     template_name = "tasks/partials/task_edit_form_partial.html"
 
     def form_valid(self, form):
-        self.object = form.save()
+        self.object = admission.run_write(lambda: self.update(form))
 
         if self.request.headers.get('HX-Request'):
-            html = render_to_string(
-                "tasks/partials/task_row_partial.html",
-                {'task': self.object},
-                request=self.request
-            )
+            html = fragments.render_row(self.object)
             response = HttpResponse(html)
             response['HX-Trigger'] = 'taskChanged'
             return response
@@ -178,30 +322,36 @@ class TaskUpdateView(UpdateView):
             return HttpResponse(html, status=400)
         return super().form_invalid(form)
 
+    def update(self, form):
+        with transaction.atomic():
+            task = form.save()
+            fragments.invalidate(task.pk)
+            events.publish_task(task, stats=False)
+        return task
+
 
 # DETALLE (para cancelar edición)
+@method_decorator(cache_control(no_cache=True), name='get')
+@method_decorator(condition(etag_func=conditional.detail_etag), name='get')
 class TaskDetailView(View):
-    """Vuelve al modo lectura de la tarea (se usa al 'Cancelar' en edición)."""
+    """Vuelve al modo lectura de la tarea (se usa al 'Cancelar' en edición).
+       ETag por versión de la tarea."""
     def get(self, request, pk):
         task = get_object_or_404(Task, pk=pk)
-        html = render_to_string(
-            "tasks/partials/task_row_partial.html",
-            {'task': task},
-            request=request
-        )
+        html = fragments.render_row(task)
         return HttpResponse(html)
 
 
 # STATS PARCIAL PARA CONTADORES
+@method_decorator(cache_control(no_cache=True), name='get')
+@method_decorator(condition(etag_func=conditional.stats_etag,
+                            last_modified_func=conditional.table_last_modified), name='get')
+@method_decorator(pagecache.shared_cache('stats', conditional.stats_etag), name='get')
 class TaskStatsView(View):
-    """Devuelve el parcial de estadísticas (total, completadas, pendientes)."""
+    """Devuelve el parcial de estadísticas (total, completadas, pendientes) desde los contadores."""
     def get(self, request):
-        all_tasks = Task.objects.all()
-        context = {
-            'total_count': all_tasks.count(),
-            'completed_count': all_tasks.filter(completed=True).count(),
-            'pending_count': all_tasks.filter(completed=False).count(),
-        }
+        # una sola fila de contadores, sin COUNT sobre la tabla
+        context = counters.get_counts(conditional.table_state(request))
         html = render_to_string(
             "tasks/partials/stats_partial.html",
             context,
@@ -212,20 +362,138 @@ class TaskStatsView(View):
 
 #EXPORTAR CSV
 class TaskExportCSVView(View):
-    """Exporta todas las tareas como archivo CSV descargable."""
+    """Exporta las tareas como archivo CSV descargable, en streaming.
+       Acepta los mismos parámetros filter (all, pending, completed) y archived que la lista."""
     def get(self, request):
-        response = HttpResponse(content_type='text/csv')
+        filter_type = request.GET.get('filter', 'all')
+        try:
+            querysets = archive.querysets(request.GET, lambda queryset: queryset.by_status(filter_type))
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        response = StreamingHttpResponse(exports.stream_csv(*querysets), content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename="tasks_export.csv"'
+        return response
 
-        writer = csv.writer(response)
-        writer.writerow(['id', 'title', 'description', 'completed', 'created_at'])
-        for task in Task.objects.all().order_by('-created_at'):
-            writer.writerow([
-                task.id,
-                task.title,
-                task.description,
-                'true' if task.completed else 'false',
-                task.created_at.isoformat(),
-            ])
 
+# EVENTOS SSE
+class TaskEventsView(View):
+    """Stream text/event-stream con los cambios de tareas (filas, eliminaciones, stats).
+       Necesita un servidor ASGI (uvicorn/daphne); bajo WSGI responde 204 y el
+       navegador sigue con el refresco por HTMX (taskChanged)."""
+    async def get(self, request):
+        if 'wsgi.input' in request.META:
+            return HttpResponse(status=204)
+        response = StreamingHttpResponse(events.stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
         return response
+
+
+# EXPORTACIÓN EN SEGUNDO PLANO
+class ExportJobCreateView(View):
+    """Encola una exportación CSV (la procesa el comando run_export_jobs).
+       HTMX: devuelve el parcial de estado que se consulta solo. Sin HTMX: JSON con el id.
+       filter y archived van en el cuerpo del POST y se validan antes de encolar."""
+    def post(self, request):
+        filter_type = request.POST.get('filter') or 'all'
+        if filter_type not in STATUS_FILTERS:
+            return HttpResponseBadRequest(f"filter debe ser uno de: {', '.join(STATUS_FILTERS)}.")
+        try:
+            mode = archive.parse_mode(request.POST)
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        job = exports.enqueue(filter_type, mode)
+        if request.headers.get('HX-Request'):
+            html = render_to_string(
+                "tasks/partials/export_job_partial.html",
+                {'job': job},
+                request=request
+            )
+            return HttpResponse(html)
+        return JsonResponse({'id': str(job.pk), 'status': job.status}, status=202)
+
+
+class ExportJobStatusView(View):
+    """Devuelve el estado de una exportación (parcial HTMX o JSON)."""
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk)
+        if request.headers.get('HX-Request'):
+            html = render_to_string(
+                "tasks/partials/export_job_partial.html",
+                {'job': job},
+                request=request
+            )
+            return HttpResponse(html)
+        return JsonResponse({
+            'id': str(job.pk),
+            'status': job.status,
+            'rows_written': job.rows_written,
+        })
+
+
+class ExportJobDownloadView(View):
+    """Descarga el archivo de una exportación terminada."""
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, status=ExportJob.STATUS_DONE)
+        if not job.file_path.exists():
+            raise Http404('El archivo de la exportación ya no existe.')
+        return FileResponse(
+            open(job.file_path, 'rb'),
+            as_attachment=True,
+            filename='tasks_export.csv',
+            content_type='text/csv',
+        )
+
+
+# DASHBOARD
+@method_decorator(cache_control(no_cache=True), name='get')
+@method_decorator(vary_on_headers('HX-Request'), name='get')
+@method_decorator(condition(etag_func=conditional.dashboard_etag), name='get')
+class DashboardView(View):
+    """Tablero de tareas creadas, completadas y pendientes por día (u hora) y por categoría.
+       Parámetros: ?range=24h|48h|7d|30d|90d|365d o ?from=&to=, y ?category=<id>|none.
+       Lee solo los resúmenes (tasks/rollups.py). Si es HTMX devuelve solo el parcial."""
+    def get(self, request):
+        try:
+            window = rollups.parse_window(request.GET)
+            category = rollups.parse_category(request.GET.get('category'))
+        except ValueError as exc:
+            return HttpResponse(str(exc), status=400)
+        context = rollups.summary(window, category)
+        params = request.GET.copy()
+        params.pop('category', None)
+        context.update(
+            ranges=rollups.RANGES,
+            max_created=max(point['created'] for point in context['series']),
+            category_param=request.GET.get('category', ''),
+            category_name=next(
+                (row['name'] for row in context['categories'] if (row['id'] or 0) == category), None
+            ) if category is not None else None,
+            window_query=params.urlencode(),
+        )
+        template = "tasks/partials/dashboard_partial.html" if request.headers.get('HX-Request') else "tasks/dashboard.html"
+        return HttpResponse(render_to_string(template, context, request=request))
+
+
+@method_decorator(cache_control(no_cache=True), name='get')
+@method_decorator(condition(etag_func=conditional.dashboard_etag), name='get')
+class DashboardDataView(View):
+    """Datos del dashboard en JSON: {"granularity", "range", "start", "end", "category",
+       "totals", "series": [{"bucket", "created", "completed", "pending"}], "categories"}."""
+    def get(self, request):
+        try:
+            window = rollups.parse_window(request.GET)
+            category = rollups.parse_category(request.GET.get('category'))
+        except ValueError as exc:
+            return JsonResponse({'detail': str(exc)}, status=400)
+        return JsonResponse(rollups.summary(window, category))
+
+
+# MÉTRICAS
+class MetricsView(View):
+    """Histogramas por vista (tiempo total, SQL, templates) en formato de texto de Prometheus."""
+    def get(self, request):
+        token = settings.TASK_METRICS_TOKEN
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponse(status=401)
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')